@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'task_manager.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'task_manager.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'connectly_project.urls'
@@ -71,17 +75,89 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'connectly_project.wsgi.application'
 
+# Serve the task_manager read and like/unlike routes with async views.
+# Enable only under an ASGI server (e.g. uvicorn connectly_project.asgi:application).
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Configured from the environment: DB_ENGINE is 'sqlite' (default) or 'postgres',
+# with DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT. Setting DB_REPLICA_NAME
+# or DB_REPLICA_HOST adds a 'replica' database (DB_REPLICA_* falls back to DB_*)
+# that serves the reads made while handling GET requests. Full-text search
+# (task_manager/search.py) needs SQLite's FTS5 and answers 501 on PostgreSQL.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+def database_settings(prefix):
+    def env(key, default=''):
+        return os.environ.get(f'{prefix}_{key}', os.environ.get(f'DB_{key}', default))
+
+    if DB_ENGINE == 'postgres':
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env('NAME', 'connectly'),
+            'USER': env('USER'),
+            'PASSWORD': env('PASSWORD'),
+            'HOST': env('HOST'),
+            'PORT': env('PORT'),
+            # Reuse connections across requests, checking them before reuse
+            'CONN_MAX_AGE': int(env('CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env('NAME', BASE_DIR / 'db.sqlite3'),
+        # Reuse connections too, so the PRAGMAs below run once per connection
+        # rather than once per request
+        'CONN_MAX_AGE': int(env('CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds to wait for the write lock before raising "database is locked"
+            'timeout': int(env('BUSY_TIMEOUT', '20')),
+            # Take the write lock when a transaction starts so writers queue up
+            # instead of failing when a read transaction tries to upgrade
+            'transaction_mode': 'IMMEDIATE',
+            # Run on every new connection: WAL lets readers proceed alongside the
+            # writer, NORMAL syncs only at checkpoints, mmap avoids read syscalls
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA mmap_size={int(env('MMAP_SIZE', '268435456'))};"
+            ),
+        },
+    }
+
 DATABASES = {
+    'default': database_settings('DB'),
+}
+
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **database_settings('DB_REPLICA'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['task_manager.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a file or
+# Redis cache in production so workers share entries and invalidations.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'connectly'),
     }
 }
 
+# Upper bound on how long a cached response lives; signals normally retire it sooner
+RESPONSE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -123,3 +199,146 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    # orjson for JSON in and out (task_manager.renderers), MessagePack for
+    # clients that ask for application/msgpack when msgpack is installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'task_manager.renderers.ORJSONRenderer',
+        *(['task_manager.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'task_manager.renderers.ORJSONParser',
+        *(['task_manager.renderers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Report batch validation errors as {index: errors} for the failing items only
+    'LIST_SERIALIZER_ERRORS_AS_DICT': True,
+    # Token buckets of the write endpoints (task_manager.throttling), per acting
+    # user and per client IP: N requests per period, in bursts of up to N
+    'DEFAULT_THROTTLE_RATES': {
+        'like_user': '30/min',
+        'like_ip': '300/min',
+        'unlike_user': '30/min',
+        'unlike_ip': '300/min',
+        'comment_user': '10/min',
+        'comment_ip': '100/min',
+        'availability_ip': '60/min',
+    },
+    # DRF's exception handler, adding the RateLimit-* headers to throttled responses
+    'EXCEPTION_HANDLER': 'task_manager.throttling.exception_handler',
+}
+
+# Cache alias holding the throttle buckets; share it between workers in production
+
+THROTTLE_CACHE = os.environ.get('THROTTLE_CACHE', 'default')
+
+# Largest array accepted by the bulk create/update/delete endpoints
+
+BULK_MAX_BATCH_SIZE = 500
+
+# Queries slower than this are logged to the task_manager.slow_queries logger
+
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+
+# Prometheus metrics at /metrics, off (404) unless METRICS_ENABLED=1. A
+# comma-separated METRICS_ALLOWED_IPS then limits it to the scrapers' addresses.
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'task_manager.slow_queries': {'handlers': ['console'], 'level': 'WARNING'},
+        'task_manager.jobs': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Feed: comments previewed per post, and whether to serve it from the
+# materialized timeline table (run rebuild_timeline after switching it on)
+
+FEED_COMMENTS_PREVIEW = 3
+
+FEED_TIMELINE = os.environ.get('FEED_TIMELINE') == '1'
+
+# Serve the hot list endpoints from .values() rows instead of model serializers
+# (task_manager/fastpath.py); the output is the same either way.
+
+FAST_READ_PATH = os.environ.get('FAST_READ_PATH', '1') == '1'
+
+# Rows read per query by the streaming export endpoints
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Background jobs (task_manager/jobs.py). 'thread' runs them, and their
+# retries, on a thread pool in the web process; deployments running
+# `manage.py run_jobs` workers can set JOB_RUNNER=worker to leave jobs to them
+# instead. Retries wait JOB_RETRY_DELAY seconds, doubling each attempt, and an
+# attempt still running after JOB_TIMEOUT seconds is requeued.
+
+JOB_RUNNER = os.environ.get('JOB_RUNNER', 'thread')
+
+JOB_THREADS = 4
+
+JOB_MAX_ATTEMPTS = 3
+
+JOB_RETRY_DELAY = 10
+
+JOB_TIMEOUT = 600
+
+# Rows removed per transaction when deleting users and posts (task_manager/deletion.py)
+
+DELETE_BATCH_SIZE = 1000
+
+# Write-behind likes (task_manager/likebuffer.py). Like/unlike intents are
+# kept in LIKE_BUFFER_CACHE and written in bulk every LIKE_FLUSH_INTERVAL
+# seconds by a thread in each web process (0 leaves it to
+# `manage.py flush_likes`). Intents still unflushed after LIKE_BUFFER_TTL
+# seconds are dropped.
+
+LIKE_WRITE_BEHIND = os.environ.get('LIKE_WRITE_BEHIND') == '1'
+
+LIKE_BUFFER_CACHE = os.environ.get('LIKE_BUFFER_CACHE', 'default')
+
+LIKE_FLUSH_INTERVAL = float(os.environ.get('LIKE_FLUSH_INTERVAL', 1)) or None
+
+LIKE_FLUSH_BATCH_SIZE = 5000
+
+LIKE_BUFFER_TTL = 3600
+
+# Username/email pre-checks from per-process Bloom filters (task_manager/bloom.py),
+# sized for USER_BLOOM_CAPACITY users at USER_BLOOM_ERROR_RATE false positives
+# and rebuilt from the table every USER_BLOOM_MAX_AGE seconds
+
+USER_BLOOM_FILTER = os.environ.get('USER_BLOOM_FILTER') == '1'
+
+USER_BLOOM_CAPACITY = 100_000
+
+USER_BLOOM_ERROR_RATE = 0.01
+
+USER_BLOOM_MAX_AGE = 3600
+
+# Cursor pagination for the task_manager list endpoints
+
+CURSOR_PAGE_SIZE = 10
+
+CURSOR_MAX_PAGE_SIZE = 100
+
+# Archival (task_manager/archive.py, `manage.py archive`): comments older than
+# ARCHIVE_COMMENTS_AFTER_DAYS and completed tasks move to the archive tables,
+# ARCHIVE_BATCH_SIZE rows per transaction
+
+ARCHIVE_COMMENTS_AFTER_DAYS = int(os.environ.get('ARCHIVE_COMMENTS_AFTER_DAYS', 365))
+
+ARCHIVE_BATCH_SIZE = 1000
@@ -0,0 +1,40 @@
+"""
+API-only settings for connectly_project.
+
+Everything in settings.py, minus what only the admin and browser-facing pages
+need: the admin, auth, contenttypes, sessions, messages and staticfiles apps,
+their middleware, the template engine and DRF's browsable API. The task_manager
+endpoints are unauthenticated JSON/MessagePack, so they serve the same responses
+with less imported and initialized per worker. Select it with
+DJANGO_SETTINGS_MODULE=connectly_project.settings_api; compare the two with
+`manage.py benchmark_startup`.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    'rest_framework',
+    'task_manager',
+]
+
+MIDDLEWARE = [
+    'task_manager.middleware.RequestMetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'task_manager.middleware.ReplicaRoutingMiddleware',
+]
+
+# Error pages fall back to Django's built-in responses
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        renderer for renderer in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+        if renderer != 'rest_framework.renderers.BrowsableAPIRenderer'
+    ],
+    # No auth app: requests are anonymous, with request.user None
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
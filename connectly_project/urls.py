@@ -14,15 +14,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.http import HttpResponse
+from task_manager.views import metrics
 
 def home(request):
     return HttpResponse("Welcome to Connectly, people!")
 
 urlpatterns = [
     path('', home, name='home'),
-    path('admin/', admin.site.urls),
     path('task_manager/', include('task_manager.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
+
+# Not installed under the API-only settings (settings_api.py)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import router, transaction
+from django.utils.timezone import now
+from .models import Task, Comment, ArchivedTask, ArchivedComment
+from .signals import propagate
+from . import search
+
+# Archival of cold rows
+# Comments older than ARCHIVE_COMMENTS_AFTER_DAYS and completed tasks move
+# from the live tables into ArchivedComment and ArchivedTask, keeping their
+# ids, so the tables and indexes the hot endpoints read stop growing with the
+# history. Each batch of ARCHIVE_BATCH_SIZE rows is locked, copied and deleted
+# in one transaction: a run can be interrupted at any point without losing or
+# duplicating a row, and the next run carries on with whatever still matches.
+#
+# The list endpoints read only the live tables unless called with
+# ?include_archived=1, which reads both through the UNION ALL views of
+# TaskIncludingArchived and CommentIncludingArchived. Archived rows are
+# read-only: they leave full-text search and the feed, and the update and
+# delete endpoints no longer find them. Deleting their user or post still
+# removes them.
+
+def requested(request):
+    """Whether a list request asked for archived rows as well."""
+    return request.GET.get('include_archived') in ('1', 'true')
+
+def archive_comments(older_than=None, batch_size=None, max_batches=None, progress=None):
+    """Move comments created before `older_than` (default: ARCHIVE_COMMENTS_AFTER_DAYS ago) to the archive.
+
+    Returns the number moved. Stops after `max_batches` batches if given;
+    `progress(done)` is called after every batch.
+    """
+    cutoff = older_than or now() - timedelta(days=settings.ARCHIVE_COMMENTS_AFTER_DAYS)
+    rows = Comment.objects.filter(created_at__lt=cutoff).order_by('created_at', 'id')
+    return _move(rows, ArchivedComment, _comments_moved, batch_size, max_batches, progress)
+
+def archive_tasks(batch_size=None, max_batches=None, progress=None):
+    """Move completed tasks to the archive; see archive_comments."""
+    rows = Task.objects.filter(is_completed=True).order_by('id')
+    return _move(rows, ArchivedTask, _tasks_moved, batch_size, max_batches, progress)
+
+def _move(queryset, archive_model, moved, batch_size, max_batches, progress):
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    columns = [field.attname for field in archive_model._meta.concrete_fields if field.name != 'archived_at']
+    done = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic(using=router.db_for_write(queryset.model)):
+            # Locked, so a concurrent edit lands before the copy or finds the row gone
+            rows = list(queryset.select_for_update().values(*columns)[:batch_size])
+            if not rows:
+                break
+            archived_at = now()
+            archive_model.objects.bulk_create(archive_model(**row, archived_at=archived_at) for row in rows)
+            live = queryset.model.objects.filter(id__in=[row['id'] for row in rows])
+            live._raw_delete(router.db_for_write(queryset.model))
+            scopes, post_ids = moved(rows)
+        propagate(scopes, post_ids)
+        done += len(rows)
+        batches += 1
+        if progress is not None:
+            progress(done)
+    return done
+
+# Side effects of the skipped post_delete signals, as in deletion.py:
+# (cache scopes, timeline post ids) to propagate.
+
+def _comments_moved(rows):
+    post_ids = {row['post_id'] for row in rows}
+    search.remove(Comment, [row['id'] for row in rows])
+    return {'comment', *(f'comment:post:{post_id}' for post_id in post_ids)}, post_ids
+
+def _tasks_moved(rows):
+    return {'task'}, set()
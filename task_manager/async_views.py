@@ -0,0 +1,170 @@
+from functools import wraps
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .models import User, Post
+from .serializers import CommentSerializer
+from .pagination import CreatedAtCursorPagination, id_pagination
+from .cache import cached_response
+from .views import likers_limit
+from .sparse import requested_fields
+from . import archive, fastpath, throttling
+
+# Async variants of the read and like/unlike endpoints.
+# They return the same JSON bodies as their DRF counterparts in views.py but
+# use the async ORM, so under an ASGI server a request waiting on the
+# database does not hold a thread. Routed instead of the sync views when
+# settings.ASYNC_VIEWS is on.
+
+def _drf_request(request):
+    """Wrap a Django request so DRF paginators and parsers can read it; the body is parsed once."""
+    if not hasattr(request, 'drf_request'):
+        request.drf_request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+    return request.drf_request
+
+def _rate_limited(scope):
+    """Async counterpart of throttling.rate_limited."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            limited, decisions = await throttling.acheck(_drf_request(request), scope)
+            if limited is not None:
+                return limited
+            return throttling.add_headers(await view(request, *args, **kwargs), decisions)
+        return wrapper
+    return decorator
+
+async def _paginated(request, paginator, reader):
+    try:
+        fields = requested_fields(request, reader.serializer_class)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    try:
+        if settings.FAST_READ_PATH:
+            page = await paginator.apaginate_queryset(reader.values(fields), _drf_request(request))
+            return JsonResponse(paginator.get_paginated_data(await reader.aserialize(page, fields)))
+        page = await paginator.apaginate_queryset(reader.plan(fields), _drf_request(request))
+    except NotFound as exc:  # Bad cursor or page number
+        return JsonResponse({"detail": exc.detail}, status=404)
+    serializer = reader.serializer_class(page, many=True, fields=fields)
+    return JsonResponse(paginator.get_paginated_data(serializer.data))
+
+# Users
+@require_GET
+@cached_response('user')
+async def get_users(request):
+    """Retrieve all users, paginated; by cursor with ?pagination=cursor."""
+    return await _paginated(request, id_pagination(request), fastpath.users)
+
+# Posts
+@require_GET
+@cached_response('post', 'like', 'user')
+async def get_posts(request):
+    """Retrieve all posts with cursor pagination, newest first."""
+    return await _paginated(request, CreatedAtCursorPagination(), fastpath.posts)
+
+async def _like_target(request, post_id):
+    """Resolve the post and acting user of a like/unlike, or an error response."""
+    try:
+        post = await Post.objects.only('id', 'title', 'like_count').aget(id=post_id)
+    except Post.DoesNotExist:
+        return None, None, JsonResponse({"error": "Post not found"}, status=404)
+
+    user_id = _drf_request(request).data.get('user_id')
+    if not user_id:
+        return None, None, JsonResponse({"error": "User ID is required"}, status=400)
+
+    try:
+        user = await User.objects.only('id', 'username').aget(id=user_id)
+    except User.DoesNotExist:
+        return None, None, JsonResponse({"error": "User not found"}, status=404)
+    return post, user, None
+
+@csrf_exempt
+@require_http_methods(['PUT'])
+@_rate_limited('like')
+async def like_post(request, post_id):
+    """Allow a user to like a post."""
+    post, user, error = await _like_target(request, post_id)
+    if error:
+        return error
+
+    if settings.LIKE_WRITE_BEHIND:
+        from . import likebuffer
+        await likebuffer.alike(post, user.id)
+        liked_by = await likebuffer.arecent_likers(post, user, likers_limit(request))
+    else:
+        await post.alike(user.id)
+        liked_by = await post.arecent_likers(likers_limit(request))
+    return JsonResponse({
+        "message": f"Post '{post.title}' liked by {user.username}.",
+        "post_id": post.id,
+        "like_count": post.like_count,
+        "liked_by": liked_by
+    }, status=200)
+
+@csrf_exempt
+@require_http_methods(['PUT'])
+@_rate_limited('unlike')
+async def unlike_post(request, post_id):
+    """Allow a user to unlike a post."""
+    post, user, error = await _like_target(request, post_id)
+    if error:
+        return error
+
+    if settings.LIKE_WRITE_BEHIND:
+        from . import likebuffer
+        unliked = await likebuffer.aunlike(post, user.id)
+        liked_by = await likebuffer.arecent_likers(post, user, likers_limit(request)) if unliked else None
+    else:
+        unliked = await post.aunlike(user.id)
+        liked_by = await post.arecent_likers(likers_limit(request)) if unliked else None
+    if unliked:
+        return JsonResponse({
+            "message": f"Post '{post.title}' unliked by {user.username}.",
+            "post_id": post.id,
+            "like_count": post.like_count,
+            "liked_by": liked_by
+        }, status=200)
+    else:
+        return JsonResponse({"error": f"{user.username} has not liked this post."}, status=400)
+
+# Tasks
+@require_GET
+@cached_response('task', 'user')
+async def get_tasks(request):
+    """Retrieve all tasks, paginated (by cursor with ?pagination=cursor); archived ones too with ?include_archived=1."""
+    reader = fastpath.tasks_including_archived if archive.requested(request) else fastpath.tasks
+    return await _paginated(request, id_pagination(request), reader)
+
+# Comments
+@require_GET
+async def get_comments(request):
+    """Retrieve all comments with cursor pagination, newest first; archived ones too with ?include_archived=1."""
+    reader = fastpath.comments_including_archived if archive.requested(request) else fastpath.comments
+    return await _paginated(request, CreatedAtCursorPagination(), reader)
+
+@require_GET
+@cached_response('comment:post:{post_id}', 'post', 'user')
+async def get_post_comments(request, post_id):
+    """Retrieve all comments for a specific post; archived ones too with ?include_archived=1."""
+    if not await Post.objects.filter(id=post_id).aexists():
+        return JsonResponse({"error": "Post not found"}, status=404)
+
+    try:
+        fields = requested_fields(request, CommentSerializer)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    reader = fastpath.comments_including_archived if archive.requested(request) else fastpath.comments
+    if settings.FAST_READ_PATH:
+        rows = reader.values(fields).filter(post_id=post_id).order_by('created_at', 'id')
+        rows = [row async for row in rows]
+        return JsonResponse(await reader.aserialize(rows, fields), safe=False)
+    comments = reader.plan(fields).filter(post_id=post_id).order_by('created_at', 'id')
+    comments = [comment async for comment in comments]
+    serializer = CommentSerializer(comments, many=True, fields=fields)
+    return JsonResponse(serializer.data, safe=False)
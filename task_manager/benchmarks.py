@@ -0,0 +1,173 @@
+import json
+import random
+import re
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from .models import User, Task, Post, Comment, actual_like_count
+
+# Shared helpers for the benchmark management commands.
+
+BATCH_SIZE = 5000
+
+def seed(users=0, posts=0, comments=0, tasks=0, likes=0, random_seed=0):
+    """Bulk insert synthetic rows, appending to whatever is already there."""
+    rng = random.Random(random_seed)
+    first_user = (User.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    _bulk(User, (
+        User(username=f'bench{i}', email=f'bench{i}@example.com', is_verified=i % 2 == 0)
+        for i in range(first_user, first_user + users)
+    ))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    if not user_ids:
+        return
+
+    _bulk(Post, (
+        Post(author_id=rng.choice(user_ids), title=f'Post {i}', content='Lorem ipsum dolor sit amet. ' * 8,
+             is_published=rng.random() < 0.7)
+        for i in range(posts)
+    ))
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    _bulk(Task, (
+        Task(user_id=rng.choice(user_ids), title=f'Task {i}', is_completed=rng.random() < 0.5)
+        for i in range(tasks)
+    ))
+    if not post_ids:
+        return
+
+    _bulk(Comment, (
+        Comment(post_id=rng.choice(post_ids), user_id=rng.choice(user_ids), content=f'Comment {i}')
+        for i in range(comments)
+    ))
+    Like = Post.liked_by.through
+    _bulk(Like, (
+        Like(post_id=rng.choice(post_ids), user_id=rng.choice(user_ids))
+        for _ in range(likes)
+    ), ignore_conflicts=True)
+    if likes:
+        Post.objects.update(like_count=actual_like_count())
+
+def _bulk(model, objs, **kwargs):
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+            batch = []
+    if batch:
+        with transaction.atomic():
+            model.objects.bulk_create(batch, **kwargs)
+
+def time_calls(fn, iterations):
+    """Call `fn` `iterations` times and return the sorted latencies in seconds."""
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return sorted(latencies)
+
+def latency_summary(latencies):
+    """p50/p95/p99/max of sorted latencies in seconds, reported in milliseconds."""
+    if not latencies:
+        return {}
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'p50': round(cuts[49] * 1000, 3),
+        'p95': round(cuts[94] * 1000, 3),
+        'p99': round(cuts[98] * 1000, 3),
+        'max': round(latencies[-1] * 1000, 3),
+    }
+
+
+# Driving the API (benchmark_api, loadtest). A sender takes (method, path,
+# JSON body or None) and returns (status, query count or None).
+
+def client_sender():
+    """Send through Django's test client, counting the queries of each request."""
+    client = Client()
+
+    def send(method, path, body):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.generic(method, path, '' if body is None else json.dumps(body),
+                                      content_type='application/json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, len(queries)
+    return send
+
+def http_sender(base_url, timeout=30.0):
+    """Send to a running server; query counts come from its Server-Timing header."""
+    base_url = base_url.rstrip('/')
+
+    def send(method, path, body):
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                status, headers = response.status, response.headers
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            status, headers = exc.code, exc.headers
+        except (urllib.error.URLError, OSError):
+            return 599, None
+        match = re.search(r'desc="(\d+) queries"', headers.get('Server-Timing', ''))
+        return status, int(match.group(1)) if match else None
+    return send
+
+def measure_requests(send, requests, concurrency=1):
+    """Send prepared (method, path, body) `requests` and report throughput, latency and queries."""
+    def timed(request):
+        started = time.perf_counter()
+        status, queries = send(*request)
+        return status, queries, time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, requests))
+    else:
+        results = [timed(request) for request in requests]
+    elapsed = time.perf_counter() - started
+
+    query_counts = sorted(queries for _, queries, _ in results if queries is not None)
+    return {
+        'requests': len(results),
+        'errors': sum(1 for status, _, _ in results if status >= 400),
+        'statuses': dict(sorted(Counter(str(status) for status, _, _ in results).items())),
+        'throughput_rps': round(len(results) / elapsed, 1),
+        'latency_ms': latency_summary(sorted(latency for _, _, latency in results)),
+        'queries': {'median': statistics.median(query_counts), 'max': query_counts[-1]} if query_counts else None,
+    }
+
+def regressions(results, baseline, tolerance=0.2, noise_ms=0.5):
+    """Describe how each scenario in `results` got worse than in `baseline`.
+
+    Latency (p50, p95) and throughput may be off by `tolerance` (a fraction)
+    and latency by `noise_ms`; query and error counts may not grow at all.
+    """
+    found = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for percentile in ('p50', 'p95'):
+            old, new = before['latency_ms'].get(percentile), result['latency_ms'].get(percentile)
+            if old is not None and new is not None and new > old * (1 + tolerance) and new - old > noise_ms:
+                found.append(f"{name}: {percentile} latency {old} -> {new} ms")
+        if result['throughput_rps'] * (1 + tolerance) < before['throughput_rps']:
+            found.append(f"{name}: throughput {before['throughput_rps']} -> {result['throughput_rps']} rps")
+        if result['queries'] and before['queries'] and result['queries']['max'] > before['queries']['max']:
+            found.append(f"{name}: queries {before['queries']['max']} -> {result['queries']['max']}")
+        if result['errors'] > before['errors']:
+            found.append(f"{name}: errors {before['errors']} -> {result['errors']}")
+    return found
@@ -0,0 +1,82 @@
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from .models import User
+
+# Username and email pre-checks (USER_BLOOM_FILTER)
+# Each process keeps a Bloom filter per unique User field. A value the filter
+# has never seen is definitely free, answered without a query. Otherwise it
+# may be taken, and the database is asked. The filters are built from the
+# table on first use and rebuilt once older than USER_BLOOM_MAX_AGE seconds.
+# In between, the post_save receiver in signals.py adds this process's new
+# users. A user created by another process since the last build can
+# therefore be reported free. The pre-check is advice for signup forms; the
+# unique constraints still decide in create_user.
+
+FIELDS = ('username', 'email')
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a `error_rate` of false positives at `capacity` items."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.lock = threading.Lock()
+
+    def _positions(self, value):
+        # Double hashing: k positions from two independent 64-bit hashes
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        with self.lock:
+            for position in self._positions(value):
+                self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+_filters = None
+_built_at = 0.0
+_build_lock = threading.Lock()
+
+def _build():
+    count = User.objects.count()
+    filters = {
+        field: BloomFilter(max(count * 2, settings.USER_BLOOM_CAPACITY), settings.USER_BLOOM_ERROR_RATE)
+        for field in FIELDS
+    }
+    for username, email in User.objects.values_list('username', 'email').iterator(chunk_size=10_000):
+        filters['username'].add(username)
+        filters['email'].add(email)
+    return filters
+
+def filters():
+    """The current {field: BloomFilter}, built or rebuilt as needed."""
+    global _filters, _built_at
+    with _build_lock:
+        if _filters is None or time.monotonic() - _built_at > settings.USER_BLOOM_MAX_AGE:
+            _filters, _built_at = _build(), time.monotonic()
+        return _filters
+
+def remember(user):
+    """Add a saved user's values to the filters, if they are built."""
+    if _filters is not None:
+        for field in FIELDS:
+            _filters[field].add(getattr(user, field))
+
+def reset():
+    global _filters
+    _filters = None
+
+def is_taken(field, value):
+    """Whether a user already has `value` in `field`; a query only when the filter cannot rule it out."""
+    if settings.USER_BLOOM_FILTER and value not in filters()[field]:
+        return False
+    return User.objects.filter(**{field: value}).exists()
@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers
+from .metrics import TimedDataMixin
+
+# Batch writes
+# A whole batch is validated with one query per related model and written
+# with a single bulk_create/bulk_update, so throughput scales with batch size
+# rather than with the number of requests.
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that resolves from objects preloaded for the batch."""
+    preloaded = None
+
+    def to_internal_value(self, data):
+        if self.preloaded is not None and not isinstance(data, bool):
+            try:
+                obj = self.preloaded.get(int(data))
+            except (TypeError, ValueError):
+                obj = None
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
+
+
+class BulkListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """List serializer writing with bulk_create/bulk_update in one transaction.
+
+    For updates, pass the candidate rows as `instance`; every item must carry
+    the `id` of the row it updates.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._preload_related(data)
+            if self.instance is not None:
+                self._instances = {obj.pk: obj for obj in self.instance}
+        return super().to_internal_value(data)
+
+    def _preload_related(self, data):
+        for name, field in self.child.fields.items():
+            if not isinstance(field, PreloadedPrimaryKeyRelatedField) or field.read_only:
+                continue
+            pks = set()
+            for item in data:
+                try:
+                    pks.add(int(item[name]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            field.preloaded = field.get_queryset().in_bulk(pks)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+        if not isinstance(data, dict) or 'id' not in data:
+            raise serializers.ValidationError({'id': ["This field is required."]})
+        try:
+            obj = self._instances[int(data['id'])]
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({'id': ["A valid integer is required."]})
+        except KeyError:
+            raise serializers.ValidationError({'id': [f"Object with id={data['id']} does not exist."]})
+        self.child.instance = obj
+        self.child.initial_data = data
+        try:
+            return {**super().run_child_validation(data), 'id': obj.pk}
+        finally:
+            self.child.instance = None
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        with transaction.atomic():
+            objs = model.objects.bulk_create([model(**attrs) for attrs in validated_data])
+        self._prefetch_many_related(objs)
+        return objs
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        auto_now = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+        versioned = any(f.name == 'version' for f in model._meta.concrete_fields)  # See conditional.py
+        objs, fields = [], set()
+        for attrs in validated_data:
+            obj = self._instances[attrs.pop('id')]
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+            for field in auto_now:
+                field.pre_save(obj, add=False)
+            if versioned and attrs:
+                obj.version += 1
+            fields.update(attrs)
+            objs.append(obj)
+        if fields:
+            fields.update(f.name for f in auto_now)
+            if versioned:
+                fields.add('version')
+            with transaction.atomic():
+                model.objects.bulk_update(objs, fields)
+        return objs
+
+    def _prefetch_many_related(self, objs):
+        lookups = [
+            field.source for field in self.child.fields.values()
+            if isinstance(field, serializers.ManyRelatedField)
+        ]
+        if lookups:
+            prefetch_related_objects(objs, *lookups)
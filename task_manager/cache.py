@@ -0,0 +1,138 @@
+import hashlib
+import time
+from functools import partial, wraps
+from inspect import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+
+# Response cache for the read endpoints.
+# Every cached view declares the data it depends on as a list of scopes
+# ("post", "user", "comment:post:{post_id}", ...). Each scope has a version
+# stored in the cache; signals bump the version when a write to a row in that
+# scope commits, which retires every cached response built from it. Versions are
+# nanosecond timestamps, so the newest one doubles as Last-Modified.
+#
+# Last-Modified only has one-second resolution: a response served in the same
+# second as the change it reflects could miss a second change made later in
+# that second, and a 304 against its date would then be stale. Such responses
+# carry only the ETag; Last-Modified is sent once that second is over. As in
+# RFC 9110, If-Modified-Since is ignored when If-None-Match is present.
+
+VERSION_PREFIX = 'response-cache:version:'
+RESPONSE_PREFIX = 'response-cache:data:'
+
+def bump(*scopes):
+    """Invalidate every cached response that depends on any of `scopes`, once the current transaction commits."""
+    # Bumping earlier would let a concurrent reader re-cache the pre-commit
+    # rows under the new versions; a rolled back write bumps nothing
+    transaction.on_commit(partial(_set_versions, scopes))
+
+def _set_versions(scopes):
+    now = time.time_ns()
+    cache.set_many({VERSION_PREFIX + scope: now for scope in scopes}, timeout=None)
+
+def _versions(scopes):
+    keys = [VERSION_PREFIX + scope for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+async def _aversions(scopes):
+    keys = [VERSION_PREFIX + scope for scope in scopes]
+    found = await cache.aget_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+def _validators(request, versions, variant=''):
+    """Cache digest, ETag and Last-Modified for a request at the given scope versions."""
+    digest = hashlib.md5(
+        f"{variant}{request.build_absolute_uri()}|{versions}".encode()
+    ).hexdigest()
+    return digest, f'"{digest}"', max(versions) // 1_000_000_000
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified < time.time_ns() // 1_000_000_000:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+def cached_response(*scopes):
+    """Cache a GET view's response until one of its scopes changes.
+
+    Scope strings are formatted with the view's URL kwargs. Clients that send
+    a matching If-None-Match or If-Modified-Since get a 304 without the view
+    running at all. Works on DRF views (caching `response.data`, rendered in
+    whichever format the request negotiated, each with its own ETag) and on
+    plain async views returning JSON (caching the rendered body).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_cached(view, scopes)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            versions = _versions([scope.format(**kwargs) for scope in scopes])
+            renderer = getattr(request, 'accepted_renderer', None)
+            digest, etag, last_modified = _validators(request, versions, variant=getattr(renderer, 'format', ''))
+
+            if _not_modified(request, etag, last_modified):
+                response = Response(status=304)
+            else:
+                data = cache.get(RESPONSE_PREFIX + digest)
+                if data is not None:
+                    response = Response(data)
+                else:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    cache.set(RESPONSE_PREFIX + digest, response.data,
+                              timeout=settings.RESPONSE_CACHE_TIMEOUT)
+            patch_vary_headers(response, ['Accept'])
+            return _set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+def _async_cached(view, scopes):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await view(request, *args, **kwargs)
+
+        versions = await _aversions([scope.format(**kwargs) for scope in scopes])
+        digest, etag, last_modified = _validators(request, versions, variant='async:')
+
+        if _not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            content = await cache.aget(RESPONSE_PREFIX + digest)
+            if content is not None:
+                response = HttpResponse(content, content_type='application/json')
+            else:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                await cache.aset(RESPONSE_PREFIX + digest, response.content,
+                                 timeout=settings.RESPONSE_CACHE_TIMEOUT)
+        return _set_validators(response, etag, last_modified)
+    return wrapper
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and if_modified_since >= last_modified
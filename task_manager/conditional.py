@@ -0,0 +1,79 @@
+from django.db import router
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save
+from rest_framework.response import Response
+
+# Conditional updates
+# Post and Task rows carry a `version` that every write bumps, sent to clients
+# as a strong ETag ("<version>"). An update with If-Match applies only if the
+# row is still at that version. The UPDATE itself checks it (WHERE version =),
+# so of two editors starting from the same version only one wins, and the
+# other gets a 412 with the current ETag. Without If-Match the last writer
+# wins, as before.
+#
+# Only the columns whose value changes are written, in that one UPDATE, and
+# an update that changes nothing writes nothing and keeps the version.
+# pre_save and post_save are sent with the written update_fields, as
+# Model.save() would; in pre_save the instance still holds the old values.
+
+def etag(instance):
+    return f'"{instance.version}"'
+
+def precondition_failed(instance):
+    response = Response({
+        "error": "The resource was modified by another request.",
+        "version": instance.version,
+    }, status=412)
+    response['ETag'] = etag(instance)
+    return response
+
+def check_precondition(request, instance):
+    """A 412 response if the request's If-Match does not match `instance`, else None."""
+    if_match = request.headers.get('If-Match')
+    if if_match is None or if_match.strip() == '*':
+        return None
+    if etag(instance) in (tag.strip() for tag in if_match.split(',')):
+        return None
+    return precondition_failed(instance)
+
+def changed_fields(instance, validated_data):
+    """The {field: value} of `validated_data` that differ from `instance`."""
+    changed = {}
+    for name, value in validated_data.items():
+        field = instance._meta.get_field(name)
+        new = value.pk if field.is_relation and value is not None else value
+        if getattr(instance, field.attname) != new:
+            changed[field] = value
+    return changed
+
+def update(request, instance, validated_data):
+    """Write the changes in `validated_data` to `instance`'s row; returns a 412 response on conflict, else None.
+
+    Raises DoesNotExist if the row is deleted meanwhile.
+    """
+    model = type(instance)
+    using = router.db_for_write(model)
+    strict = request.headers.get('If-Match', '*').strip() != '*'
+    while True:
+        changed = changed_fields(instance, validated_data)
+        if not changed:
+            return None
+        update_fields = frozenset([*(field.name for field in changed), 'version'])
+        pre_save.send(sender=model, instance=instance, raw=False, using=using, update_fields=update_fields)
+        updated = model.objects.filter(pk=instance.pk, version=instance.version).update(
+            **{field.name: value for field, value in changed.items()}, version=F('version') + 1,
+        )
+        if updated:
+            break
+        # Written by someone else since it was read
+        instance.refresh_from_db()
+        if strict:
+            return precondition_failed(instance)
+
+    for field, value in changed.items():
+        setattr(instance, field.name, value)
+    instance.version += 1
+    post_save.send(
+        sender=model, instance=instance, created=False, raw=False, using=using, update_fields=update_fields,
+    )
+    return None
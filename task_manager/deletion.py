@@ -0,0 +1,131 @@
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F
+from .models import User, Task, Post, Comment, TimelineEntry, ArchivedTask, ArchivedComment
+from .signals import propagate
+from . import search, stats
+
+# Batched cascade deletion
+# Model.delete() has Django's collector load every dependent row into memory
+# and delete them all in one transaction, sending a signal per row. These
+# functions apply the same on_delete rules (CASCADE to tasks, comments, their
+# archived copies and likes, SET_NULL on Post.author) dependents first,
+# DELETE_BATCH_SIZE rows at a time. Each batch is its own short transaction, and the side effects of
+# the skipped per-row signals are applied once per batch. The parent row goes
+# last through Model.delete(), which also catches dependents created meanwhile.
+#
+# Removing a user's likes decrements the liked posts' like_count, as
+# signals.liker_deleting does for Model.delete(). Other users' stats lose the
+# removed comments and likes; the deleted user's own stats row goes with them.
+
+Like = Post.liked_by.through
+
+
+def delete_user(user_id, batch_size=None, progress=None):
+    """Delete a user and their dependents in batches.
+
+    Returns (total, per-model counts) like Model.delete(). `progress(label, done)`
+    is called after every batch with the running count of the current step.
+    """
+    steps = [
+        (Like.objects.filter(user_id=user_id), _remove_likes),
+        (Comment.objects.filter(user_id=user_id), _remove_comments),
+        (ArchivedComment.objects.filter(user_id=user_id), _remove_archived_comments),
+        (Task.objects.filter(user_id=user_id), _remove_tasks),
+        (ArchivedTask.objects.filter(user_id=user_id), _remove_tasks),
+        (Post.objects.filter(author_id=user_id), _detach_posts),
+    ]
+    return _cascade(User, user_id, steps, batch_size, progress)
+
+
+def delete_post(post_id, batch_size=None, progress=None):
+    """Delete a post with its comments, likes and timeline entry in batches; see delete_user."""
+    steps = [
+        (Comment.objects.filter(post_id=post_id), _remove_own_comments),
+        (ArchivedComment.objects.filter(post_id=post_id), _remove_archived_comments),
+        (Like.objects.filter(post_id=post_id), _remove_post_likes),
+    ]
+    return _cascade(Post, post_id, steps, batch_size, progress)
+
+
+def _cascade(model, pk, steps, batch_size, progress):
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    counts = {}
+    for queryset, apply in steps:
+        label = queryset.model._meta.label
+        done = 0
+        while True:
+            with transaction.atomic(using=router.db_for_write(queryset.model)):
+                ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                scopes, post_ids = apply(queryset.model.objects.filter(id__in=ids))
+            propagate(scopes, post_ids)
+            done += len(ids)
+            if progress is not None:
+                progress(label, done)
+        if done and apply is not _detach_posts:  # Rows updated, not deleted
+            counts[label] = counts.get(label, 0) + done
+
+    instance = model.objects.filter(pk=pk).first()
+    if instance is not None:
+        _, deleted = instance.delete()
+        for label, count in deleted.items():
+            counts[label] = counts.get(label, 0) + count
+    counts = {label: count for label, count in counts.items() if count}
+    return sum(counts.values()), counts
+
+
+# Batch steps: each takes the rows out of its step's queryset and returns
+# the (cache scopes, timeline post ids) to propagate.
+
+def _raw_delete(rows):
+    rows._raw_delete(router.db_for_write(rows.model))
+    return set(), set()
+
+def _remove_likes(rows):
+    # One like per post in a user's batch, so each post loses exactly one
+    post_ids = list(rows.values_list('post_id', flat=True))
+    _raw_delete(rows)
+    Post.objects.filter(id__in=post_ids).update(like_count=F('like_count') - 1)
+    if settings.FEED_TIMELINE:
+        TimelineEntry.objects.filter(post_id__in=post_ids).update(like_count=F('like_count') - 1)
+    stats.liked(dict.fromkeys(post_ids, -1))
+    return {'like', 'post'}, set()
+
+def _remove_post_likes(rows):
+    _raw_delete(rows)
+    return {'like'}, set()
+
+def _remove_comments(rows):
+    comments = list(rows.only('post_id', 'user_id'))
+    post_ids = {comment.post_id for comment in comments}
+    _raw_delete(rows)
+    search.remove(Comment, [comment.id for comment in comments])
+    stats.apply(stats.contributions(Comment, comments), {})
+    return {'comment', *(f'comment:post:{post_id}' for post_id in post_ids)}, post_ids
+
+def _remove_own_comments(rows):
+    # The post is going too, so its timeline entry needs no refresh
+    scopes, _ = _remove_comments(rows)
+    return scopes, set()
+
+def _remove_archived_comments(rows):
+    # Out of search and the timeline already
+    comments = list(rows.only('post_id', 'user_id'))
+    post_ids = {comment.post_id for comment in comments}
+    _raw_delete(rows)
+    stats.apply(stats.contributions(ArchivedComment, comments), {})
+    return {'comment', *(f'comment:post:{post_id}' for post_id in post_ids)}, set()
+
+def _remove_tasks(rows):
+    # Only the deleted user's own, so no one else's stats change
+    _raw_delete(rows)
+    return {'task'}, set()
+
+def _detach_posts(rows):
+    ids = list(rows.values_list('id', flat=True))
+    rows.update(author=None)
+    if settings.FEED_TIMELINE:
+        TimelineEntry.objects.filter(post_id__in=ids).update(author_name=None)
+    return {'post'}, set()
@@ -0,0 +1,188 @@
+from functools import partial
+from rest_framework import serializers
+from .models import Post, TaskIncludingArchived, CommentIncludingArchived, truncate_content
+from .serializers import UserSerializer, TaskSerializer, PostSerializer, CommentSerializer
+from .metrics import record_serializer
+from .sparse import default_fields
+from . import queries
+
+# Fast read path
+# The hot list endpoints read .values() rows and turn them into the same JSON
+# their serializer produces, with a row mapper compiled once per field
+# selection. That skips model instantiation and DRF's per-field dispatch.
+# Views take this path while settings.FAST_READ_PATH is on; FastReadPathTests
+# checks that it stays identical to the serializers.
+
+_datetime = serializers.DateTimeField().to_representation
+
+
+class Column:
+    """A serializer field read from one .values() column.
+
+    `convert` runs on non-null values, as DRF does with field.to_representation;
+    the field is left out entirely when `omit_if_null` is null, as DRF does
+    when a dotted source crosses a null relation.
+    """
+
+    def __init__(self, name, convert=None, omit_if_null=None):
+        self.name = name
+        self.convert = convert
+        self.omit_if_null = omit_if_null
+
+
+class Related:
+    """A many-valued field, loaded for a whole page with one extra query.
+
+    `pairs(ids)` returns a queryset of (owner id, value) tuples in output order.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+
+class Reader:
+    def __init__(self, serializer_class, plan, fields, always=(), model=None):
+        self.serializer_class = serializer_class
+        self.model = model or serializer_class.Meta.model
+        self.plan = plan  # The equivalent model queryset, for the serializer path
+        self.fields = fields  # Serializer field -> Column, Related, or None if write-only
+        self.always = always
+        self._mappers = {}
+
+    def values(self, fields=None):
+        """Queryset of the row dicts `serialize()` needs for `fields`."""
+        columns = dict.fromkeys(['id', *self.always])
+        for _, spec in self._selected(fields):
+            if isinstance(spec, Column):
+                columns.update(dict.fromkeys(filter(None, [spec.name, spec.omit_if_null])))
+        return self.model.objects.values(*columns)
+
+    def over(self, model, plan):
+        """The same reader on another model with the serializer's columns, e.g. an archive view."""
+        return Reader(self.serializer_class, plan, self.fields, self.always, model=model)
+
+    def output_fields(self, fields=None):
+        """Names of the fields `serialize()` outputs for `fields`, in order."""
+        return [name for name, _ in self._selected(fields)]
+
+    def serialize(self, rows, fields=None):
+        """Rows from values(fields) -> the serializer's representation."""
+        rows = list(rows)
+        related = {
+            name: self._group(spec.pairs([row['id'] for row in rows]) if rows else [])
+            for name, spec in self._related(fields)
+        }
+        return self._map(rows, related, fields)
+
+    async def aserialize(self, rows, fields=None):
+        """Async variant of `serialize`."""
+        rows = list(rows)
+        related = {}
+        for name, spec in self._related(fields):
+            pairs = [pair async for pair in spec.pairs([row['id'] for row in rows])] if rows else []
+            related[name] = self._group(pairs)
+        return self._map(rows, related, fields)
+
+    def _map(self, rows, related, fields):
+        with record_serializer():
+            map_row = self.mapper(fields)
+            return [map_row(row, related) for row in rows]
+
+    def _selected(self, fields):
+        if fields is None:
+            fields = default_fields(self.serializer_class)
+        # Output follows the serializer's field order, not the requested order
+        return [(name, self.fields[name]) for name in self.serializer_class.Meta.fields
+                if name in fields and self.fields[name] is not None]
+
+    def _related(self, fields):
+        return [(name, spec) for name, spec in self._selected(fields) if isinstance(spec, Related)]
+
+    @staticmethod
+    def _group(pairs):
+        grouped = {}
+        for owner_id, value in pairs:
+            grouped.setdefault(owner_id, []).append(value)
+        return grouped
+
+    def mapper(self, fields=None):
+        """Compiled function building one output dict from a row and the page's related values."""
+        key = None if fields is None else frozenset(fields)
+        if key not in self._mappers:
+            self._mappers[key] = self._compile(fields)
+        return self._mappers[key]
+
+    def _compile(self, fields):
+        namespace = {}
+        items, omissions = [], []
+        for i, (name, spec) in enumerate(self._selected(fields)):
+            if isinstance(spec, Related):
+                expr = f"related[{name!r}].get(row['id'], [])"
+            elif spec.convert is not None:
+                namespace[f'convert{i}'] = spec.convert
+                expr = f"(convert{i}(row[{spec.name!r}]) if row[{spec.name!r}] is not None else None)"
+            else:
+                expr = f"row[{spec.name!r}]"
+            items.append(f"{name!r}: {expr}")
+            if isinstance(spec, Column) and spec.omit_if_null:
+                omissions.append(f"    if row[{spec.omit_if_null!r}] is None: del item[{name!r}]")
+        source = '\n'.join([
+            'def map_row(row, related):',
+            f"    item = {{{', '.join(items)}}}",
+            *omissions,
+            '    return item',
+        ])
+        exec(source, namespace)
+        return namespace['map_row']
+
+
+def _likers(post_ids):
+    # Same order as the liked_by prefetch in queries.posts()
+    return (Post.liked_by.through.objects.filter(post_id__in=post_ids)
+            .order_by('post_id', 'user_id').values_list('post_id', 'user__username'))
+
+
+users = Reader(UserSerializer, queries.users, {
+    'id': Column('id'),
+    'username': Column('username'),
+    'email': Column('email'),
+    'is_verified_email': Column('is_verified'),
+    'created_at': Column('created_at', _datetime),
+})
+
+tasks = Reader(TaskSerializer, queries.tasks, {
+    'id': Column('id'),
+    'title': Column('title'),
+    'description': Column('description'),
+    'is_completed': Column('is_completed'),
+    'user': Column('user__username'),
+    'user_id': None,
+    'version': Column('version'),
+})
+
+posts = Reader(PostSerializer, queries.posts, {
+    'id': Column('id'),
+    'title': Column('title'),
+    'content': Column('content'),
+    'is_published': Column('is_published'),
+    'author': Column('author'),
+    'author_name': Column('author__username', omit_if_null='author'),
+    'like_count': Column('like_count'),
+    'liked_by': Related(_likers),
+    'summary': Column('content', truncate_content),
+    'version': Column('version'),
+}, always=['created_at'])
+
+comments = Reader(CommentSerializer, queries.comments, {
+    'id': Column('id'),
+    'post': Column('post'),
+    'post_title': Column('post__title'),
+    'user': Column('user'),
+    'user_name': Column('user__username'),
+    'content': Column('content'),
+    'created_at': Column('created_at', _datetime),
+}, always=['created_at'])
+
+tasks_including_archived = tasks.over(TaskIncludingArchived, partial(queries.tasks, include_archived=True))
+
+comments_including_archived = comments.over(CommentIncludingArchived, partial(queries.comments, include_archived=True))
@@ -0,0 +1,225 @@
+import logging
+import threading
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils.timezone import now
+from .models import User, Job
+from . import deletion
+
+# Background jobs
+# Slow side effects are queued as Job rows and run outside the request. Any
+# number of `manage.py run_jobs` workers can poll the table: a job is claimed
+# with a conditional UPDATE, so each attempt runs once even with several
+# workers and no broker. Failed attempts are retried with exponential backoff
+# up to the job's max_attempts, and attempts that outlive JOB_TIMEOUT
+# (a crashed worker) are put back in the queue. Handlers must therefore be
+# safe to run more than once.
+#
+# With JOB_RUNNER = 'thread', the default, the web process starts each job on
+# a local thread pool as soon as the enqueuing transaction commits, and
+# starts each retry on a timer once its backoff has passed. With 'worker'
+# jobs only run under run_jobs.
+
+logger = logging.getLogger('task_manager.jobs')
+
+HANDLERS = {}  # Job name -> (function, max attempts)
+
+_current_job = ContextVar('current_job', default=None)
+
+def job(name, max_attempts=None):
+    """Register the decorated function as the handler for jobs called `name`."""
+    def register(fn):
+        HANDLERS[name] = (fn, max_attempts)
+        return fn
+    return register
+
+def enqueue(name, payload=None, idempotency_key=None):
+    """Queue job `name` with keyword arguments `payload`; returns the Job.
+
+    If a job was already queued under `idempotency_key`, that job is returned
+    instead, and queued again if it had failed. With JOB_RUNNER = 'thread' it
+    is also started again if it was waiting or its attempt had gone stale, as
+    a restarted web process no longer holds its timer or thread.
+    """
+    _, max_attempts = HANDLERS[name]
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'max_attempts': max_attempts or settings.JOB_MAX_ATTEMPTS,
+    }
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(idempotency_key=idempotency_key, **fields)
+    except IntegrityError:  # Key already used
+        job = Job.objects.get(idempotency_key=idempotency_key)
+        if job.status == Job.RUNNING:
+            requeue_stale()
+        elif job.status == Job.FAILED:
+            Job.objects.filter(id=job.id, status=Job.FAILED).update(
+                status=Job.QUEUED, attempts=0, run_after=now(), error='', updated_at=now(),
+            )
+        job.refresh_from_db()
+        if job.status != Job.QUEUED:
+            return job
+
+    _schedule(job)
+    return job
+
+def claim(job_id=None):
+    """Take the next due job (or job `job_id` if it is due) for this worker, or None."""
+    due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now())
+    if job_id is not None:
+        due = due.filter(id=job_id)
+    for candidate in due.order_by('run_after', 'id').values_list('id', flat=True)[:10]:
+        started = now()
+        claimed = Job.objects.filter(id=candidate, status=Job.QUEUED).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, locked_at=started, updated_at=started,
+        )
+        if claimed:  # Otherwise another worker got there first
+            return Job.objects.get(id=candidate)
+    return None
+
+def run(job):
+    """Run a claimed job and record its result, scheduling a retry if it failed."""
+    handler = HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job {job.name!r}.")
+        token = _current_job.set(job.id)
+        try:
+            result = handler[0](**job.payload)
+        finally:
+            _current_job.reset(token)
+    except Exception as exc:
+        # The traceback goes to the log only; Job.error is shown to API clients
+        logger.exception("Job %s failed (attempt %s of %s)", job, job.attempts, job.max_attempts)
+        _finish(job, error=repr(exc))
+    else:
+        _finish(job, result=result)
+
+def _finish(job, result=None, error=None):
+    updates = {'locked_at': None, 'updated_at': now()}
+    if error is None:
+        updates.update(status=Job.SUCCEEDED, result=result, error='')
+    elif job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        updates.update(status=Job.QUEUED, error=error, run_after=now() + timedelta(seconds=delay))
+    else:
+        updates.update(status=Job.FAILED, error=error)
+    Job.objects.filter(id=job.id).update(**updates)
+    if updates['status'] == Job.QUEUED:
+        _schedule(job, delay)
+
+def report_progress(**progress):
+    """From inside a handler: publish `progress` as the running job's result.
+
+    Also serves as a heartbeat, so a long job that keeps reporting is not
+    taken for a crashed one after JOB_TIMEOUT.
+    """
+    job_id = _current_job.get()
+    if job_id is not None:
+        Job.objects.filter(id=job_id).update(result={'progress': progress}, locked_at=now(), updated_at=now())
+
+def execute(job_id):
+    """Run an already claimed job by id; the entry point for worker threads and processes."""
+    close_old_connections()
+    try:
+        run(Job.objects.get(id=job_id))
+    finally:
+        close_old_connections()
+
+def requeue_stale():
+    """Put back jobs whose attempt has been running longer than JOB_TIMEOUT; returns how many."""
+    cutoff = now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    error = "Worker did not finish the attempt within JOB_TIMEOUT."
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None, error=error, updated_at=now(),
+    )
+    return failed + stale.update(status=Job.QUEUED, locked_at=None, error=error, updated_at=now())
+
+def run_pending():
+    """Run every due job in the current thread; returns the number run."""
+    count = 0
+    while (job := claim()) is not None:
+        run(job)
+        count += 1
+    return count
+
+
+# In-process runner (JOB_RUNNER = 'thread')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _schedule(job, delay=None):
+    # Start the job on the local pool once the current transaction commits,
+    # after `delay` seconds (by default, when its run_after is due)
+    if settings.JOB_RUNNER != 'thread':
+        return
+    if delay is None:
+        delay = max((job.run_after - now()).total_seconds(), 0)
+    job_id = job.id
+
+    def submit():
+        if delay > 0:
+            timer = threading.Timer(delay, _local_pool().submit, (_run_now, job_id))
+            timer.daemon = True
+            timer.start()
+        else:
+            _local_pool().submit(_run_now, job_id)
+    transaction.on_commit(submit)
+
+def _local_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.JOB_THREADS, thread_name_prefix='jobs')
+        return _pool
+
+def _run_now(job_id):
+    close_old_connections()
+    try:
+        job = claim(job_id)
+        if job is not None:
+            run(job)
+    finally:
+        close_old_connections()
+
+
+# Handlers
+
+@job('delete_user')
+def delete_user(user_id):
+    """Delete a user with their tasks, comments and likes; their posts lose their author."""
+    username = User.objects.filter(id=user_id).values_list('username', flat=True).first()
+    if username is None:
+        return {"deleted": {}}
+    _, deleted = deletion.delete_user(user_id, progress=lambda step, done: report_progress(**{step: done}))
+    return {"username": username, "deleted": deleted}
+
+@job('reconcile_like_counts')
+def reconcile_like_counts():
+    """Repair drifted Post.like_count counters."""
+    return _command_output('reconcile_like_counts')
+
+@job('rebuild_timeline')
+def rebuild_timeline():
+    """Regenerate the materialized feed timeline."""
+    return _command_output('rebuild_timeline')
+
+@job('rebuild_search_index')
+def rebuild_search_index():
+    """Regenerate the full-text search documents."""
+    return _command_output('rebuild_search_index')
+
+def _command_output(name):
+    out = StringIO()
+    call_command(name, stdout=out)
+    return {"output": out.getvalue()}
@@ -0,0 +1,208 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, router, transaction
+from django.db.models import F
+from .models import User, Post, TimelineEntry
+from .signals import propagate
+from . import stats
+
+# Write-behind likes (LIKE_WRITE_BEHIND)
+# A like or unlike only records the user's intent in LIKE_BUFFER_CACHE: the
+# latest state of each (post, user) pair, plus a numbered log entry naming the
+# pair. flush() reads the log, dedupes it to one final state per pair, and
+# applies all of them in one transaction: one bulk_create(ignore_conflicts=True)
+# of the new likes, a delete per post of the removed ones and a like_count
+# update per post. Toggling a like on and off between flushes costs nothing.
+#
+# Read-your-writes: the like/unlike responses of the acting user overlay
+# their own pending state on the database (whether the like is there, the
+# like_count and the liked_by preview), so repeating or undoing an action
+# behaves as if it had been written. Everyone else, and every list endpoint,
+# sees a like once it is flushed.
+#
+# Durability window: an intent lives only in the cache until the next flush,
+# every LIKE_FLUSH_INTERVAL seconds. Losing the cache (a restart with the
+# local-memory cache, an eviction) in that window loses the intents, and an
+# intent left unflushed for LIKE_BUFFER_TTL seconds expires. Point
+# LIKE_BUFFER_CACHE at a shared cache when running several processes, or each
+# one only reads its own writes.
+
+logger = logging.getLogger('task_manager.likebuffer')
+
+Like = Post.liked_by.through
+
+SEQUENCE = 'likes:sequence'  # Number of the last log entry
+FLUSHED = 'likes:flushed'  # Last log entry applied by flush()
+GAP = 'likes:gap'  # Log entry found missing by the previous flush
+LOCK = 'likes:lock'
+
+
+def _cache():
+    return caches[settings.LIKE_BUFFER_CACHE]
+
+def _state_key(post_id, user_id):
+    return f'likes:state:{post_id}:{user_id}'
+
+def _entry_key(number):
+    return f'likes:entry:{number}'
+
+
+# Recording intents
+
+def _pending(post_id, user_id):
+    """The unflushed liked state of a pair, or None."""
+    values = _cache().get_many([_state_key(post_id, user_id), FLUSHED])
+    state = values.get(_state_key(post_id, user_id))
+    if state is None or state[1] <= values.get(FLUSHED, 0):
+        return None
+    return state[0]
+
+def _record(post, user_id, liked):
+    in_db = Like.objects.filter(post_id=post.pk, user_id=user_id).exists()
+    pending = _pending(post.pk, user_id)
+    current = in_db if pending is None else pending
+    changed = current != liked
+    if changed:
+        cache = _cache()
+        try:
+            number = cache.incr(SEQUENCE)
+        except ValueError:
+            cache.add(SEQUENCE, 0, None)
+            number = cache.incr(SEQUENCE)
+        # State first: a flush that finds the entry also finds the state
+        cache.set(_state_key(post.pk, user_id), (liked, number), settings.LIKE_BUFFER_TTL)
+        cache.set(_entry_key(number), (post.pk, user_id), settings.LIKE_BUFFER_TTL)
+        _start_flusher()
+    post.like_count += liked - in_db  # The state is `liked` either way
+    return changed
+
+def like(post, user_id):
+    """Buffered Post.like: returns False if the user already likes the post."""
+    return _record(post, user_id, True)
+
+def unlike(post, user_id):
+    """Buffered Post.unlike: returns False if the user does not like the post."""
+    return _record(post, user_id, False)
+
+def recent_likers(post, user, limit):
+    """Post.recent_likers with `user`'s own pending like or unlike applied."""
+    likers = post.recent_likers(limit)
+    pending = _pending(post.pk, user.pk)
+    if pending and user.username not in likers:
+        likers = [user.username] + likers[:max(limit - 1, 0)]
+    elif pending is False:
+        likers = [username for username in likers if username != user.username]
+    return likers
+
+alike = sync_to_async(like)
+aunlike = sync_to_async(unlike)
+arecent_likers = sync_to_async(recent_likers)
+
+
+# Flushing
+
+def flush():
+    """Write the buffered intents to the database; returns the number of likes added and removed."""
+    cache = _cache()
+    if not cache.add(LOCK, True, 60):  # Another process is flushing
+        return 0
+    try:
+        written = 0
+        while (batch := _next_batch(cache)) is not None:
+            numbers, pairs = batch
+            states = cache.get_many([_state_key(*pair) for pair in pairs])
+            intents = {pair: states[_state_key(*pair)][0] for pair in pairs if _state_key(*pair) in states}
+            written += _apply(intents)
+            cache.set(FLUSHED, numbers[-1], None)
+            cache.delete_many([_entry_key(number) for number in numbers])
+        return written
+    finally:
+        cache.delete(LOCK)
+
+def _next_batch(cache):
+    """(entry numbers, distinct pairs) of the next unflushed log entries, or None."""
+    flushed = cache.get(FLUSHED, 0)
+    last = min(cache.get(SEQUENCE, 0), flushed + settings.LIKE_FLUSH_BATCH_SIZE)
+    if last <= flushed:
+        return None
+    numbers = range(flushed + 1, last + 1)
+    entries = cache.get_many([_entry_key(number) for number in numbers])
+    gap = cache.get(GAP)
+    pairs = set()
+    for number in numbers:
+        entry = entries.get(_entry_key(number))
+        if entry is not None:
+            pairs.add(entry)
+        elif number != gap:
+            # Numbered but not written yet: wait for it until the next flush.
+            # Missing twice in a row, its request has died and it is skipped.
+            cache.set(GAP, number, None)
+            numbers = range(flushed + 1, number)
+            break
+    return (numbers, pairs) if numbers else None
+
+def _apply(intents):
+    if not intents:
+        return 0
+    post_ids = {post_id for post_id, _ in intents}
+    user_ids = {user_id for _, user_id in intents}
+    with transaction.atomic(using=router.db_for_write(Like)):
+        existing = set(Like.objects.filter(post_id__in=post_ids, user_id__in=user_ids).values_list('post_id', 'user_id'))
+        # Likes of posts or users deleted since are dropped
+        live_posts = set(Post.objects.filter(id__in=post_ids).values_list('id', flat=True))
+        live_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        added = [(post_id, user_id) for (post_id, user_id), liked in intents.items()
+                 if liked and (post_id, user_id) not in existing and post_id in live_posts and user_id in live_users]
+        removed = defaultdict(list)
+        for (post_id, user_id), liked in intents.items():
+            if not liked and (post_id, user_id) in existing:
+                removed[post_id].append(user_id)
+
+        Like.objects.bulk_create([Like(post_id=post_id, user_id=user_id) for post_id, user_id in added],
+                                 ignore_conflicts=True)
+        for post_id, users in removed.items():
+            Like.objects.filter(post_id=post_id, user_id__in=users)._raw_delete(router.db_for_write(Like))
+
+        deltas = Counter(post_id for post_id, _ in added)
+        deltas.subtract({post_id: len(users) for post_id, users in removed.items()})
+        for post_id, delta in deltas.items():
+            if delta:
+                Post.objects.filter(id=post_id).update(like_count=F('like_count') + delta)
+                if settings.FEED_TIMELINE:
+                    TimelineEntry.objects.filter(post_id=post_id).update(like_count=F('like_count') + delta)
+        stats.liked({post_id: delta for post_id, delta in deltas.items() if delta})
+    written = len(added) + sum(len(users) for users in removed.values())
+    if written:
+        propagate({'like'}, set())
+    return written
+
+
+# In-process flusher
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+def _start_flusher():
+    global _flusher
+    if not settings.LIKE_FLUSH_INTERVAL:  # Flushed by `manage.py flush_likes` instead
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, name='likes', daemon=True)
+            _flusher.start()
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.LIKE_FLUSH_INTERVAL)
+        close_old_connections()
+        try:
+            flush()
+        except Exception:
+            logger.exception("Flushing buffered likes failed")
+        finally:
+            close_old_connections()
@@ -0,0 +1,32 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from task_manager import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move comments older than ARCHIVE_COMMENTS_AFTER_DAYS and completed tasks to the archive "
+        "tables in short batched transactions, reporting progress. Safe to interrupt and rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['comments', 'tasks'], help="Archive one kind. Default: both.")
+        parser.add_argument('--older-than-days', type=int,
+                            help="Comment age to archive at. Default: ARCHIVE_COMMENTS_AFTER_DAYS.")
+        parser.add_argument('--batch-size', type=int, help="Rows per transaction. Default: ARCHIVE_BATCH_SIZE.")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches per kind.")
+
+    def handle(self, *args, **options):
+        batching = {'batch_size': options['batch_size'], 'max_batches': options['max_batches']}
+        for kind in [options['only']] if options['only'] else ['comments', 'tasks']:
+            def progress(done):
+                self.stdout.write(f"{kind}: {done}")
+
+            if kind == 'comments':
+                days = options['older_than_days']
+                older_than = now() - timedelta(days=days) if days is not None else None
+                moved = archive.archive_comments(older_than, progress=progress, **batching)
+            else:
+                moved = archive.archive_tasks(progress=progress, **batching)
+            self.stdout.write(self.style.SUCCESS(f"Archived {moved} {kind}."))
@@ -0,0 +1,72 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from task_manager.benchmarks import client_sender, http_sender, measure_requests, regressions
+from task_manager.scenarios import SCENARIOS, Context
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the API scenarios (one per route, see task_manager/scenarios.py) and report throughput, "
+        "p50/p95/p99 latency and queries per request as JSON. --target client (the default) runs "
+        "them in-process through Django's test client; a URL runs them against a server using the "
+        "same database, e.g. gunicorn connectly_project.wsgi -w 4. With --baseline, results are "
+        "compared to an earlier --output and the command fails on regressions. Fill a scratch "
+        "database first, e.g. DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py generate_data && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_api --output baseline.json"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', default='client', help="'client', or the base URL of a running server.")
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+                            help="Scenario to run; repeat for several. Default: all.")
+        parser.add_argument('--iterations', type=int, default=50, help="Requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=1, help="Requests in flight at once (server only).")
+        parser.add_argument('--warm', action='store_true', help="Let reads hit the response cache.")
+        parser.add_argument('--throttle', action='store_true', help="Keep the write throttles on (client only).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the rows requests pick.")
+        parser.add_argument('--output', help="Write the report to this file.")
+        parser.add_argument('--baseline', help="Report to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Fraction by which latency and throughput may be worse than the baseline.")
+
+    def handle(self, *args, **options):
+        if options['target'] == 'client':
+            overrides = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+            if not options['throttle']:
+                overrides['REST_FRAMEWORK'] = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+            with override_settings(**overrides):
+                results = self.run(client_sender(), 1, options)
+        else:
+            results = self.run(http_sender(options['target']), options['concurrency'], options)
+
+        report = {
+            'target': options['target'],
+            'iterations': options['iterations'],
+            'concurrency': options['concurrency'] if options['target'] != 'client' else 1,
+            'scenarios': results,
+        }
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                report['regressions'] = regressions(results, json.load(baseline)['scenarios'], options['tolerance'])
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+        if report.get('regressions'):
+            raise CommandError(f"{len(report['regressions'])} regression(s) against {options['baseline']}.")
+
+    def run(self, send, concurrency, options):
+        try:
+            ctx = Context(warm=options['warm'], random_seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        results = {}
+        for name in options['scenarios'] or sorted(SCENARIOS):
+            method, build = SCENARIOS[name]
+            requests = [(method, *build(ctx)) for _ in range(options['iterations'])]
+            results[name] = measure_requests(send, requests, concurrency)
+        return results
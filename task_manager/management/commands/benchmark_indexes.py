@@ -0,0 +1,66 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import connection
+from task_manager.benchmarks import latency_summary, seed, time_calls
+from task_manager.models import User, Task, Post, Comment
+
+
+def hot_queries():
+    """The lookups the Meta.indexes are declared for, each as (name, queryset factory)."""
+    post = Post.objects.order_by('-like_count').values_list('id', flat=True).first()
+    user = User.objects.order_by('id').values_list('id', flat=True).first()
+    Like = Post.liked_by.through
+    return [
+        ('published_posts_by_recency', lambda: Post.objects.filter(is_published=True).order_by('-created_at', '-id')[:20]),
+        ('comments_per_post_by_time', lambda: Comment.objects.filter(post_id=post).order_by('created_at', 'id')[:50]),
+        ('open_tasks_per_user', lambda: Task.objects.filter(user_id=user, is_completed=False).order_by('id')[:50]),
+        ('like_membership_probe', lambda: Like.objects.filter(post_id=post, user_id=user)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic rows and report EXPLAIN plans and p50/p99 latency of the hot lookups "
+        "with and without the task_manager Meta.indexes. Run it against a scratch database, e.g. "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Total rows to seed across all tables.")
+        parser.add_argument('--iterations', type=int, default=200, help="Timed runs per query.")
+        parser.add_argument('--no-seed', action='store_true', help="Benchmark the rows already present.")
+
+    def handle(self, *args, **options):
+        if not options['no_seed']:
+            rows = options['rows']
+            seed(users=rows // 100, posts=rows // 5, comments=rows * 2 // 5,
+                 tasks=rows // 5, likes=rows - rows // 100 - rows * 4 // 5)
+
+        indexes = [(model, index) for model in (Post, Task, Comment) for index in model._meta.indexes]
+        queries = hot_queries()
+
+        report = {'after': self.measure(queries, options['iterations'])}
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        try:
+            report['before'] = self.measure(queries, options['iterations'])
+        finally:
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def measure(self, queries, iterations):
+        results = {}
+        for name, queryset in queries:
+            latencies = time_calls(lambda: list(queryset()), iterations)
+            summary = latency_summary(latencies)
+            results[name] = {
+                'plan': queryset().explain(),
+                'p50_ms': summary['p50'],
+                'p99_ms': summary['p99'],
+            }
+        return results
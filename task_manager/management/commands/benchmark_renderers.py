@@ -0,0 +1,43 @@
+import json
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from task_manager import fastpath, renderers
+from task_manager.benchmarks import latency_summary, seed, time_calls
+from task_manager.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare encode time and payload size of DRF's JSONRenderer, the orjson renderer and the "
+        "MessagePack renderer (when msgpack is installed) on one large posts list response. "
+        "Run it against a scratch database, e.g. "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_renderers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000, help="Posts in the response.")
+        parser.add_argument('--iterations', type=int, default=20, help="Timed encodes per renderer.")
+
+    def handle(self, *args, **options):
+        missing = options['posts'] - Post.objects.count()
+        if missing > 0:
+            seed(users=max(missing // 10, 1), posts=missing, likes=missing * 3)
+        data = fastpath.posts.serialize(fastpath.posts.values().order_by('id')[:options['posts']])
+
+        candidates = {'drf_json': JSONRenderer()}
+        if renderers.orjson is not None:
+            candidates['orjson'] = renderers.ORJSONRenderer()
+        if renderers.msgpack is not None:
+            candidates['msgpack'] = renderers.MessagePackRenderer()
+
+        report = {'posts': len(data)}
+        for name, renderer in candidates.items():
+            content = renderer.render(data)
+            report[name] = {
+                'bytes': len(content),
+                'encode_ms': latency_summary(time_calls(lambda: renderer.render(data), options['iterations'])),
+            }
+        if 'orjson' in report:
+            report['orjson']['identical_to_drf_json'] = candidates['orjson'].render(data) == candidates['drf_json'].render(data)
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,81 @@
+import json
+import random
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from task_manager import search
+from task_manager.benchmarks import _bulk, latency_summary, seed, time_calls
+from task_manager.models import User, Post, Comment
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'sta', 'vo', 'qui', 'dor', 'fel', 'ny', 'tra', 'zu', 'bel', 'sen', 'ox']
+
+
+class Command(BaseCommand):
+    help = (
+        "Grow a synthetic corpus step by step and report search latency through the full-text "
+        "index next to a substring scan at each size. Run it against a scratch database, e.g. "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_search"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,500000',
+                            help="Comma-separated corpus sizes (posts + comments) to measure at.")
+        parser.add_argument('--iterations', type=int, default=50, help="Timed runs per query and size.")
+        parser.add_argument('--vocabulary', type=int, default=20000, help="Distinct words in the corpus.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = sorted({
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(options['vocabulary'])
+        }, key=lambda word: rng.random())
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]  # Zipf-like word frequencies
+
+        def text(words):
+            return ' '.join(rng.choices(vocabulary, weights, k=words))
+
+        # Rare, mid-frequency and common terms, plus a two-word query
+        queries = [vocabulary[2000], vocabulary[200], vocabulary[20], f'{vocabulary[50]} {vocabulary[300]}']
+
+        if not User.objects.exists():
+            seed(users=100)
+        user_ids = list(User.objects.values_list('id', flat=True))
+        report = {}
+        for size in sorted(int(value) for value in options['sizes'].split(',')):
+            missing = size - Post.objects.count() - Comment.objects.count()
+            if missing > 0:
+                self.grow(missing, user_ids, text, rng)
+            report[size] = {
+                query: {
+                    'matches': len(search.search(query, limit=1000)),
+                    'index_ms': latency_summary(time_calls(lambda: search.search(query), options['iterations'])),
+                    'scan_ms': latency_summary(time_calls(lambda: self.scan(query), max(1, options['iterations'] // 10))),
+                }
+                for query in queries
+            }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def grow(self, rows, user_ids, text, rng):
+        """Add `rows` documents, a fifth of them posts, and index them."""
+        posts = rows // 5
+        first_post = (Post.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        _bulk(Post, (
+            Post(author_id=rng.choice(user_ids), title=text(6), content=text(60)) for _ in range(posts)
+        ))
+        post_ids = list(Post.objects.values_list('id', flat=True))
+        first_comment = (Comment.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        _bulk(Comment, (
+            Comment(post_id=rng.choice(post_ids), user_id=rng.choice(user_ids), content=text(20))
+            for _ in range(rows - posts)
+        ))
+        for model, first in ((Post, first_post), (Comment, first_comment)):
+            new = model.objects.filter(id__gte=first).order_by('id')
+            for start in range(0, new.count(), 5000):
+                search.index(model, new[start:start + 5000])
+
+    def scan(self, query):
+        """What clients did before: substring matching over every post and comment."""
+        posts, comments = Post.objects.all(), Comment.objects.all()
+        for word in search.terms(query):
+            posts = posts.filter(Q(title__icontains=word) | Q(content__icontains=word))
+            comments = comments.filter(content__icontains=word)
+        return list(posts.values_list('id', flat=True)[:20]) + list(comments.values_list('id', flat=True)[:20])
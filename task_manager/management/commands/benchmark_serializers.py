@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand
+from task_manager import fastpath
+from task_manager.benchmarks import seed, time_calls
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/second of the model serializers and the fast .values() read path "
+        "for the users, tasks, posts and comments list representations, including the queries. "
+        "Run it against a scratch database, e.g. "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_serializers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help="Rows to seed per table.")
+        parser.add_argument('--page-size', type=int, default=1000, help="Rows serialized per call.")
+        parser.add_argument('--iterations', type=int, default=20, help="Timed calls per path.")
+        parser.add_argument('--no-seed', action='store_true', help="Benchmark the rows already present.")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        if not options['no_seed']:
+            seed(users=rows, posts=rows, comments=rows, tasks=rows, likes=rows * 3)
+
+        size = options['page_size']
+        report = {}
+        for name in ('users', 'tasks', 'posts', 'comments'):
+            reader = getattr(fastpath, name)
+
+            def serializer_path():
+                page = reader.plan(None).order_by('id')[:size]
+                return reader.serializer_class(page, many=True).data
+
+            def fast_path():
+                return reader.serialize(reader.values().order_by('id')[:size])
+
+            count = len(fast_path())
+            serializer_time = sum(time_calls(serializer_path, options['iterations']))
+            fast_time = sum(time_calls(fast_path, options['iterations']))
+            total = count * options['iterations']
+            report[name] = {
+                'serializer_rows_per_sec': round(total / serializer_time),
+                'fastpath_rows_per_sec': round(total / fast_time),
+                'speedup': round(serializer_time / fast_time, 2),
+            }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,133 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from task_manager.benchmarks import latency_summary
+
+# Runs in a fresh interpreter per sample, as a new worker would: load the
+# WSGI or ASGI application, serve one GET, and report when each was done, the
+# response status, the RSS after it (and at peak) and how many modules ended
+# up imported.
+WORKER = r'''
+import json, sys, time
+server, path = sys.argv[1:]
+
+if server == 'wsgi':
+    import io
+    from connectly_project.wsgi import application
+    loaded = time.time()
+    environ = {
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http', 'wsgi.multithread': False, 'wsgi.multiprocess': True,
+        'wsgi.run_once': False, 'wsgi.version': (1, 0),
+    }
+    statuses = []
+    chunks = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    b''.join(chunks)
+    status = int(statuses[0].split()[0])
+else:
+    import asyncio
+    from connectly_project.asgi import application
+    loaded = time.time()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    messages = []
+
+    async def serve():
+        requested = asyncio.Event()
+
+        async def receive():
+            if requested.is_set():
+                await asyncio.Future()  # The client never disconnects
+            requested.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await application(scope, receive, send)
+
+    asyncio.run(serve())
+    status = messages[0]['status']
+
+responded = time.time()
+
+# ru_maxrss would include the parent's RSS, as Linux keeps it across exec
+with open('/proc/self/status') as status_file:
+    memory = dict(line.split(':', 1) for line in status_file if line.startswith(('VmRSS', 'VmHWM')))
+
+print(json.dumps({
+    'loaded': loaded,
+    'responded': responded,
+    'status': status,
+    'rss_kb': int(memory['VmRSS'].split()[0]),
+    'max_rss_kb': int(memory['VmHWM'].split()[0]),
+    'modules': len(sys.modules),
+}))
+'''
+
+PROFILES = {
+    'full': 'connectly_project.settings',
+    'api_only': 'connectly_project.settings_api',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare worker startup under the full settings and the API-only settings "
+        "(connectly_project/settings_api.py): time from spawning a fresh interpreter to the "
+        "WSGI/ASGI application being loaded and to its first response, RSS and modules "
+        "imported. Run it against a scratch database, e.g. "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_startup"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=10, help="Workers started per profile and server.")
+        parser.add_argument('--path', default='/task_manager/users/', help="Path of the first request.")
+        parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=list(PROFILES))
+        parser.add_argument('--servers', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+
+    def handle(self, *args, **options):
+        configs = [(profile, server) for profile in options['profiles'] for server in options['servers']]
+        samples = {config: [] for config in configs}
+        for config in configs:
+            self.start_worker(*config, options['path'])  # Warm the bytecode and page caches
+        for _ in range(options['runs']):
+            for config in configs:  # Interleaved, so drift affects every config alike
+                samples[config].append(self.start_worker(*config, options['path']))
+
+        report = {'path': options['path'], 'runs': options['runs']}
+        for (profile, server), runs in samples.items():
+            report.setdefault(profile, {})[server] = {
+                'status': runs[0]['status'],
+                'loaded_ms': latency_summary(sorted(run['loaded'] for run in runs)),
+                'first_response_ms': latency_summary(sorted(run['responded'] for run in runs)),
+                'rss_mb': round(statistics.median(run['rss_kb'] for run in runs) / 1024, 1),
+                'max_rss_mb': round(statistics.median(run['max_rss_kb'] for run in runs) / 1024, 1),
+                'modules': runs[0]['modules'],
+            }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def start_worker(self, profile, server, path):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': PROFILES[profile]}
+        started = time.time()
+        result = subprocess.run(
+            [sys.executable, '-c', WORKER, server, path],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"{profile}/{server} worker failed:\n{result.stderr}")
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['loaded'] -= started
+        sample['responded'] -= started
+        return sample
@@ -0,0 +1,51 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from task_manager import throttling, views
+from task_manager.benchmarks import latency_summary, seed, time_calls
+from task_manager.models import User, Post
+
+UNLIMITED = '1000000/s'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what the token-bucket throttles add per request: the bucket check on its own "
+        "(allowed and refused) against the configured THROTTLE_CACHE, and a throttled endpoint "
+        "with its buckets on and off. Run it against a scratch database, e.g. "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_throttling"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help="Timed calls per measurement.")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        report = {
+            'check_allowed_ms': latency_summary(time_calls(
+                lambda: throttling.consume('throttle:benchmark:allowed', UNLIMITED), iterations
+            )),
+            'check_refused_ms': latency_summary(time_calls(
+                lambda: throttling.consume('throttle:benchmark:refused', '1/d'), iterations
+            )),
+        }
+
+        # unlike_post by a user who never liked the post: two reads and a 400, no writes
+        if not Post.objects.exists():
+            seed(users=1, posts=1)
+        post = Post.objects.order_by('id').first()
+        user, _ = User.objects.get_or_create(username='throttle-benchmark', defaults={'email': 'throttle@example.com'})
+        request = APIRequestFactory().put(f'/task_manager/posts/{post.id}/unlike/', {'user_id': user.id}, format='json')
+
+        def unlike():
+            return views.unlike_post(request, post_id=post.id)
+
+        for label, rates in (('endpoint_unthrottled_ms', {}),
+                             ('endpoint_throttled_ms', {'unlike_user': UNLIMITED, 'unlike_ip': UNLIMITED})):
+            with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+                assert unlike().status_code == 400
+                report[label] = latency_summary(time_calls(unlike, iterations // 5))
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from task_manager import deletion
+from task_manager.models import User, Post
+
+
+class Command(BaseCommand):
+    help = "Delete a user or post with its dependents in short batched transactions, reporting progress."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=['user', 'post'])
+        parser.add_argument('id', type=int)
+        parser.add_argument('--batch-size', type=int, help="Rows per transaction. Default: DELETE_BATCH_SIZE.")
+
+    def handle(self, *args, **options):
+        model, delete = {'user': (User, deletion.delete_user), 'post': (Post, deletion.delete_post)}[options['model']]
+        if not model.objects.filter(id=options['id']).exists():
+            raise CommandError(f"{model.__name__} {options['id']} does not exist.")
+
+        def progress(label, done):
+            self.stdout.write(f"{label}: {done}")
+
+        total, counts = delete(options['id'], batch_size=options['batch_size'], progress=progress)
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f"Deleted {count} {label}")
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} row(s)."))
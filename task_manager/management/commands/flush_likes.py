@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from task_manager import likebuffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the likes and unlikes buffered under LIKE_WRITE_BEHIND to the database. Run it "
+        "once before stopping the web processes, or with --interval as the only flusher when "
+        "LIKE_FLUSH_INTERVAL is 0. It must share LIKE_BUFFER_CACHE with the web processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Keep flushing every this many seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            written = likebuffer.flush()
+            self.stdout.write(f"Wrote {written} like change(s).")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from task_manager import search, stats, timeline
+from task_manager.benchmarks import seed
+from task_manager.models import User, Task, Post, Comment
+
+DEFAULTS = {'users': 1000, 'posts': 10_000, 'comments': 30_000, 'tasks': 10_000, 'likes': 50_000}
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, posts, comments, tasks and likes for benchmark_api "
+        "and the other benchmarks, then rebuild the search index and user stats (and the feed timeline when "
+        "FEED_TIMELINE is on). Rows are appended, and the same --seed gives the same data on an "
+        "empty database. Run it against a scratch database, e.g. "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py migrate && "
+        "DB_NAME=/tmp/bench.sqlite3 python manage.py generate_data --scale 10"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiply every default row count by this.")
+        for table, count in DEFAULTS.items():
+            parser.add_argument(f'--{table}', type=int, help=f"Rows of {table} to add (default {count} x scale).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed.")
+
+    def handle(self, *args, **options):
+        counts = {
+            table: options[table] if options[table] is not None else int(count * options['scale'])
+            for table, count in DEFAULTS.items()
+        }
+        seed(random_seed=options['seed'], **counts)
+        search.rebuild()
+        stats.store(stats.compute())
+        if settings.FEED_TIMELINE:
+            timeline.rebuild()
+        self.stdout.write(json.dumps({
+            'users': User.objects.count(),
+            'posts': Post.objects.count(),
+            'comments': Comment.objects.count(),
+            'tasks': Task.objects.count(),
+            'likes': Post.liked_by.through.objects.count(),
+        }, indent=2))
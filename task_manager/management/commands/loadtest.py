@@ -0,0 +1,33 @@
+import json
+from django.core.management.base import BaseCommand
+from task_manager.benchmarks import http_sender, measure_requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with concurrent GET requests and report throughput and tail latency.\n\n"
+        "To compare the WSGI and ASGI paths at equal worker counts, start each in turn and run the\n"
+        "same load against it, e.g.\n"
+        "  gunicorn connectly_project.wsgi -w 4\n"
+        "  ASYNC_VIEWS=1 uvicorn connectly_project.asgi:application --workers 4\n"
+        "  python manage.py loadtest http://127.0.0.1:8000 --path /task_manager/posts/ --concurrency 64"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help="Server to load, e.g. http://127.0.0.1:8000")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path to request; repeat to round-robin over several. Default: /task_manager/posts/")
+        parser.add_argument('--requests', type=int, default=1000, help="Total requests to send.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once.")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds.")
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/task_manager/posts/']
+        send = http_sender(options['base_url'], options['timeout'])
+        requests = [('GET', paths[i % len(paths)], None) for i in range(options['requests'])]
+        report = measure_requests(send, requests, options['concurrency'])
+        self.stdout.write(json.dumps({
+            'urls': [options['base_url'].rstrip('/') + path for path in paths],
+            'concurrency': options['concurrency'],
+            **report,
+        }, indent=2))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from task_manager import search
+
+
+class Command(BaseCommand):
+    help = "Regenerate the full-text search documents from posts and comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows written per bulk insert.")
+
+    def handle(self, *args, **options):
+        written = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} documents."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from task_manager import timeline
+
+
+class Command(BaseCommand):
+    help = "Regenerate the materialized feed timeline from posts, comments and likes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Posts written per bulk insert.")
+
+    def handle(self, *args, **options):
+        written = timeline.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} timeline entries."))
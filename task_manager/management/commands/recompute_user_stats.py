@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from task_manager import stats
+from task_manager.models import UserStats
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's UserStats row from the source tables, reporting rows that had drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        computed = stats.compute()
+        stored = {row.pop('user'): row for row in UserStats.objects.values('user', *stats.FIELDS)}
+
+        drifted = 0
+        for user_id, counts in computed.items():
+            if user_id in stored and stored[user_id] != counts:
+                drifted += 1
+                differences = ', '.join(f"{field}={stored[user_id][field]} (actual {counts[field]})"
+                                        for field in stats.FIELDS if stored[user_id][field] != counts[field])
+                self.stdout.write(f"User {user_id}: {differences}")
+        missing = len(computed.keys() - stored.keys())
+        summary = f"{len(computed)} user(s): {drifted} drifted, {missing} without a stats row."
+
+        if options['dry_run']:
+            self.stdout.write(summary)
+            return
+        stats.store(computed)
+        self.stdout.write(self.style.SUCCESS(f"{summary} Rewrote them all."))
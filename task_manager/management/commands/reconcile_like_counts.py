@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from task_manager.models import Post, UserStats, actual_like_count
+from task_manager.signals import propagate
+
+
+def actual_likes_received():
+    """Expression counting the liked_by rows of a UserStats row's user's posts."""
+    return Coalesce(
+        Subquery(
+            Post.liked_by.through.objects.filter(post__author=OuterRef('user_id'))
+            .values('post__author')
+            .annotate(c=Count('*'))
+            .values('c')
+        ),
+        Value(0),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.like_count and UserStats.likes_received from the liked_by table "
+        "and repair drifted counters, cached responses included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        actual = actual_like_count()
+        drifted = Post.objects.annotate(actual=actual).exclude(like_count=F('actual'))
+
+        for post in drifted.only('id', 'like_count').iterator():
+            self.stdout.write(f"Post {post.id}: like_count={post.like_count}, actual={post.actual}")
+
+        received = actual_likes_received()
+        drifted_stats = UserStats.objects.annotate(actual=received).exclude(likes_received=F('actual'))
+        for row in drifted_stats.only('user_id', 'likes_received').iterator():
+            self.stdout.write(f"User {row.user_id}: likes_received={row.likes_received}, actual={row.actual}")
+
+        if options['dry_run']:
+            self.stdout.write(f"{drifted.count()} post(s) and {drifted_stats.count()} user stats row(s) drifted.")
+            return
+
+        post_ids = list(drifted.values_list('pk', flat=True))
+        repaired = Post.objects.filter(pk__in=post_ids).update(like_count=actual)
+        if repaired:
+            # update() sends no signals: retire the cached responses and timeline rows showing the old counts
+            propagate({'post', 'like'}, post_ids)
+        users = UserStats.objects.filter(pk__in=drifted_stats.values('pk')).update(likes_received=received)
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} post(s) and {users} user stats row(s)."))
@@ -0,0 +1,64 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from django.core.management.base import BaseCommand
+from django.db import connections
+from task_manager import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs. Claims due jobs from the Job table and runs them on a "
+        "thread or process pool; several workers can run side by side. Note that with the "
+        "default local-memory cache, cache invalidation from a worker only reaches its own "
+        "process, so use a shared CACHE_BACKEND when running workers separately from the web server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Jobs run at once.")
+        parser.add_argument('--executor', choices=['thread', 'process', 'inline'], default='thread',
+                            help="Where jobs run: a thread pool, a forked process pool, or this thread.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once no due jobs are left.")
+
+    def handle(self, *args, **options):
+        if options['executor'] == 'inline':
+            while True:
+                jobs.requeue_stale()
+                ran = jobs.run_pending()
+                self.report(ran)
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+
+        if options['executor'] == 'process':
+            # Children are forked with the parent's settings and app registry;
+            # they must not inherit its open database connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(options['workers'], mp_context=multiprocessing.get_context('fork'))
+        else:
+            pool = ThreadPoolExecutor(options['workers'], thread_name_prefix='jobs')
+
+        with pool:
+            running = set()
+            ran = 0
+            while True:
+                jobs.requeue_stale()
+                while len(running) < options['workers'] and (job := jobs.claim()) is not None:
+                    running.add(pool.submit(jobs.execute, job.id))
+                if not running:
+                    self.report(ran)
+                    if options['once']:
+                        return
+                    ran = 0
+                    time.sleep(options['poll_interval'])
+                    continue
+                done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        self.stderr.write(f"Worker error: {future.exception()!r}")
+                ran += len(done)
+
+    def report(self, ran):
+        if ran:
+            self.stdout.write(f"Ran {ran} job(s).")
@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework import serializers
+
+# Request instrumentation
+# RequestMetricsMiddleware opens a RequestTimings for each request; the query
+# wrapper below and the timed serializers add to it, and the totals end up in
+# the Server-Timing header and the per-process registry served at /metrics.
+
+slow_query_logger = logging.getLogger('task_manager.slow_queries')
+
+_current = ContextVar('request_timings', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.db_time = 0.0
+        self.query_count = 0
+        self.serializer_time = 0.0
+
+
+@contextmanager
+def track_request():
+    """Collect timings for the code run inside the block, including sync_to_async threads."""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def record_serializer():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings.serializer_time += time.perf_counter() - started
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper: count and time queries, logging slow ones."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = _current.get()
+        if timings is not None:
+            timings.db_time += elapsed
+            timings.query_count += 1
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            slow_query_logger.warning("Slow query (%.1f ms) on %s: %s",
+                                      elapsed * 1000, context['connection'].alias, sql)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Installed for the connection's lifetime rather than with the
+    # connection.execute_wrapper() context manager, so queries issued from
+    # sync_to_async worker threads are timed too.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+# Serializer timing hooks
+
+class TimedDataMixin:
+    @property
+    def data(self):
+        with record_serializer():
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+
+# Registry
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+
+
+class Registry:
+    """Per-process request metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}     # (view, method, status) -> count
+        self.latency = {}      # (view, method) -> Histogram
+        self.db_latency = {}   # (view, method) -> Histogram
+        self.queries = {}      # (view, method) -> count
+        self.serializer = {}   # (view, method) -> seconds
+        self.response_bytes = {}  # (view, method) -> bytes
+
+    def observe(self, view, method, status, wall_time, timings, size):
+        key = (view, method)
+        with self._lock:
+            self.requests[(view, method, status)] = self.requests.get((view, method, status), 0) + 1
+            self.latency.setdefault(key, Histogram()).observe(wall_time)
+            self.db_latency.setdefault(key, Histogram()).observe(timings.db_time)
+            self.queries[key] = self.queries.get(key, 0) + timings.query_count
+            self.serializer[key] = self.serializer.get(key, 0.0) + timings.serializer_time
+            self.response_bytes[key] = self.response_bytes.get(key, 0) + (size or 0)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += _counter('connectly_requests_total', "Requests served.",
+                              {('view', 'method', 'status'): self.requests})
+            lines += _histogram('connectly_request_duration_seconds', "Wall time per request.", self.latency)
+            lines += _histogram('connectly_request_db_duration_seconds', "Database time per request.", self.db_latency)
+            lines += _counter('connectly_db_queries_total', "Database queries executed.",
+                              {('view', 'method'): self.queries})
+            lines += _counter('connectly_serializer_seconds_total', "Time spent serializing responses.",
+                              {('view', 'method'): self.serializer})
+            lines += _counter('connectly_response_bytes_total', "Response body bytes sent.",
+                              {('view', 'method'): self.response_bytes})
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def _counter(name, help_text, series):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    for names, values in series.items():
+        for key, value in sorted(values.items()):
+            lines.append(f'{name}{_labels(names, key)} {value}')
+    return lines
+
+
+def _histogram(name, help_text, histograms):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(("view", "method"), key, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(("view", "method"), key)} {histogram.total}')
+        lines.append(f'{name}_count{_labels(("view", "method"), key)} {cumulative}')
+    return lines
+
+
+REGISTRY = Registry()
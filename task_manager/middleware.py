@@ -0,0 +1,68 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .metrics import REGISTRY, track_request
+from .routers import replica_reads
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """Serve the reads of GET/HEAD/OPTIONS requests from the read replica."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method not in SAFE_METHODS:
+            return self.get_response(request)
+        with replica_reads():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.method not in SAFE_METHODS:
+            return await self.get_response(request)
+        with replica_reads():
+            return await self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """Time each request and report it in Server-Timing and the /metrics registry."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with track_request() as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, time.perf_counter() - started, timings)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with track_request() as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, time.perf_counter() - started, timings)
+
+    def finish(self, request, response, wall_time, timings):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        REGISTRY.observe(view, request.method, response.status_code, wall_time, timings, size)
+        response['Server-Timing'] = (
+            f'total;dur={wall_time * 1000:.1f}, '
+            f'db;dur={timings.db_time * 1000:.1f};desc="{timings.query_count} queries", '
+            f'serializer;dur={timings.serializer_time * 1000:.1f}'
+        )
+        return response
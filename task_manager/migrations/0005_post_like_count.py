@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:04
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_counts(apps, schema_editor):
+    Post = apps.get_model('task_manager', 'Post')
+    Like = Post.liked_by.through
+    counts = (
+        Like.objects.filter(post_id=OuterRef('pk'))
+        .values('post_id')
+        .annotate(c=Count('*'))
+        .values('c')
+    )
+    Post.objects.update(like_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0004_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0006_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('summary', models.TextField()),
+                ('author_name', models.CharField(max_length=50, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('comments', models.JSONField(default=list)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entry', to='task_manager.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='timeline_created_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+# SQLite: an external-content FTS5 table over task_manager_searchdocument,
+# kept in step with it by triggers. Other backends get no index, as search is
+# SQLite-only (see search.py).
+
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE task_manager_search USING fts5(
+        title, body, content='task_manager_searchdocument', content_rowid='id',
+        tokenize='porter unicode61', prefix='2 3'
+    )""",
+    """CREATE TRIGGER task_manager_search_insert AFTER INSERT ON task_manager_searchdocument BEGIN
+        INSERT INTO task_manager_search(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER task_manager_search_delete AFTER DELETE ON task_manager_searchdocument BEGIN
+        INSERT INTO task_manager_search(task_manager_search, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER task_manager_search_update AFTER UPDATE ON task_manager_searchdocument BEGIN
+        INSERT INTO task_manager_search(task_manager_search, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO task_manager_search(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS task_manager_search_update',
+    'DROP TRIGGER IF EXISTS task_manager_search_delete',
+    'DROP TRIGGER IF EXISTS task_manager_search_insert',
+    'DROP TABLE IF EXISTS task_manager_search',
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_INDEX:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+
+
+def backfill_documents(apps, schema_editor):
+    Post = apps.get_model('task_manager', 'Post')
+    Comment = apps.get_model('task_manager', 'Comment')
+    SearchDocument = apps.get_model('task_manager', 'SearchDocument')
+    SearchDocument.objects.bulk_create(
+        (SearchDocument(kind='post', object_id=id, post_id=id, title=title, body=content)
+         for id, title, content in Post.objects.values_list('id', 'title', 'content').iterator()),
+        batch_size=1000,
+    )
+    SearchDocument.objects.bulk_create(
+        (SearchDocument(kind='comment', object_id=id, post_id=post_id, body=content)
+         for id, post_id, content in Comment.objects.values_list('id', 'post_id', 'content').iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0008_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('post_id', models.BigIntegerField()),
+                ('title', models.CharField(blank=True, max_length=100)),
+                ('body', models.TextField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_unique')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+TASK_COLUMNS = 'id, title, description, is_completed, user_id, version'
+COMMENT_COLUMNS = 'id, post_id, user_id, content, created_at, updated_at'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0010_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentIncludingArchived',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'task_manager_comment_all',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskIncludingArchived',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('version', models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'task_manager_task_all',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_completed', models.BooleanField(default=True)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='task_manager.user')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to='task_manager.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to='task_manager.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archived_comment_created_idx'), models.Index(fields=['post', 'created_at', 'id'], name='archived_comment_post_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            f'CREATE VIEW task_manager_task_all AS '
+            f'SELECT {TASK_COLUMNS} FROM task_manager_task '
+            f'UNION ALL SELECT {TASK_COLUMNS} FROM task_manager_archivedtask',
+            'DROP VIEW task_manager_task_all',
+        ),
+        migrations.RunSQL(
+            f'CREATE VIEW task_manager_comment_all AS '
+            f'SELECT {COMMENT_COLUMNS} FROM task_manager_comment '
+            f'UNION ALL SELECT {COMMENT_COLUMNS} FROM task_manager_archivedcomment',
+            'DROP VIEW task_manager_comment_all',
+        ),
+    ]
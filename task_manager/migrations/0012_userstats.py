@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0011_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='task_manager.user')),
+                ('posts', models.IntegerField(default=0)),
+                ('likes_received', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('open_tasks', models.IntegerField(default=0)),
+                ('completed_tasks', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
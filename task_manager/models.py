@@ -1,6 +1,12 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 
+def truncate_content(content):
+    return content[:50] + "..." if len(content) > 50 else content
+
 # User Model
 class User(models.Model):
     username = models.CharField(max_length=50, unique=True)
@@ -18,32 +24,269 @@ class Post(models.Model):
     content = models.TextField()
     is_published = models.BooleanField(default=False)
     liked_by = models.ManyToManyField(User, related_name='liked_posts', blank=True)
+    like_count = models.PositiveIntegerField(default=0)  # Denormalized len(liked_by)
     created_at = models.DateTimeField(default=now)  
+    version = models.PositiveIntegerField(default=1)  # Bumped by every update; the ETag of conditional.py
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            # Published posts by recency
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_published=True), name='post_published_idx'),
+        ]
 
     def short_content(self):
         """Returns a truncated version of the content."""
-        return self.content[:50] + "..." if len(self.content) > 50 else self.content
+        return truncate_content(self.content)
+
+    def like(self, user_id):
+        """Record a like; returns False if the user had already liked the post."""
+        if Post.liked_by.through.objects.filter(post_id=self.pk, user_id=user_id).exists():
+            return False
+        return self._add_like(user_id)
+
+    async def alike(self, user_id):
+        """Async variant of `like`."""
+        if await Post.liked_by.through.objects.filter(post_id=self.pk, user_id=user_id).aexists():
+            return False
+        return await sync_to_async(self._add_like)(user_id)
+
+    def _add_like(self, user_id):
+        Like = Post.liked_by.through
+        try:
+            with transaction.atomic():
+                Like.objects.create(post_id=self.pk, user_id=user_id)
+                Post.objects.filter(pk=self.pk).update(like_count=F('like_count') + 1)
+                self._author_stats().update(likes_received=F('likes_received') + 1)
+        except IntegrityError:  # A concurrent request liked it first
+            return False
+        self.like_count += 1
+        return True
+
+    def unlike(self, user_id):
+        """Remove a like; returns False if the user had not liked the post."""
+        Like = Post.liked_by.through
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(post_id=self.pk, user_id=user_id).delete()
+            if not deleted:
+                return False
+            Post.objects.filter(pk=self.pk).update(like_count=F('like_count') - 1)
+            self._author_stats().update(likes_received=F('likes_received') - 1)
+        self.like_count -= 1
+        return True
+
+    def _author_stats(self):
+        return UserStats.objects.filter(user_id=Subquery(Post.objects.filter(pk=self.pk).values('author_id')))
+
+    async def aunlike(self, user_id):
+        """Async variant of `unlike`; the transaction itself runs in a worker thread."""
+        return await sync_to_async(self.unlike)(user_id)
+
+    def recent_likers(self, limit):
+        """Usernames of the most recent `limit` likers, newest first."""
+        return list(self._recent_likers(limit))
+
+    async def arecent_likers(self, limit):
+        """Async variant of `recent_likers`."""
+        return [username async for username in self._recent_likers(limit)]
+
+    def _recent_likers(self, limit):
+        return (
+            Post.liked_by.through.objects.filter(post_id=self.pk)
+            .order_by('-id')
+            .values_list('user__username', flat=True)[:limit]
+        )
 
     def __str__(self):
         return self.title
 
+def actual_like_count():
+    """Expression counting a post's rows in the liked_by table."""
+    return Coalesce(
+        Subquery(
+            Post.liked_by.through.objects.filter(post_id=OuterRef('pk'))
+            .values('post_id')
+            .annotate(c=Count('*'))
+            .values('c')
+        ),
+        Value(0),
+    )
+
 # Task Model
 class Task(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     is_completed = models.BooleanField(default=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks')
+    version = models.PositiveIntegerField(default=1)  # Bumped by every update; the ETag of conditional.py
+
+    class Meta:
+        indexes = [
+            # Open tasks per user
+            models.Index(fields=['user', 'id'], condition=Q(is_completed=False), name='task_open_user_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 # Comment Model
 class Comment(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')  
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments', db_index=False)  # Covered by comment_post_created_idx
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')  
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)  
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_created_id_idx'),
+            # Comments per post by time
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.user.username} on {self.post.title}"
+
+# Archive Models
+class ArchivedTask(models.Model):
+    """A completed task moved out of the live table by archive.py, under its original id."""
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    is_completed = models.BooleanField(default=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks')
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=now)
+
+    def __str__(self):
+        return self.title
+
+class ArchivedComment(models.Model):
+    """An old comment moved out of the live table by archive.py, under its original id."""
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='archived_comments', db_index=False)  # Covered by archived_comment_post_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_comments')
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='archived_comment_created_idx'),
+            models.Index(fields=['post', 'created_at', 'id'], name='archived_comment_post_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived comment {self.pk}"
+
+# User Stats Model
+class UserStats(models.Model):
+    """A user's counts for the stats endpoint, kept current incrementally (see stats.py)."""
+    # Signed, so drift from writes that bypass stats.py shows up in
+    # recompute_user_stats instead of failing the next delete
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    posts = models.IntegerField(default=0)
+    likes_received = models.IntegerField(default=0)  # Sum of the like_count of their posts
+    comments = models.IntegerField(default=0)
+    open_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats of user {self.pk}"
+
+# Live and archived rows together, read through UNION ALL views (migration 0011).
+# Only the ?include_archived=1 list endpoints query these.
+class TaskIncludingArchived(models.Model):
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    is_completed = models.BooleanField(default=False)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+')
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        managed = False
+        db_table = 'task_manager_task_all'
+
+class CommentIncludingArchived(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.DO_NOTHING, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+')
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'task_manager_comment_all'
+
+# Timeline Model
+class TimelineEntry(models.Model):
+    """Precomputed feed row for a published post, kept current on write when FEED_TIMELINE is on."""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='timeline_entry')
+    title = models.CharField(max_length=100)
+    summary = models.TextField()
+    author_name = models.CharField(max_length=50, null=True)
+    created_at = models.DateTimeField()
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    comments = models.JSONField(default=list)  # The post's first comments, as serialized for the feed
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='timeline_created_id_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+# Job Model
+class Job(models.Model):
+    """A unit of background work, claimed and run by the run_jobs worker (see jobs.py)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=now)  # Pushed back between retries
+    locked_at = models.DateTimeField(null=True, blank=True)  # When the current attempt started
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Due jobs, in the order workers claim them
+            models.Index(fields=['run_after', 'id'], condition=Q(status='queued'), name='job_queued_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+# Search Model
+class SearchDocument(models.Model):
+    """Searchable text of a post or comment, indexed by FTS5 on SQLite (see search.py)."""
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = [(POST, 'Post'), (COMMENT, 'Comment')]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    post_id = models.BigIntegerField()  # The post itself, or the one commented on
+    title = models.CharField(max_length=100, blank=True)
+    body = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
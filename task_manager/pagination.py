@@ -0,0 +1,158 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Cursor (keyset) pagination.
+# A cursor holds the ordering values of the row it continues from, and a
+# page is the next page_size rows past that tuple, e.g. on (created_at, id)
+#   WHERE created_at <= c AND (created_at < c OR id < i) ORDER BY created_at DESC, id DESC
+# which an index on the ordering serves as one range scan. Deep pages cost
+# the same as the first one: no OFFSET and no COUNT(*). The ordering ends
+# with the primary key, so positions are unique and ties need no offset.
+
+class BaseCursorPagination(BasePagination):
+    ordering = ('id',)
+    page_size = getattr(settings, 'CURSOR_PAGE_SIZE', 10)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'CURSOR_MAX_PAGE_SIZE', 100)
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._page(list(self._window(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async variant of `paginate_queryset`; `request` must be a DRF Request."""
+        return self._page([row async for row in self._window(queryset, request)])
+
+    def get_paginated_data(self, data):
+        """The body `get_paginated_response` returns, as a plain dict."""
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def _window(self, queryset, request):
+        # Up to page_size + 1 rows past the cursor, in the direction it points
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.position, self.reverse = self._decode(request, queryset.model)
+        ordering = [_flip(order) for order in self.ordering] if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._past(self.position))
+        return queryset[:self.page_size + 1]
+
+    def _past(self, position):
+        # Rows after `position` in the walk order, as nested comparisons
+        condition = None
+        for order, value in reversed(list(zip(self.ordering, position))):
+            name = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') != self.reverse else 'gt'
+            beyond = Q(**{f'{name}__{lookup}': value})
+            condition = beyond if condition is None else Q(**{f'{name}__{lookup}e': value}) & (beyond | condition)
+        return condition
+
+    def _page(self, rows):
+        self.page = rows[:self.page_size]
+        more = len(rows) > self.page_size
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, more
+        else:
+            self.has_next, self.has_previous = more, self.position is not None
+        return self.page
+
+    def _link(self, row, reverse):
+        position = []
+        for order in self.ordering:
+            name = order.lstrip('-')
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            position.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        token = urlsafe_b64encode(json.dumps({'p': position, 'r': int(reverse)}).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def _decode(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(token.encode('ascii')))
+            names = [order.lstrip('-') for order in self.ordering]
+            position = []
+            for name, value in zip(names, cursor['p'], strict=True):
+                # Every key is a non-null string (dates) or integer, never null
+                if isinstance(value, bool) or not isinstance(value, (str, int)):
+                    raise ValueError(f"Bad cursor value for {name}")
+                position.append(model._meta.get_field(name).to_python(value))
+            if cursor['r'] not in (0, 1) or None in position:
+                raise ValueError("Bad cursor")
+            return position, bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, AttributeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def _flip(order):
+    return order[1:] if order.startswith('-') else f'-{order}'
+
+
+# Posts and comments are paged newest first on (created_at, id)
+class CreatedAtCursorPagination(BaseCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+# Users and tasks are paged on their primary key
+class IdCursorPagination(BaseCursorPagination):
+    ordering = ('id',)
+
+
+# Numbered pages with a total count: the default of the user and task lists
+class NumberedPagination(PageNumberPagination):
+    page_size = 10
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset.order_by(*self.ordering), request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async variant of `paginate_queryset`, run in a worker thread; `request` must be a DRF Request."""
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+    def get_paginated_data(self, data):
+        """The body `get_paginated_response` returns, as a plain dict."""
+        return self.get_paginated_response(data).data
+
+
+def id_pagination(request):
+    """Paginator of the user and task lists: numbered pages, or IdCursorPagination with ?pagination=cursor."""
+    if request.GET.get('pagination') == 'cursor':
+        return IdCursorPagination()
+    return NumberedPagination()
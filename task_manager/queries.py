@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import User, Task, Post, Comment, TimelineEntry, TaskIncludingArchived, CommentIncludingArchived
+
+# Query plans
+# Every view starts from one of these querysets, so the joins, prefetches and
+# columns its serializer reads are declared in one place and each endpoint
+# runs a fixed number of queries regardless of how many rows it returns.
+
+# Columns each serializer field reads, so a sparse field selection can be
+# pushed down into .only()/select_related(). Keys mirror the serializers' fields.
+
+USER_COLUMNS = {
+    'id': [], 'username': ['username'], 'email': ['email'],
+    'is_verified_email': ['is_verified'], 'created_at': ['created_at'],
+}
+
+TASK_COLUMNS = {
+    'id': [], 'title': ['title'], 'description': ['description'],
+    'is_completed': ['is_completed'], 'user': ['user__username'], 'user_id': [],
+    'version': ['version'],
+}
+
+POST_COLUMNS = {
+    'id': [], 'title': ['title'], 'content': ['content'], 'summary': ['content'],
+    'is_published': ['is_published'], 'author': ['author'], 'author_name': ['author__username'],
+    'like_count': ['like_count'], 'liked_by': [], 'version': ['version'],
+}
+
+COMMENT_COLUMNS = {
+    'id': [], 'post': ['post'], 'post_title': ['post__title'], 'user': ['user'],
+    'user_name': ['user__username'], 'content': ['content'], 'created_at': ['created_at'],
+}
+
+def _load_only(queryset, columns, fields, always=()):
+    """Load only the columns `fields` read, joining the relations they traverse."""
+    needed = set(always)
+    for field in (columns if fields is None else fields):
+        needed.update(columns[field])
+    related = sorted({column.split('__')[0] for column in needed if '__' in column})
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only('id', *needed)
+
+def users(fields=None):
+    """Users as read by UserSerializer."""
+    return _load_only(User.objects.all(), USER_COLUMNS, fields)
+
+def tasks(fields=None, include_archived=False):
+    """Tasks with the owner's username joined in for TaskSerializer; archived ones too if asked."""
+    model = TaskIncludingArchived if include_archived else Task
+    return _load_only(model.objects.all(), TASK_COLUMNS, fields)
+
+def posts(fields=None):
+    """Posts with the author joined and likers prefetched for PostSerializer."""
+    queryset = _load_only(Post.objects.all(), POST_COLUMNS, fields, always=['created_at'])
+    if fields is None or 'liked_by' in fields:
+        queryset = queryset.prefetch_related(
+            Prefetch('liked_by', queryset=User.objects.only('id', 'username').order_by('id')),
+        )
+    return queryset
+
+def comments(fields=None, include_archived=False):
+    """Comments with post title and username joined in for CommentSerializer; archived ones too if asked."""
+    model = CommentIncludingArchived if include_archived else Comment
+    return _load_only(model.objects.all(), COMMENT_COLUMNS, fields, always=['created_at'])
+
+def feed_posts(viewer_id=None):
+    """Published posts with comment counts and their first comments, for FeedPostSerializer.
+
+    Two queries per page: the posts (counts come from correlated subqueries on
+    indexed columns) and one windowed prefetch of the first comments per post.
+    """
+    comment_count = Coalesce(
+        Subquery(
+            Comment.objects.filter(post_id=OuterRef('pk'))
+            .values('post_id')
+            .annotate(c=Count('*'))
+            .values('c')
+        ),
+        Value(0),
+    )
+    preview = (
+        Comment.objects.select_related('user')
+        .only('id', 'post', 'content', 'created_at', 'user__username')
+        .order_by('created_at', 'id')
+    )
+    return Post.objects.filter(is_published=True).select_related('author').only(
+        'id', 'title', 'content', 'like_count', 'created_at', 'author__username',
+    ).annotate(
+        comment_count=comment_count,
+        liked=_liked_by(viewer_id, OuterRef('pk')),
+    ).prefetch_related(
+        Prefetch('comments', queryset=preview[:settings.FEED_COMMENTS_PREVIEW], to_attr='preview_comments'),
+    )
+
+def timeline(viewer_id=None):
+    """Materialized feed rows for TimelineEntrySerializer; a single range scan per page."""
+    return TimelineEntry.objects.annotate(liked=_liked_by(viewer_id, OuterRef('post_id')))
+
+def _liked_by(viewer_id, post_ref):
+    if viewer_id is None:
+        return Value(False)
+    return Exists(Post.liked_by.through.objects.filter(post_id=post_ref, user_id=viewer_id))
@@ -0,0 +1,75 @@
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Optional: the JSON classes fall back to DRF's stdlib json ones
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: settings only enable the MessagePack classes when it is installed
+    msgpack = None
+
+# Response and request encodings
+# ORJSONRenderer writes the same bytes as DRF's JSONRenderer: compact, UTF-8,
+# U+2028/U+2029 escaped, and anything orjson has no native encoding for
+# (datetimes, decimals, lazy strings) handed to DRF's encoder. It is just
+# several times faster. Indented output (Accept: application/json; indent=4,
+# the browsable API) and data orjson refuses still go through JSONRenderer.
+# The one difference: NaN and infinity become null instead of an error.
+#
+# MessagePackRenderer serves the same data to clients that send
+# Accept: application/msgpack. The parsers read request bodies in both formats.
+
+_encoder = encoders.JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:  # E.g. integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+# Read-replica routing
+# Reads go to the 'replica' database only while replica reads are switched on
+# for the current request (see ReplicaRoutingMiddleware), so a request that
+# writes always reads its own writes from the primary.
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+@contextmanager
+def replica_reads():
+    """Route ORM reads inside the block to the replica, if one is configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+@contextmanager
+def primary_reads():
+    """Route ORM reads inside the block back to the primary, e.g. the reads a write is computed from."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and 'replica' in settings.DATABASES:
+            return 'replica'
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
@@ -0,0 +1,253 @@
+import itertools
+import random
+import time
+from .models import User, Task, Post, Comment, Job
+
+# API benchmark scenarios (manage.py benchmark_api)
+# One scenario per route, named after it. A scenario builds a request against
+# the rows already in the database, as (method, path, JSON body or None). It
+# may first create the rows the request consumes (the delete endpoints do),
+# which is not part of the timed request, so a scenario can be repeated any
+# number of times. Reads carry a unique `bench` query parameter unless warm,
+# so they miss the response cache and measure the view itself.
+
+SCENARIOS = {}
+
+def scenario(name, method):
+    """Register the decorated request builder as scenario `name`."""
+    def register(build):
+        SCENARIOS[name] = (method, build)
+        return build
+    return register
+
+
+class Context:
+    """Existing row ids for the scenarios to pick from, and unique names."""
+
+    def __init__(self, warm=False, random_seed=0, sample_size=10_000):
+        self.warm = warm
+        self.rng = random.Random(random_seed)
+        self.run = f'{time.time_ns():x}'
+        self.counter = itertools.count()
+        self.ids = {
+            model: list(model.objects.order_by('-id').values_list('id', flat=True)[:sample_size])
+            for model in (User, Task, Post, Comment)
+        }
+        if not all(self.ids.values()):
+            raise ValueError("Scenarios need users, tasks, posts and comments; run generate_data first.")
+
+    def pick(self, model, count=None):
+        if count is None:
+            return self.rng.choice(self.ids[model])
+        return self.rng.sample(self.ids[model], min(count, len(self.ids[model])))
+
+    def unique(self):
+        return f'{self.run}-{next(self.counter)}'
+
+    def read(self, path, **params):
+        if not self.warm:
+            params['bench'] = self.unique()
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        return f'{path}?{query}' if query else path
+
+    def user_row(self):
+        name = f'bench-{self.unique()}'
+        return User.objects.create(username=name, email=f'{name}@example.com')
+
+    def post_rows(self, count):
+        return Post.objects.bulk_create(
+            Post(author_id=self.pick(User), title=f'Victim {self.unique()}', content='Body') for _ in range(count)
+        )
+
+
+# Users
+
+@scenario('get_users', 'GET')
+def get_users(ctx):
+    return ctx.read('/task_manager/users/'), None
+
+@scenario('create_user', 'POST')
+def create_user(ctx):
+    name = f'bench-{ctx.unique()}'
+    return '/task_manager/users/create/', {'username': name, 'email': f'{name}@example.com'}
+
+@scenario('check_availability', 'GET')
+def check_availability(ctx):
+    if ctx.rng.random() < 0.5:
+        name = f'bench-{ctx.unique()}'
+    else:
+        name = User.objects.filter(id=ctx.pick(User)).values_list('username', flat=True).first()
+    return f'/task_manager/users/availability/?username={name}', None
+
+@scenario('get_user_stats', 'GET')
+def get_user_stats(ctx):
+    return f'/task_manager/users/{ctx.pick(User)}/stats/', None
+
+@scenario('verify_email', 'PUT')
+def verify_email(ctx):
+    return f'/task_manager/users/{ctx.pick(User)}/verify/', None
+
+@scenario('delete_user', 'DELETE')
+def delete_user(ctx):
+    return f'/task_manager/users/{ctx.user_row().id}/delete/', None
+
+
+# Tasks
+
+@scenario('get_tasks', 'GET')
+def get_tasks(ctx):
+    return ctx.read('/task_manager/tasks/'), None
+
+@scenario('create_task', 'POST')
+def create_task(ctx):
+    return '/task_manager/tasks/create/', {'title': f'Task {ctx.unique()}', 'user_id': ctx.pick(User)}
+
+@scenario('update_task', 'PUT')
+def update_task(ctx):
+    return f'/task_manager/tasks/{ctx.pick(Task)}/update/', {'is_completed': ctx.rng.random() < 0.5}
+
+@scenario('delete_task', 'DELETE')
+def delete_task(ctx):
+    task = Task.objects.create(user_id=ctx.pick(User), title='Victim')
+    return f'/task_manager/tasks/{task.id}/delete/', None
+
+@scenario('bulk_create_tasks', 'POST')
+def bulk_create_tasks(ctx):
+    return '/task_manager/tasks/bulk/create/', [
+        {'title': f'Task {ctx.unique()}', 'user_id': ctx.pick(User)} for _ in range(20)
+    ]
+
+@scenario('bulk_update_tasks', 'PUT')
+def bulk_update_tasks(ctx):
+    return '/task_manager/tasks/bulk/update/', [
+        {'id': task_id, 'is_completed': ctx.rng.random() < 0.5} for task_id in ctx.pick(Task, 20)
+    ]
+
+@scenario('bulk_delete_tasks', 'DELETE')
+def bulk_delete_tasks(ctx):
+    tasks = Task.objects.bulk_create(Task(user_id=ctx.pick(User), title='Victim') for _ in range(20))
+    return '/task_manager/tasks/bulk/delete/', {'ids': [task.id for task in tasks]}
+
+@scenario('export_tasks', 'GET')
+def export_tasks(ctx):
+    return ctx.read('/task_manager/tasks/export/', after_id=max(ctx.ids[Task]) - 1000), None
+
+
+# Posts
+
+@scenario('get_posts', 'GET')
+def get_posts(ctx):
+    return ctx.read('/task_manager/posts/'), None
+
+@scenario('create_post', 'POST')
+def create_post(ctx):
+    return '/task_manager/posts/create/', {
+        'title': f'Post {ctx.unique()}', 'content': 'Lorem ipsum dolor sit amet. ' * 8, 'author': ctx.pick(User),
+    }
+
+@scenario('update_post', 'PUT')
+def update_post(ctx):
+    return f'/task_manager/posts/{ctx.pick(Post)}/update/', {'content': f'Edited {ctx.unique()}'}
+
+@scenario('delete_post', 'DELETE')
+def delete_post(ctx):
+    return f'/task_manager/posts/{ctx.post_rows(1)[0].id}/delete/', None
+
+@scenario('like_post', 'PUT')
+def like_post(ctx):
+    return f'/task_manager/posts/{ctx.pick(Post)}/like/', {'user_id': ctx.pick(User)}
+
+@scenario('unlike_post', 'PUT')
+def unlike_post(ctx):
+    post = Post.objects.get(id=ctx.pick(Post))
+    user_id = ctx.pick(User)
+    post.like(user_id)
+    return f'/task_manager/posts/{post.id}/unlike/', {'user_id': user_id}
+
+@scenario('get_post_comments', 'GET')
+def get_post_comments(ctx):
+    post_id = Comment.objects.filter(id=ctx.pick(Comment)).values_list('post_id', flat=True).first()
+    return ctx.read(f'/task_manager/posts/{post_id}/comments/'), None
+
+@scenario('bulk_create_posts', 'POST')
+def bulk_create_posts(ctx):
+    return '/task_manager/posts/bulk/create/', [
+        {'title': f'Post {ctx.unique()}', 'content': 'Lorem ipsum.', 'author': ctx.pick(User)} for _ in range(20)
+    ]
+
+@scenario('bulk_update_posts', 'PUT')
+def bulk_update_posts(ctx):
+    return '/task_manager/posts/bulk/update/', [
+        {'id': post_id, 'is_published': ctx.rng.random() < 0.7} for post_id in ctx.pick(Post, 20)
+    ]
+
+@scenario('bulk_delete_posts', 'DELETE')
+def bulk_delete_posts(ctx):
+    return '/task_manager/posts/bulk/delete/', {'ids': [post.id for post in ctx.post_rows(20)]}
+
+@scenario('export_posts', 'GET')
+def export_posts(ctx):
+    return ctx.read('/task_manager/posts/export/', after_id=max(ctx.ids[Post]) - 1000), None
+
+
+# Search, jobs and feed
+
+@scenario('search', 'GET')
+def search(ctx):
+    return ctx.read('/task_manager/search/', q=ctx.rng.choice(['lorem', 'ipsum dolor', 'comment', 'amet'])), None
+
+@scenario('get_job', 'GET')
+def get_job(ctx):
+    job = Job.objects.create(name='reconcile_like_counts')
+    return ctx.read(f'/task_manager/jobs/{job.id}/'), None
+
+@scenario('get_feed', 'GET')
+def get_feed(ctx):
+    return ctx.read('/task_manager/feed/', user_id=ctx.pick(User)), None
+
+
+# Comments
+
+@scenario('create_comment', 'POST')
+def create_comment(ctx):
+    return '/task_manager/comments/create/', {'post': ctx.pick(Post), 'user': ctx.pick(User), 'content': 'Nice post'}
+
+@scenario('get_comments', 'GET')
+def get_comments(ctx):
+    return ctx.read('/task_manager/comments/'), None
+
+@scenario('delete_comment', 'DELETE')
+def delete_comment(ctx):
+    comment = Comment.objects.create(post_id=ctx.pick(Post), user_id=ctx.pick(User), content='Victim')
+    return f'/task_manager/comments/{comment.id}/delete/', None
+
+@scenario('bulk_create_comments', 'POST')
+def bulk_create_comments(ctx):
+    return '/task_manager/comments/bulk/create/', [
+        {'post': ctx.pick(Post), 'user': ctx.pick(User), 'content': f'Comment {ctx.unique()}'} for _ in range(20)
+    ]
+
+@scenario('bulk_update_comments', 'PUT')
+def bulk_update_comments(ctx):
+    return '/task_manager/comments/bulk/update/', [
+        {'id': comment_id, 'content': f'Edited {ctx.unique()}'} for comment_id in ctx.pick(Comment, 20)
+    ]
+
+@scenario('bulk_delete_comments', 'DELETE')
+def bulk_delete_comments(ctx):
+    comments = Comment.objects.bulk_create(
+        Comment(post_id=ctx.pick(Post), user_id=ctx.pick(User), content='Victim') for _ in range(20)
+    )
+    return '/task_manager/comments/bulk/delete/', {'ids': [comment.id for comment in comments]}
+
+@scenario('export_comments', 'GET')
+def export_comments(ctx):
+    return ctx.read('/task_manager/comments/export/', after_id=max(ctx.ids[Comment]) - 1000), None
+
+
+# Project routes
+
+@scenario('metrics', 'GET')
+def metrics(ctx):
+    # 404 unless METRICS_ENABLED
+    return '/metrics', None
@@ -0,0 +1,126 @@
+import re
+from html import escape
+from django.db import NotSupportedError, connections, router, transaction
+from .models import Post, Comment, SearchDocument
+
+# Full-text search
+# Posts (title and content) and comments (content) each have a SearchDocument
+# row, written by signals whenever the source row changes. On SQLite the rows
+# are indexed by the task_manager_search FTS5 table and ranked with bm25, so a
+# query walks the inverted index for its terms instead of scanning the corpus.
+# Titles weigh more than bodies. Search is SQLite-only: on PostgreSQL the
+# documents are still kept, but search() raises NotSupportedError and the
+# endpoint answers 501.
+#
+# Snippets are HTML-escaped, with the matches wrapped in <mark></mark>.
+
+MAX_LIMIT = 50
+
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+SNIPPET_WORDS = 16
+
+# Delimiters FTS5 puts around matches, swapped for <mark> tags after escaping;
+# private-use characters, removed from the indexed text
+MATCH_START = '\ue000'
+MATCH_END = '\ue001'
+
+
+# Index upkeep
+
+def _text(value):
+    return value.replace(MATCH_START, '').replace(MATCH_END, '')
+
+def _documents(model, instances):
+    if model is Post:
+        return [SearchDocument(kind=SearchDocument.POST, object_id=post.id, post_id=post.id,
+                               title=_text(post.title), body=_text(post.content)) for post in instances]
+    return [SearchDocument(kind=SearchDocument.COMMENT, object_id=comment.id, post_id=comment.post_id,
+                           body=_text(comment.content)) for comment in instances]
+
+def index(model, instances):
+    """Add or refresh the search documents of Post or Comment `instances`."""
+    documents = _documents(model, instances)
+    if documents:
+        SearchDocument.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=['kind', 'object_id'],
+            update_fields=['post_id', 'title', 'body'],
+        )
+
+def remove(model, ids):
+    """Drop the search documents of the Post or Comment rows with `ids`."""
+    kind = SearchDocument.POST if model is Post else SearchDocument.COMMENT
+    SearchDocument.objects.filter(kind=kind, object_id__in=ids).delete()
+
+def rebuild(batch_size=1000):
+    """Regenerate every document from posts and comments; returns the number written."""
+    written = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for model, fields in ((Post, ['id', 'title', 'content']), (Comment, ['id', 'post_id', 'content'])):
+            last_id = 0
+            while True:
+                batch = list(model.objects.filter(id__gt=last_id).order_by('id').only(*fields)[:batch_size])
+                if not batch:
+                    break
+                SearchDocument.objects.bulk_create(_documents(model, batch))
+                written += len(batch)
+                last_id = batch[-1].id
+    connection = connections[router.db_for_write(SearchDocument)]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO task_manager_search(task_manager_search) VALUES ('optimize')")
+    return written
+
+
+# Queries
+
+def terms(query):
+    """The words of a free-text query, as the index tokenizes them."""
+    return re.findall(r'\w+', query.lower())
+
+def available():
+    """Whether the database search reads from has the FTS5 index."""
+    return connections[router.db_for_read(SearchDocument)].vendor == 'sqlite'
+
+def search(query, kind=None, limit=20, offset=0):
+    """Best matches for `query` as dicts: type, id, post_id, title, snippet and rank (higher is better)."""
+    if not available():
+        raise NotSupportedError("Full-text search needs SQLite FTS5.")
+    words = terms(query)
+    if not words:
+        return []
+    return _search_fts5(connections[router.db_for_read(SearchDocument)], words, kind, limit, offset)
+
+def _result(kind, object_id, post_id, title, snippet, rank):
+    return {
+        'type': kind, 'id': object_id, 'post_id': post_id,
+        'title': title if kind == SearchDocument.POST else None,
+        'snippet': snippet, 'rank': rank,
+    }
+
+def _marked(snippet):
+    """Escape a snippet delimited with MATCH_START/MATCH_END, then mark the matches."""
+    return escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+def _search_fts5(connection, words, kind, limit, offset):
+    # Every word must match; the last may be a prefix, for search-as-you-type
+    match = ' '.join(f'"{word}"' for word in words) + '*'
+    sql = (
+        "SELECT d.kind, d.object_id, d.post_id, d.title,"
+        " snippet(task_manager_search, -1, %s, %s, '…', %s),"
+        " bm25(task_manager_search, %s, %s) AS score"
+        " FROM task_manager_search JOIN task_manager_searchdocument d ON d.id = task_manager_search.rowid"
+        " WHERE task_manager_search MATCH %s"
+    )
+    params = [MATCH_START, MATCH_END, SNIPPET_WORDS, TITLE_WEIGHT, BODY_WEIGHT, match]
+    if kind is not None:
+        sql += " AND d.kind = %s"
+        params.append(kind)
+    sql += " ORDER BY score LIMIT %s OFFSET %s"
+    params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25() is lower-is-better and negative; flip it so rank grows with relevance
+        return [_result(*row[:4], _marked(row[4]), -row[5]) for row in cursor.fetchall()]
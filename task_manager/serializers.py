@@ -1,42 +1,96 @@
 from rest_framework import serializers
-from .models import User, Task, Post, Comment
+from .models import User, Task, Post, Comment, TimelineEntry, Job
+from .bulk import BulkListSerializer, PreloadedPrimaryKeyRelatedField
+from .metrics import TimedDataMixin, TimedListSerializer
+from .sparse import SparseFieldsMixin
 
 # User Serializer
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, TimedDataMixin, serializers.ModelSerializer):
     is_verified_email = serializers.BooleanField(source='is_verified', read_only=True)
 
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'is_verified_email', 'created_at']
-
-    def validate_username(self, value):
-        """Custom validation for username uniqueness."""
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("This username is already taken.")
-        return value
+        summary_fields = ['id', 'username']
+        list_serializer_class = TimedListSerializer
+        # Uniqueness is left to the unique constraints; see views.create_user
+        extra_kwargs = {'username': {'validators': []}, 'email': {'validators': []}}
 
 # Task Serializer
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsMixin, TimedDataMixin, serializers.ModelSerializer):
     user = serializers.SlugRelatedField(slug_field='username', read_only=True)  # Display user's username
+    user_id = PreloadedPrimaryKeyRelatedField(source='user', queryset=User.objects.all(), write_only=True)
 
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'is_completed', 'user']
+        fields = ['id', 'title', 'description', 'is_completed', 'user', 'user_id', 'version']
+        summary_fields = ['id', 'title', 'is_completed']
+        read_only_fields = ['version']
+        list_serializer_class = BulkListSerializer
 
 # Post Serializer
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, TimedDataMixin, serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
     author_name = serializers.CharField(source='author.username', read_only=True)
     liked_by = serializers.SlugRelatedField(slug_field='username', many=True, read_only=True)  # Display usernames of likes
+    summary = serializers.CharField(source='short_content', read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'is_published', 'author', 'author_name', 'liked_by']
+        fields = ['id', 'title', 'content', 'is_published', 'author', 'author_name', 'like_count', 'liked_by', 'summary',
+                  'version']
+        optional_fields = ['summary']  # Only returned when asked for
+        summary_fields = ['id', 'title', 'summary', 'author_name', 'like_count']
+        read_only_fields = ['like_count', 'version']
+        list_serializer_class = BulkListSerializer
 
 # Comment Serializer
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, TimedDataMixin, serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
     post_title = serializers.CharField(source='post.title', read_only=True)
     user_name = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
         model = Comment
         fields = ['id', 'post', 'post_title', 'user', 'user_name', 'content', 'created_at']
+        summary_fields = ['id', 'post', 'user_name', 'created_at']
+        list_serializer_class = BulkListSerializer
+
+# Feed Serializers
+class FeedCommentSerializer(TimedDataMixin, serializers.ModelSerializer):
+    user_name = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'user_name', 'content', 'created_at']
+        list_serializer_class = TimedListSerializer
+
+class FeedPostSerializer(TimedDataMixin, serializers.ModelSerializer):
+    """Feed item built from a post annotated by queries.feed_posts()."""
+    summary = serializers.CharField(source='short_content', read_only=True)
+    author_name = serializers.CharField(source='author.username', read_only=True, default=None)
+    comment_count = serializers.IntegerField(read_only=True)
+    liked = serializers.BooleanField(read_only=True)
+    comments = FeedCommentSerializer(source='preview_comments', many=True, read_only=True)
+
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'summary', 'author_name', 'created_at', 'like_count', 'comment_count', 'liked', 'comments']
+        list_serializer_class = TimedListSerializer
+
+class TimelineEntrySerializer(TimedDataMixin, serializers.ModelSerializer):
+    """Feed item read from the materialized timeline; same shape as FeedPostSerializer."""
+    id = serializers.IntegerField(source='post_id', read_only=True)
+    liked = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = TimelineEntry
+        fields = ['id', 'title', 'summary', 'author_name', 'created_at', 'like_count', 'comment_count', 'liked', 'comments']
+        list_serializer_class = TimedListSerializer
+
+# Job Serializer
+class JobSerializer(TimedDataMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'attempts', 'max_attempts', 'result', 'error', 'created_at', 'updated_at']
+        read_only_fields = fields
@@ -0,0 +1,197 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import User, Task, Post, Comment, TimelineEntry, ArchivedTask, ArchivedComment, actual_like_count
+from .cache import bump
+from . import bloom, search, stats, timeline
+
+# Response cache invalidation
+
+def cache_scopes(model, instance):
+    """Response cache scopes that a change to `instance` invalidates."""
+    if model is Comment:
+        return {'comment', f'comment:post:{instance.post_id}'}
+    return {SCOPES[model]}
+
+def snapshot(model, instances):
+    """What `instances` currently feed into: (cache scopes, timeline post ids, user stats contributions).
+
+    Taken before a bulk update so rows moved elsewhere still invalidate their old place.
+    """
+    scopes = set()
+    for instance in instances:
+        scopes |= cache_scopes(model, instance)
+    if model is Post:
+        post_ids = {instance.pk for instance in instances}
+    elif model is Comment:
+        post_ids = {instance.post_id for instance in instances}
+    else:
+        post_ids = set()
+    contributions = stats.contributions(model, instances) if model in stats.COLUMNS else {}
+    return scopes, post_ids, contributions
+
+def invalidate(model, instances, stale=None):
+    """Propagate writes that bypass signals (bulk_create/bulk_update) to the cache, timeline, search index and user stats."""
+    if model in (Post, Comment):
+        search.index(model, instances)
+    scopes, post_ids, contributions = snapshot(model, instances)
+    if stale is not None:
+        scopes |= stale[0]
+        post_ids |= stale[1]
+    stats.apply(stale[2] if stale is not None else {}, contributions)
+    propagate(scopes, post_ids)
+
+def propagate(scopes, post_ids):
+    """Bump cache `scopes` and refresh the timeline entries of `post_ids`."""
+    if scopes:
+        bump(*scopes)
+    if settings.FEED_TIMELINE:
+        for post_id in post_ids:
+            timeline.refresh(post_id)
+
+SCOPES = {
+    User: 'user',
+    Task: 'task',
+    Post: 'post',
+    Post.liked_by.through: 'like',
+}
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Post.liked_by.through)
+def model_changed(sender, instance, **kwargs):
+    bump(*cache_scopes(sender, instance))
+
+# Likes written through the liked_by manager
+# post.liked_by.add()/remove()/clear() and user.liked_posts.* bypass like()
+# and unlike(), so the touched posts' like_count is recounted from the
+# liked_by table and their authors' likes_received moved by the difference.
+
+@receiver(m2m_changed, sender=Post.liked_by.through)
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:  # The posts are gone by post_clear
+        instance._cleared_likes = list(sender.objects.filter(user_id=instance.pk).values_list('post_id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        post_ids = [instance.pk]
+    elif action == 'post_clear':
+        post_ids = instance.__dict__.pop('_cleared_likes', [])
+    else:
+        post_ids = list(pk_set)
+    before = dict(Post.objects.filter(id__in=post_ids).values_list('id', 'like_count'))
+    Post.objects.filter(id__in=post_ids).update(like_count=actual_like_count())
+    after = Post.objects.filter(id__in=post_ids).values_list('id', 'like_count')
+    stats.liked({post_id: count - before[post_id] for post_id, count in after if count != before[post_id]})
+    propagate({'like', 'post'}, post_ids)
+
+
+# Like counts of a deleted liker
+# Deleting a user cascades to their likes without signals (the through model
+# is auto-created), so the liked posts' counters are lowered first, in the
+# same transaction. deletion.delete_user removes the likes itself beforehand,
+# leaving none for this to find.
+
+@receiver(pre_delete, sender=User)
+def liker_deleting(sender, instance, **kwargs):
+    post_ids = list(Post.liked_by.through.objects.filter(user_id=instance.pk).values_list('post_id', flat=True))
+    if not post_ids:
+        return
+    Post.objects.filter(id__in=post_ids).update(like_count=F('like_count') - 1)
+    if settings.FEED_TIMELINE:
+        TimelineEntry.objects.filter(post_id__in=post_ids).update(like_count=F('like_count') - 1)
+    stats.liked(dict.fromkeys(post_ids, -1))
+    bump('like', 'post')
+
+
+# Materialized timeline upkeep
+
+@receiver(post_save, sender=Post)
+def timeline_post_saved(sender, instance, **kwargs):
+    if settings.FEED_TIMELINE:
+        timeline.refresh(instance.pk)
+
+@receiver([post_save, post_delete], sender=Comment)
+def timeline_comment_changed(sender, instance, **kwargs):
+    if settings.FEED_TIMELINE:
+        timeline.refresh(instance.post_id)
+
+@receiver(post_save, sender=Post.liked_by.through)
+def timeline_like_added(sender, instance, created, **kwargs):
+    if settings.FEED_TIMELINE and created:
+        TimelineEntry.objects.filter(post_id=instance.post_id).update(like_count=F('like_count') + 1)
+
+@receiver(post_delete, sender=Post.liked_by.through)
+def timeline_like_removed(sender, instance, **kwargs):
+    if settings.FEED_TIMELINE:
+        TimelineEntry.objects.filter(post_id=instance.post_id).update(like_count=F('like_count') - 1)
+
+@receiver(post_save, sender=User)
+def timeline_author_renamed(sender, instance, created, **kwargs):
+    if settings.FEED_TIMELINE and not created:
+        TimelineEntry.objects.filter(post__author=instance).exclude(
+            author_name=instance.username
+        ).update(author_name=instance.username)
+
+
+# Search index upkeep
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def search_document_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        return
+    search.index(sender, [instance])
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def search_document_deleted(sender, instance, **kwargs):
+    search.remove(sender, [instance.pk])
+
+
+# User stats upkeep
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Comment)
+def stats_row_saving(sender, instance, update_fields=None, **kwargs):
+    # The stored row, for post_save to compare with what was written
+    columns = stats.COLUMNS[sender]
+    if instance._state.adding or (update_fields is not None and not set(columns) & set(update_fields)):
+        return
+    instance._stats_stored = sender.objects.filter(pk=instance.pk).only(*columns).first()
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+def stats_row_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        stats.apply({}, stats.contributions(sender, [instance]))
+        return
+    stored = instance.__dict__.pop('_stats_stored', None)
+    if stored is not None:
+        before = stats.contributions(sender, [stored])
+        for name in stats.COLUMNS[sender]:
+            if update_fields is None or name in update_fields:
+                attname = sender._meta.get_field(name).attname
+                setattr(stored, attname, getattr(instance, attname))
+        stats.apply(before, stats.contributions(sender, [stored]))
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=ArchivedTask)  # Cascaded from their user or post
+@receiver(post_delete, sender=ArchivedComment)
+def stats_row_deleted(sender, instance, **kwargs):
+    stats.apply(stats.contributions(sender, [instance]), {})
+
+
+# Username/email pre-check upkeep
+
+@receiver(post_save, sender=User)
+def user_values_saved(sender, instance, **kwargs):
+    if settings.USER_BLOOM_FILTER:
+        bloom.remember(instance)
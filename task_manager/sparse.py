@@ -0,0 +1,47 @@
+from rest_framework import serializers
+
+# Sparse fieldsets
+# List endpoints accept ?fields=a,b to return only those fields, ?view=summary
+# for the serializer's compact representation, and ?expand=c,d to add fields
+# on top of either. The selection is passed both to the serializer and to the
+# query plan, so unrequested columns are never loaded.
+
+class SparseFieldsMixin:
+    """Serializer taking `fields=[...]`; by default every field but Meta.optional_fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = default_fields(type(self))
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+
+
+def default_fields(serializer_class):
+    optional = getattr(serializer_class.Meta, 'optional_fields', ())
+    return [name for name in serializer_class.Meta.fields if name not in optional]
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+def requested_fields(request, serializer_class):
+    """Fields selected by the request's query string, or None for the default representation."""
+    params = request.GET
+    meta = serializer_class.Meta
+    if 'fields' in params:
+        fields = _split(params['fields'])
+    elif params.get('view') == 'summary':
+        fields = list(meta.summary_fields)
+    else:
+        fields = None
+    expand = _split(params.get('expand'))
+    if fields is None and not expand:
+        return None
+
+    selected = list(dict.fromkeys((default_fields(serializer_class) if fields is None else fields) + expand))
+    unknown = [name for name in selected if name not in meta.fields]
+    if unknown:
+        raise serializers.ValidationError({"fields": [f"Unknown field(s): {', '.join(unknown)}."]})
+    return selected
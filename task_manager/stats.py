@@ -0,0 +1,112 @@
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from .models import User, Task, Post, Comment, ArchivedTask, ArchivedComment, UserStats
+from .routers import primary_reads
+
+# Per-user statistics
+# A user's counts of posts authored, likes received on them (the sum of their
+# like_count), comments written and tasks open and completed, archived rows
+# included, live in one UserStats row: the stats endpoint is a primary-key
+# lookup. Writes keep the rows current incrementally. Every Post, Task and
+# Comment row contributes to its owner's counts, and a write applies the
+# difference between the contributions of the rows it touched after and
+# before, as one UPDATE for all affected users. Signals cover single-row
+# saves and deletes, including archived rows removed by a cascade, and
+# liked_by.add()/remove()/clear(). The paths that bypass them (bulk writes,
+# batched deletion, likes) apply their changes themselves, and
+# reconcile_like_counts recounts likes_received along with like_count. Archiving moves rows
+# between tables without changing any count.
+#
+# A user's row is created from aggregates over the source tables the first
+# time their stats are read, or by `manage.py recompute_user_stats`; until
+# then writes have no row to update. A write racing that first read can be
+# missed; recompute_user_stats reports and repairs such drift.
+
+FIELDS = ['posts', 'likes_received', 'comments', 'open_tasks', 'completed_tasks']
+
+# Fields whose value decides what a row contributes
+COLUMNS = {
+    Post: ['author', 'like_count'],
+    Task: ['user', 'is_completed'],
+    Comment: ['user'],
+}
+
+
+def contributions(model, instances):
+    """{user id: Counter of FIELDS} that Post, Task or Comment `instances` (or their archived copies) add."""
+    totals = defaultdict(Counter)
+    for instance in instances:
+        if model is Post:
+            if instance.author_id is not None:
+                totals[instance.author_id].update(posts=1, likes_received=instance.like_count)
+        elif model in (Task, ArchivedTask):
+            totals[instance.user_id]['completed_tasks' if instance.is_completed else 'open_tasks'] += 1
+        else:
+            totals[instance.user_id]['comments'] += 1
+    return totals
+
+def apply(before, after):
+    """Move the affected users' stats from the `before` to the `after` contributions, in one UPDATE."""
+    deltas = {}
+    for user_id in before.keys() | after.keys():
+        delta = Counter(after.get(user_id))
+        delta.subtract(before.get(user_id, {}))
+        if any(delta.values()):
+            deltas[user_id] = delta
+    changes = {}
+    for field in FIELDS:
+        whens = [When(user_id=user_id, then=Value(delta[field])) for user_id, delta in deltas.items() if delta[field]]
+        if whens:
+            changes[field] = F(field) + Case(*whens, default=Value(0))
+    if changes:
+        UserStats.objects.filter(user_id__in=deltas).update(**changes)
+
+def liked(post_deltas):
+    """Apply {post id: like_count change} to the likes_received of the posts' authors."""
+    received = defaultdict(Counter)
+    authors = Post.objects.filter(id__in=post_deltas, author__isnull=False).values_list('id', 'author_id')
+    for post_id, author_id in authors:
+        received[author_id]['likes_received'] += post_deltas[post_id]
+    apply({}, received)
+
+
+# From scratch
+
+def compute(user_ids=None):
+    """{user id: {field: count}} aggregated from the source tables, for every user or just `user_ids`."""
+    def owned_by(queryset, owner):
+        return queryset if user_ids is None else queryset.filter(**{f'{owner}__in': user_ids})
+
+    stats = {user_id: dict.fromkeys(FIELDS, 0) for user_id in owned_by(User.objects, 'id').values_list('id', flat=True)}
+    authored = (owned_by(Post.objects.filter(author__isnull=False), 'author')
+                .values('author').annotate(posts=Count('id'), likes=Sum('like_count')))
+    for row in authored:
+        stats[row['author']].update(posts=row['posts'], likes_received=row['likes'])
+    for model in (Comment, ArchivedComment):
+        for row in owned_by(model.objects, 'user').values('user').annotate(count=Count('id')):
+            stats[row['user']]['comments'] += row['count']
+    for model in (Task, ArchivedTask):
+        for row in owned_by(model.objects, 'user').values('user', 'is_completed').annotate(count=Count('id')):
+            stats[row['user']]['completed_tasks' if row['is_completed'] else 'open_tasks'] += row['count']
+    return stats
+
+def store(stats):
+    """Write computed `stats` to the UserStats rows, creating the missing ones."""
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id, **counts) for user_id, counts in stats.items()],
+        update_conflicts=True, unique_fields=['user'], update_fields=FIELDS, batch_size=1000,
+    )
+
+def get(user_id):
+    """A user's {field: count}, from their UserStats row (created if missing); None if there is no such user."""
+    counts = UserStats.objects.filter(user_id=user_id).values(*FIELDS).first()
+    if counts is None:
+        # Computed from and stored on the primary, even while handling a GET
+        with primary_reads(), transaction.atomic():
+            computed = compute([user_id])
+            if user_id not in computed:
+                return None
+            store(computed)
+        counts = computed[user_id]
+    return counts
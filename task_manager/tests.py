@@ -1,3 +1,1336 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+import time
+from base64 import urlsafe_b64encode
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import partial
+from io import StringIO
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import NotSupportedError, connection, connections, transaction
+from django.db.models import F
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from connectly_project.settings import database_settings
+from .models import User, Task, Post, Comment, Job, TimelineEntry, SearchDocument, ArchivedTask, ArchivedComment, UserStats
+from .serializers import UserSerializer
+from .pagination import CreatedAtCursorPagination
+from .metrics import REGISTRY
+from .middleware import ReplicaRoutingMiddleware
+from .routers import ReplicaRouter, replica_reads
+from . import cache as response_cache
+from . import archive, async_views, benchmarks, bloom, conditional, deletion, fastpath, jobs, likebuffer, renderers, scenarios, search, stats, timeline
+
+
+class CommittingClient(APIClient):
+    """APIClient that applies the cache invalidations of earlier writes, and of each request's own, as their commits would.
+
+    Tests run inside a transaction that never commits, so on_commit callbacks
+    otherwise never run.
+    """
+
+    def request(self, **kwargs):
+        self.commit()
+        response = super().request(**kwargs)
+        self.commit()
+        return response
+
+    def commit(self):
+        for _, callback, _ in list(connection.run_on_commit):
+            if isinstance(callback, partial) and callback.func is response_cache._set_versions \
+                    and not getattr(callback, 'committed', False):
+                callback.committed = True
+                callback()
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = CommittingClient()
+
+
+class CursorPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice', email='alice@example.com')
+        cls.posts = [
+            Post.objects.create(author=cls.user, title=f'Post {i}', content='Body')
+            for i in range(25)
+        ]
+        for i in range(15):
+            Task.objects.create(user=cls.user, title=f'Task {i}')
+
+    def collect(self, url):
+        """Follow `next` links and return every result in order."""
+        results = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            results.extend(response.data['results'])
+            url = response.data['next']
+        return results
+
+    def test_posts_are_paged_newest_first_without_gaps(self):
+        results = self.collect('/task_manager/posts/?page_size=7')
+        expected = sorted(self.posts, key=lambda p: (p.created_at, p.id), reverse=True)
+        self.assertEqual([r['id'] for r in results], [p.id for p in expected])
+
+    def test_tasks_are_paged_by_id(self):
+        results = self.collect('/task_manager/tasks/?pagination=cursor')
+        self.assertEqual([r['id'] for r in results], sorted(r['id'] for r in results))
+        self.assertEqual(len(results), 15)
+
+    def test_users_and_tasks_default_to_numbered_pages(self):
+        response = self.client.get('/task_manager/tasks/?page=2')
+        self.assertEqual(response.data['count'], 15)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(self.client.get('/task_manager/users/').data['count'], 1)
+        self.assertEqual(self.client.get('/task_manager/tasks/?page=3').status_code, 404)
+
+    def test_previous_links_walk_back(self):
+        first = self.client.get('/task_manager/posts/?page_size=10').data
+        second = self.client.get(first['next']).data
+        self.assertEqual(self.client.get(second['previous']).data['results'], first['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_pages_are_keyset_ranges(self):
+        url = self.client.get('/task_manager/posts/?page_size=10').data['next']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('"created_at" <=', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertEqual(self.client.get('/task_manager/posts/?cursor=bogus').status_code, 404)
+
+    def test_crafted_cursors_are_not_found(self):
+        for position, reverse in (([None, 1], 0), ([[], 1], 0), (['2026-01-01T00:00:00', True], 0),
+                                  (['2026-01-01T00:00:00', 1], 2), (['', 1], 0), ([1], 0)):
+            token = urlsafe_b64encode(json.dumps({'p': position, 'r': reverse}).encode()).decode()
+            with self.subTest(position=position, reverse=reverse):
+                self.assertEqual(self.client.get(f'/task_manager/posts/?cursor={token}').status_code, 404)
+        token = urlsafe_b64encode(json.dumps({'p': [None], 'r': 0}).encode()).decode()
+        self.assertEqual(self.client.get(f'/task_manager/tasks/?pagination=cursor&cursor={token}').status_code, 404)
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(CreatedAtCursorPagination, 'max_page_size', 5):
+            response = self.client.get('/task_manager/posts/?page_size=100000')
+        self.assertEqual(len(response.data['results']), 5)
+
+
+class QueryCountTests(APITestCase):
+    """Each endpoint runs a fixed number of queries, however many rows exist."""
+
+    def seed(self, n):
+        users = [
+            User.objects.create(username=f'user{i}', email=f'user{i}@example.com')
+            for i in range(User.objects.count(), User.objects.count() + n)
+        ]
+        for user in users:
+            post = Post.objects.create(author=user, title='Title', content='Body')
+            post.liked_by.add(*users)
+            Comment.objects.create(post=post, user=user, content='Nice')
+            Task.objects.create(user=user, title='Task')
+        return post
+
+    def assertStableQueries(self, num, url_for):
+        for n in (1, 5):
+            post = self.seed(n)
+            with self.assertNumQueries(num):
+                response = self.client.get(url_for(post))
+            self.assertEqual(response.status_code, 200)
+
+    def test_get_users(self):
+        self.assertStableQueries(2, lambda post: '/task_manager/users/')  # COUNT, page
+        self.assertStableQueries(1, lambda post: '/task_manager/users/?pagination=cursor')
+
+    def test_get_tasks(self):
+        self.assertStableQueries(2, lambda post: '/task_manager/tasks/')
+        self.assertStableQueries(1, lambda post: '/task_manager/tasks/?pagination=cursor')
+
+    def test_get_posts(self):
+        self.assertStableQueries(2, lambda post: '/task_manager/posts/')
+
+    def test_get_comments(self):
+        self.assertStableQueries(1, lambda post: '/task_manager/comments/')
+
+    def test_get_post_comments(self):
+        self.assertStableQueries(2, lambda post: f'/task_manager/posts/{post.id}/comments/')
+
+    def test_update_post(self):
+        post = self.seed(5)
+        with self.assertNumQueries(4):  # Load, likers, UPDATE, search document upsert
+            response = self.client.put(
+                f'/task_manager/posts/{post.id}/update/', {'title': 'New'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+class LikeCounterTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'liker{i}', email=f'liker{i}@example.com')
+            for i in range(3)
+        ]
+        cls.post = Post.objects.create(author=cls.users[0], title='Viral', content='Body', is_published=True)
+
+    def like(self, user, action='like', query=''):
+        return self.client.put(
+            f'/task_manager/posts/{self.post.id}/{action}/{query}', {'user_id': user.id}, format='json'
+        )
+
+    def test_like_and_unlike_keep_count_in_sync(self):
+        for user in self.users:
+            response = self.like(user)
+        self.assertEqual(response.data['like_count'], 3)
+        self.assertEqual(response.data['liked_by'], ['liker2', 'liker1', 'liker0'])
+
+        self.assertEqual(self.like(self.users[0]).data['like_count'], 3)  # Repeat like is a no-op
+        self.assertEqual(self.like(self.users[0], 'unlike').data['like_count'], 2)
+        self.assertEqual(self.like(self.users[0], 'unlike').status_code, 400)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, self.post.liked_by.count())
+
+    def test_likers_preview_is_bounded(self):
+        for user in self.users:
+            response = self.like(user, query='?likers=1')
+        self.assertEqual(response.data['liked_by'], ['liker2'])
+
+    def test_like_query_count_is_independent_of_popularity(self):
+        self.post.liked_by.add(*self.users[1:])
+        # post, user, exists, savepoint/insert/update/author stats/release, likers preview
+        with self.assertNumQueries(9):
+            self.like(self.users[0])
+
+    def test_deleting_a_liker_lowers_the_count(self):
+        stats.store(stats.compute())
+        for user in self.users:
+            self.like(user)
+        self.users[1].delete()
+        User.objects.filter(id=self.users[2].id).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(self.post.like_count, self.post.liked_by.count())
+        self.assertEqual(stats.get(self.users[0].id)['likes_received'], 1)
+
+    @override_settings(FEED_TIMELINE=True)
+    def test_reconcile_repairs_drift(self):
+        self.post.liked_by.add(*self.users)
+        Post.objects.filter(pk=self.post.pk).update(like_count=42)
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(self.client.get('/task_manager/feed/').data['results'][0]['like_count'], 42)  # Cached
+        call_command('reconcile_like_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 3)
+        self.assertEqual(self.client.get('/task_manager/feed/').data['results'][0]['like_count'], 3)
+
+
+class ResponseCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='carol', email='carol@example.com')
+        cls.post = Post.objects.create(author=cls.user, title='Cached', content='Body')
+
+    def test_repeat_reads_skip_the_database(self):
+        self.client.get('/task_manager/posts/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/task_manager/posts/')
+        self.assertEqual(response.data['results'][0]['title'], 'Cached')
+
+    def test_writes_invalidate_dependent_responses(self):
+        url = f'/task_manager/posts/{self.post.id}/comments/'
+        self.assertEqual(self.client.get(url).data, [])
+        Comment.objects.create(post=self.post, user=self.user, content='First')
+        self.assertEqual(len(self.client.get(url).data), 1)
+
+        self.client.put(f'/task_manager/posts/{self.post.id}/like/', {'user_id': self.user.id}, format='json')
+        response = self.client.get('/task_manager/posts/')
+        self.assertEqual(response.data['results'][0]['liked_by'], ['carol'])
+
+    def test_versions_move_when_the_write_commits(self):
+        etag = self.client.get('/task_manager/tasks/')['ETag']
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Task.objects.create(user=self.user, title='Rolled back')
+            raise RuntimeError
+        self.assertEqual(self.client.get('/task_manager/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        versions = response_cache._versions(['task'])
+        with self.captureOnCommitCallbacks() as callbacks:
+            Task.objects.create(user=self.user, title='Committed')
+        self.assertEqual(response_cache._versions(['task']), versions)  # Not before the commit
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(response_cache._versions(['task']), versions)
+
+    def test_unrelated_writes_keep_entries(self):
+        self.client.get('/task_manager/users/')
+        Task.objects.create(user=self.user, title='Unrelated')
+        with self.assertNumQueries(0):
+            self.client.get('/task_manager/users/')
+
+    def test_conditional_get_returns_304(self):
+        response = self.client.get('/task_manager/tasks/')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/task_manager/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        Task.objects.create(user=self.user, title='New')
+        response = self.client.get('/task_manager/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_waits_for_its_second_to_end(self):
+        second = time.time_ns() // 1_000_000_000 + 10  # After every version already stored
+
+        def get(at, **headers):
+            clock.time_ns.return_value = int(at * 1_000_000_000)
+            return self.client.get('/task_manager/tasks/', **headers)
+
+        with mock.patch('task_manager.cache.time') as clock:
+            clock.time_ns.return_value = second * 1_000_000_000
+            Task.objects.create(user=self.user, title='First')
+            self.assertNotIn('Last-Modified', get(second + 0.5))  # A later change this second would keep the date
+            last_modified = get(second + 1.5)['Last-Modified']
+            self.assertEqual(last_modified, http_date(second))
+            self.assertEqual(get(second + 2, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+            # If-None-Match takes precedence over a matching If-Modified-Since
+            response = get(second + 2, HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH='"stale"')
+            self.assertEqual(response.status_code, 200)
+
+            clock.time_ns.return_value = (second + 2) * 1_000_000_000
+            Task.objects.create(user=self.user, title='Second')
+            self.assertEqual(get(second + 3, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+
+class BulkEndpointTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'importer{i}', email=f'importer{i}@example.com')
+            for i in range(3)
+        ]
+
+    def test_bulk_create_tasks_uses_constant_queries(self):
+        batch = [{'title': f'Task {i}', 'user_id': self.users[i % 3].id} for i in range(50)]
+        # user preload, savepoint/insert/release, one stats UPDATE for all owners
+        with self.assertNumQueries(5):
+            response = self.client.post('/task_manager/tasks/bulk/create/', batch, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.count(), 50)
+        self.assertEqual(response.data[1]['user'], 'importer1')
+
+    def test_bulk_create_reports_errors_per_item(self):
+        batch = [
+            {'title': 'Good', 'user_id': self.users[0].id},
+            {'title': 'Bad user', 'user_id': 9999},
+            {'user_id': self.users[0].id},
+        ]
+        response = self.client.post('/task_manager/tasks/bulk/create/', batch, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data['details']), [1, 2])
+        self.assertIn('user_id', response.data['details'][1])
+        self.assertIn('title', response.data['details'][2])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_batch_size_is_capped(self):
+        batch = [{'title': 'Task', 'user_id': self.users[0].id}] * 3
+        with self.settings(BULK_MAX_BATCH_SIZE=2):
+            response = self.client.post('/task_manager/tasks/bulk/create/', batch, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_update_comments(self):
+        post = Post.objects.create(author=self.users[0], title='Post', content='Body')
+        other = Post.objects.create(author=self.users[0], title='Other', content='Body')
+        comments = [Comment.objects.create(post=post, user=self.users[0], content='Old') for _ in range(3)]
+        self.client.get(f'/task_manager/posts/{other.id}/comments/')  # Warm the cache
+
+        batch = [{'id': c.id, 'content': 'New', 'post': other.id} for c in comments]
+        response = self.client.put('/task_manager/comments/bulk/update/', batch, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(Comment.objects.values_list('content', flat=True)), {'New'})
+        self.assertEqual(len(self.client.get(f'/task_manager/posts/{other.id}/comments/').data), 3)
+
+        response = self.client.put('/task_manager/comments/bulk/update/', [{'id': 9999, 'content': 'x'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data['details'][0])
+
+    def test_bulk_delete_is_all_or_nothing(self):
+        posts = [Post.objects.create(author=self.users[0], title='Post', content='Body') for _ in range(3)]
+        ids = [p.id for p in posts]
+        response = self.client.delete('/task_manager/posts/bulk/delete/', {'ids': ids + [9999]}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Post.objects.count(), 3)
+
+        response = self.client.delete('/task_manager/posts/bulk/delete/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.count(), 0)
+
+
+class AsyncViewTests(APITestCase):
+    """The async views return the same bodies as the DRF views they replace."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'async{i}', email=f'async{i}@example.com')
+            for i in range(3)
+        ]
+        cls.post = Post.objects.create(author=cls.users[0], title='Async', content='Body')
+        cls.post.like(cls.users[1].id)
+        for i in range(15):
+            Post.objects.create(author=cls.users[i % 3], title=f'Post {i}', content='Body')
+            Comment.objects.create(post=cls.post, user=cls.users[i % 3], content=f'Comment {i}')
+            Task.objects.create(user=cls.users[i % 3], title=f'Task {i}')
+
+    async def assertSameBody(self, view, url, **kwargs):
+        expected = await sync_to_async(lambda: json.loads(self.client.get(url).content))()
+        request = AsyncRequestFactory().get(url)
+        response = await view(request, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), expected)
+        return expected
+
+    async def test_read_endpoints_match_sync_views(self):
+        await self.assertSameBody(async_views.get_users, '/task_manager/users/')
+        await self.assertSameBody(async_views.get_tasks, '/task_manager/tasks/?page_size=4')
+        await self.assertSameBody(async_views.get_comments, '/task_manager/comments/')
+        await self.assertSameBody(
+            async_views.get_post_comments, f'/task_manager/posts/{self.post.id}/comments/', post_id=self.post.id
+        )
+        body = await self.assertSameBody(async_views.get_posts, '/task_manager/posts/?page_size=5')
+        await self.assertSameBody(async_views.get_posts, body['next'])
+
+    async def test_like_and_unlike(self):
+        factory = AsyncRequestFactory()
+        request = factory.put(
+            f'/task_manager/posts/{self.post.id}/like/', {'user_id': self.users[2].id}, content_type='application/json'
+        )
+        response = await async_views.like_post(request, post_id=self.post.id)
+        self.assertEqual(json.loads(response.content)['like_count'], 2)
+
+        request = factory.put(
+            f'/task_manager/posts/{self.post.id}/unlike/', {'user_id': self.users[0].id}, content_type='application/json'
+        )
+        response = await async_views.unlike_post(request, post_id=self.post.id)
+        self.assertEqual(response.status_code, 400)
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_connections_are_tuned(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+
+    def test_sqlite_connections_are_reused(self):
+        profile = database_settings('DB')
+        self.assertGreater(profile['CONN_MAX_AGE'], 0)
+        self.assertTrue(profile['CONN_HEALTH_CHECKS'])
+
+
+class ReplicaTests(TestCase):
+    """A real second SQLite alias on a scratch file, with the production connection settings."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scratch = tempfile.TemporaryDirectory()
+        replica = {**database_settings('DB'), 'NAME': os.path.join(cls.scratch.name, 'replica.sqlite3')}
+        cls.databases_patch = mock.patch.dict(settings.DATABASES, {'replica': replica})
+        cls.databases_patch.start()
+        connections.settings['replica'] = connections.configure_settings(dict(settings.DATABASES))['replica']
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(User)
+            editor.create_model(Post)
+            editor.create_model(UserStats)
+        # Only now that the alias exists; the runner checks `databases` before setUpClass
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.databases_patch.stop()
+        cls.scratch.cleanup()
+
+    def test_replica_connections_use_wal(self):
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+
+    def test_missing_stats_rows_are_computed_on_the_primary(self):
+        user = User.objects.create(username='fresh', email='fresh@example.com')  # Not on the replica yet
+        with replica_reads():
+            self.assertEqual(stats.get(user.id)['posts'], 0)
+        self.assertTrue(UserStats.objects.using('default').filter(user=user).exists())
+        self.assertFalse(UserStats.objects.using('replica').exists())
+
+    def test_get_requests_read_from_replica(self):
+        Post.objects.using('replica').create(title='On the replica', content='Body')
+        router = ReplicaRouter()
+
+        def routed(method):
+            def view(request):
+                return router.db_for_read(Post), Post.objects.filter(title='On the replica').exists()
+            middleware = ReplicaRoutingMiddleware(view)
+            return middleware(getattr(RequestFactory(), method)('/task_manager/posts/'))
+
+        self.assertEqual(routed('get'), ('replica', True))
+        self.assertEqual(routed('put'), ('default', False))
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+        with mock.patch.dict(settings.DATABASES):
+            del settings.DATABASES['replica']
+            self.assertEqual(routed('get'), ('default', False))  # No replica configured
+
+
+class FeedTests(APITestCase):
+    def seed(self, n):
+        users = [
+            User.objects.create(username=f'feed{i}', email=f'feed{i}@example.com')
+            for i in range(User.objects.count(), User.objects.count() + n)
+        ]
+        for user in users:
+            post = Post.objects.create(author=user, title='Title', content='Body ' * 20, is_published=True)
+            Post.objects.create(author=user, title='Draft', content='Body')
+            for other in users:
+                post.like(other.id)
+                Comment.objects.create(post=post, user=other, content='Nice')
+        return users
+
+    def test_feed_has_counts_and_first_comments(self):
+        users = self.seed(4)
+        response = self.client.get(f'/task_manager/feed/?user_id={users[0].id}')
+        self.assertEqual(len(response.data['results']), 4)
+        item = response.data['results'][0]
+        self.assertEqual(item['title'], 'Title')
+        self.assertEqual((item['like_count'], item['comment_count']), (4, 4))
+        self.assertEqual(len(item['comments']), settings.FEED_COMMENTS_PREVIEW)
+        self.assertTrue(item['liked'])
+
+    def test_feed_query_count_is_constant(self):
+        for n in (1, 4):
+            self.seed(n)
+            with self.assertNumQueries(2):
+                self.client.get('/task_manager/feed/?page_size=50')
+            cache.clear()
+
+    def test_timeline_matches_live_feed(self):
+        users = self.seed(3)
+        live = self.client.get('/task_manager/feed/').data
+        call_command('rebuild_timeline', stdout=StringIO())
+        with self.settings(FEED_TIMELINE=True):
+            cache.clear()
+            with self.assertNumQueries(1):
+                materialized = self.client.get('/task_manager/feed/').data
+            self.assertEqual(json.loads(json.dumps(materialized)), json.loads(json.dumps(live)))
+
+            # Writes keep the timeline current
+            post = Post.objects.filter(is_published=True).first()
+            post.unlike(users[0].id)
+            Comment.objects.create(post=post, user=users[0], content='Later')
+            Post.objects.create(author=users[0], title='Fresh', content='Body', is_published=True)
+            materialized = self.client.get('/task_manager/feed/').data
+        cache.clear()
+        live = self.client.get('/task_manager/feed/').data
+        self.assertEqual(materialized['results'][0]['title'], 'Fresh')
+        self.assertEqual(json.loads(json.dumps(materialized)), json.loads(json.dumps(live)))
+
+
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        REGISTRY.reset()
+
+    def test_server_timing_header(self):
+        user = User.objects.create(username='dave', email='dave@example.com')
+        Post.objects.create(author=user, title='Timed', content='Body')
+        response = self.client.get('/task_manager/posts/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="2 queries"', timing)
+        self.assertRegex(timing, r'serializer;dur=[\d.]+')
+
+    def test_metrics_endpoint_is_off_by_default(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with self.settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=['10.0.0.9']):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.9').status_code, 200)
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_metrics_endpoint(self):
+        self.client.get('/task_manager/users/')
+        self.client.get('/task_manager/users/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('connectly_requests_total{view="get_users",method="GET",status="200"} 2', body)
+        self.assertIn('connectly_request_duration_seconds_bucket{view="get_users",method="GET",le="+Inf"} 2', body)
+        self.assertIn('connectly_db_queries_total{view="get_users",method="GET"} 1', body)
+
+    def test_slow_queries_are_logged(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0), self.assertLogs('task_manager.slow_queries') as logs:
+            User.objects.count()
+        self.assertIn('SELECT COUNT(*)', logs.output[0])
+
+
+class SparseFieldsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='erin', email='erin@example.com')
+        cls.post = Post.objects.create(author=cls.user, title='Sparse', content='x' * 80)
+        cls.post.like(cls.user.id)
+
+    def test_fields_limit_output_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/task_manager/posts/?fields=id,title')
+        self.assertEqual(response.data['results'], [{'id': self.post.id, 'title': 'Sparse'}])
+        self.assertEqual(len(queries), 1)  # No likers prefetch
+        self.assertNotIn('"content"', queries[0]['sql'])
+
+    def test_summary_view_uses_short_content(self):
+        response = self.client.get('/task_manager/posts/?view=summary&expand=liked_by')
+        self.assertEqual(response.data['results'][0], {
+            'id': self.post.id, 'title': 'Sparse', 'summary': 'x' * 50 + '...',
+            'author_name': 'erin', 'like_count': 1, 'liked_by': ['erin'],
+        })
+
+    def test_default_representation_is_unchanged(self):
+        response = self.client.get('/task_manager/posts/')
+        self.assertNotIn('summary', response.data['results'][0])
+        self.assertIn('content', response.data['results'][0])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/task_manager/comments/?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.data['fields'][0])
+
+
+class FastReadPathTests(APITestCase):
+    """The .values() readers produce exactly what the serializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'fast{i}', email=f'fast{i}@example.com', is_verified=i % 2 == 0)
+            for i in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(author=cls.users[0], title='Long', content='y' * 80, is_published=True),
+            Post.objects.create(author=None, title='Orphan', content='Short'),
+        ]
+        for user in cls.users:
+            cls.posts[0].like(user.id)
+        cls.posts[1].like(cls.users[2].id)
+        for i in range(4):
+            Comment.objects.create(post=cls.posts[i % 2], user=cls.users[i % 3], content=f'Comment {i}')
+            Task.objects.create(user=cls.users[i % 3], title=f'Task {i}', description='', is_completed=i % 2 == 0)
+
+    def assertSameOutput(self, reader, fields):
+        expected = reader.serializer_class(reader.plan(fields).order_by('id'), many=True, fields=fields).data
+        rows = reader.values(fields).order_by('id')
+        self.assertEqual(json.dumps(reader.serialize(rows, fields)), json.dumps(expected))
+
+    def test_readers_match_serializers(self):
+        for reader in (fastpath.users, fastpath.tasks, fastpath.posts, fastpath.comments,
+                       fastpath.tasks_including_archived, fastpath.comments_including_archived):
+            meta = reader.serializer_class.Meta
+            selections = [None, list(meta.summary_fields), list(meta.fields)] + [[name] for name in meta.fields]
+            for fields in selections:
+                with self.subTest(serializer=reader.serializer_class.__name__, fields=fields):
+                    self.assertSameOutput(reader, fields)
+
+    def test_endpoints_match_serializer_path(self):
+        urls = [
+            '/task_manager/users/', '/task_manager/tasks/?view=summary', '/task_manager/posts/?expand=summary',
+            '/task_manager/comments/?fields=user_name,id', f'/task_manager/posts/{self.posts[0].id}/comments/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                fast = self.client.get(url).content
+                cache.clear()
+                with self.settings(FAST_READ_PATH=False):
+                    self.assertEqual(self.client.get(url).content, fast)
+
+    def test_benchmark_reports_both_paths(self):
+        out = StringIO()
+        call_command('benchmark_serializers', rows=20, iterations=2, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['posts']), {'serializer_rows_per_sec', 'fastpath_rows_per_sec', 'speedup'})
+
+
+class ExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='frank', email='frank@example.com')
+        cls.post = Post.objects.create(author=cls.user, title='Exported', content='Body')
+        cls.post.like(cls.user.id)
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        cls.comments = [
+            Comment.objects.create(post=cls.post, user=cls.user, content=f'Comment {i}')
+            for i in range(5)
+        ]
+        for i, comment in enumerate(cls.comments):
+            Comment.objects.filter(pk=comment.pk).update(created_at=start + timedelta(days=i))
+
+    def stream(self, url):
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_streams_in_chunks_and_resumes(self):
+        with CaptureQueriesContext(connection) as queries:
+            lines = self.stream('/task_manager/comments/export/').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [c.id for c in self.comments])
+        self.assertEqual(len(queries), 3)  # One per chunk; the short last chunk ends the stream
+
+        lines = self.stream(f'/task_manager/comments/export/?after_id={self.comments[2].id}').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [c.id for c in self.comments[3:]])
+
+    def test_created_at_range_and_csv(self):
+        body = self.stream('/task_manager/comments/export/?format=csv&fields=content'
+                           '&created_after=2024-01-02&created_before=2024-01-04T00:00:00Z')
+        self.assertEqual(body.splitlines(), ['id,content', f'{self.comments[1].id},Comment 1',
+                                             f'{self.comments[2].id},Comment 2'])
+
+        body = self.stream('/task_manager/posts/export/?format=csv&fields=liked_by')
+        self.assertEqual(list(csv.reader(body.splitlines()))[1], [str(self.post.id), '["frank"]'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for url in ('/task_manager/posts/export/?format=xml', '/task_manager/posts/export/?after_id=-1',
+                    '/task_manager/posts/export/?created_after=yesterday',
+                    '/task_manager/tasks/export/?created_after=2024-01-01'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class JobQueueTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='gina', email='gina@example.com')
+        cls.post = Post.objects.create(author=cls.user, title='Kept', content='Body')
+        Comment.objects.create(post=cls.post, user=cls.user, content='Gone')
+        Task.objects.create(user=cls.user, title='Gone')
+
+    def run_worker(self):
+        call_command('run_jobs', '--once', '--executor', 'inline', stdout=StringIO())
+
+    def inline_pool(self):
+        pool = mock.Mock(submit=lambda fn, *args: fn(*args))
+        return mock.patch.object(jobs, '_local_pool', return_value=pool)
+
+    def test_verify_email_stays_inline(self):
+        response = self.client.put(f'/task_manager/users/{self.user.id}/verify/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['user']['is_verified'])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOB_RUNNER='worker')
+    def test_delete_user_is_idempotent(self):
+        first = self.client.delete(f'/task_manager/users/{self.user.id}/delete/')
+        second = self.client.delete(f'/task_manager/users/{self.user.id}/delete/')
+        self.assertEqual(first.data['job']['id'], second.data['job']['id'])
+
+        self.run_worker()
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertFalse(Comment.objects.exists() or Task.objects.exists())
+        self.assertIsNone(Post.objects.get(id=self.post.id).author_id)
+
+    def test_default_runner_starts_jobs_and_retries(self):
+        flaky = mock.Mock(side_effect=[RuntimeError('/srv/connectly/secret.py'), {'ok': True}])
+        with mock.patch.dict(jobs.HANDLERS, {'flaky': (flaky, 3)}), self.inline_pool(), \
+                mock.patch('task_manager.jobs.threading.Timer') as timer, self.assertLogs('task_manager.jobs', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = jobs.enqueue('flaky')
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', 1))
+            self.assertEqual(job.error, "RuntimeError('/srv/connectly/secret.py')")  # No traceback
+
+            delay, submit, args = timer.call_args.args
+            self.assertEqual(delay, settings.JOB_RETRY_DELAY)
+            Job.objects.filter(id=job.id).update(run_after=timezone.now())
+            submit(*args)  # The timer fires
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), ('succeeded', {'ok': True}))
+
+    def test_default_runner_restarts_deduplicated_jobs(self):
+        with self.captureOnCommitCallbacks(execute=False):  # Its thread is lost, e.g. in a restart
+            waiting = jobs.enqueue('reconcile_like_counts', idempotency_key='waiting')
+        stale = jobs.enqueue('reconcile_like_counts', idempotency_key='stale')
+        Job.objects.filter(id=stale.id).update(
+            status=Job.RUNNING, attempts=1, locked_at=timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT + 1),
+        )
+        with self.inline_pool(), self.captureOnCommitCallbacks(execute=True):
+            for key in ('waiting', 'stale'):
+                jobs.enqueue('reconcile_like_counts', idempotency_key=key)
+        for job in (waiting, stale):
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'succeeded')
+
+    @override_settings(JOB_RUNNER='worker')
+    def test_failed_attempts_are_retried_then_failed(self):
+        flaky = mock.Mock(side_effect=RuntimeError('boom'))
+        with mock.patch.dict(jobs.HANDLERS, {'flaky': (flaky, 2)}), self.assertLogs('task_manager.jobs', 'ERROR'):
+            job = jobs.enqueue('flaky', {'n': 1})
+            self.run_worker()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', 1))
+            self.assertGreater(job.run_after, timezone.now())  # Backing off
+
+            Job.objects.filter(id=job.id).update(run_after=timezone.now())
+            self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('boom', job.error)
+        flaky.assert_called_with(n=1)
+
+
+@override_settings(FEED_TIMELINE=True)
+class CascadeDeletionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(username=f'del{i}', email=f'del{i}@example.com') for i in range(3)]
+        cls.posts = [
+            Post.objects.create(author=cls.users[i % 2], title=f'Post {i}', content='Body', is_published=True)
+            for i in range(4)
+        ]
+        for post in cls.posts:
+            for user in cls.users:
+                post.like(user.id)
+            for i, user in enumerate(cls.users):
+                Comment.objects.create(post=post, user=user, content=f'Comment {i}')
+        for i in range(5):
+            Task.objects.create(user=cls.users[i % 2], title=f'Task {i}')
+
+    def setUp(self):
+        super().setUp()
+        timeline.rebuild()
+
+    def state(self):
+        state = {model._meta.label: list(model.objects.order_by('id').values())
+                 for model in (User, Post, Task, Comment, Post.liked_by.through)}
+        state['timeline'] = list(TimelineEntry.objects.order_by('post_id').values(*timeline.FEED_FIELDS, 'post_id'))
+        return state
+
+    def assertMatchesModelDelete(self, model, pk, delete):
+        with transaction.atomic():
+            expected_counts = model.objects.get(pk=pk).delete()
+            # Model.delete() leaves these stale; the batched path keeps them current
+            call_command('reconcile_like_counts', stdout=StringIO())
+            timeline.rebuild()
+            expected = self.state()
+            transaction.set_rollback(True)
+
+        steps = []
+        counts = delete(pk, batch_size=2, progress=lambda label, done: steps.append((label, done)))
+        self.assertEqual(self.state(), expected)
+        self.assertEqual(counts, expected_counts)
+        return steps
+
+    def test_delete_user_matches_model_delete(self):
+        steps = self.assertMatchesModelDelete(User, self.users[0].id, deletion.delete_user)
+        self.assertIn(('task_manager.Comment', 4), steps)  # Four comments, two per batch
+        self.assertIn(('task_manager.Post', 2), steps)  # Authored posts detached
+
+    def test_delete_post_matches_model_delete(self):
+        self.assertMatchesModelDelete(Post, self.posts[1].id, deletion.delete_post)
+
+    def test_delete_post_endpoint(self):
+        response = self.client.delete(f'/task_manager/posts/{self.posts[2].id}/delete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Comment.objects.filter(post_id=self.posts[2].id).exists())
+        self.assertFalse(TimelineEntry.objects.filter(post_id=self.posts[2].id).exists())
+
+
+class SearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='hana', email='hana@example.com')
+        cls.titled = Post.objects.create(author=cls.user, title='Sourdough basics', content='Flour and water.')
+        cls.mentioned = Post.objects.create(author=cls.user, title='Weekend', content='Baked sourdough again.')
+        cls.comment = Comment.objects.create(post=cls.mentioned, user=cls.user, content='Share the sourdough recipe?')
+
+    def search(self, query, **params):
+        response = self.client.get('/task_manager/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_results_are_ranked_with_snippets(self):
+        results = self.search('sourdough')
+        self.assertEqual(results[0]['id'], self.titled.id)  # Title matches rank first
+        self.assertEqual({(r['type'], r['id']) for r in results},
+                         {('post', self.titled.id), ('post', self.mentioned.id), ('comment', self.comment.id)})
+        self.assertIn('<mark>sourdough</mark>', results[2]['snippet'].lower())
+        self.assertEqual([r['id'] for r in self.search('sourdough rec', type='comment')], [self.comment.id])
+
+    def test_index_follows_writes(self):
+        self.client.put(f'/task_manager/posts/{self.titled.id}/update/', {'content': 'Rye starter.'}, format='json')
+        self.client.post('/task_manager/comments/bulk/create/',
+                         [{'post': self.titled.id, 'user': self.user.id, 'content': 'Rye is great'}], format='json')
+        self.assertEqual(len(self.search('rye')), 2)
+
+        deletion.delete_user(self.user.id)
+        self.assertEqual(self.search('sourdough', type='comment'), [])
+        self.assertEqual(len(self.search('sourdough', type='post')), 2)  # Posts are kept, without an author
+
+    def test_snippets_are_escaped(self):
+        Post.objects.create(author=self.user, title='Crumb', content='<script>alert(1)</script> sourdough & rye')
+        snippet = self.search('alert')[0]['snippet']
+        self.assertNotIn('<script>', snippet)
+        self.assertEqual(snippet, '&lt;script&gt;<mark>alert</mark>(1)&lt;/script&gt; sourdough &amp; rye')
+
+    def test_other_backends_are_unsupported(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertEqual(self.client.get('/task_manager/search/?q=sourdough').status_code, 501)
+            with self.assertRaises(NotSupportedError):
+                search.search('sourdough')
+
+    def test_rebuild_and_validation(self):
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        cache.clear()
+        self.assertEqual(len(self.search('sourdough')), 3)
+        self.assertEqual(self.client.get('/task_manager/search/?q=%20').status_code, 400)
+        self.assertEqual(self.client.get('/task_manager/search/?q=x&type=user').status_code, 400)
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+    'like_user': '2/min', 'like_ip': '100/min', 'comment_user': '100/min', 'comment_ip': '1/min',
+}})
+class ThrottlingTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(username=f'rate{i}', email=f'rate{i}@example.com') for i in range(2)]
+        cls.post = Post.objects.create(author=cls.users[0], title='Busy', content='Body')
+
+    def like(self, user, **extra):
+        return self.client.put(f'/task_manager/posts/{self.post.id}/like/', {'user_id': user.id}, format='json', **extra)
+
+    def test_user_bucket_allows_a_burst_then_refills(self):
+        self.assertEqual(self.like(self.users[0])['RateLimit-Remaining'], '1')
+        self.assertEqual(self.like(self.users[0])['RateLimit-Remaining'], '0')
+        response = self.like(self.users[0])
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 30)  # One token every 30 s
+        self.assertEqual(response['RateLimit-Limit'], '2')
+        self.assertEqual(response['RateLimit-Remaining'], '0')
+        self.assertTrue(1 <= int(response['RateLimit-Reset']) <= 60)
+        self.assertEqual(self.like(self.users[1]).status_code, 200)  # Other users have their own bucket
+
+        later = time.time() + 30
+        with mock.patch('task_manager.throttling.time.time', return_value=later):
+            self.assertEqual(self.like(self.users[0]).status_code, 200)
+            self.assertEqual(self.like(self.users[0]).status_code, 429)
+
+    def test_ip_bucket(self):
+        def comment(user, ip):
+            return self.client.post('/task_manager/comments/create/',
+                                    {'post': self.post.id, 'user': user.id, 'content': 'Hi'},
+                                    format='json', REMOTE_ADDR=ip)
+        self.assertEqual(comment(self.users[0], '10.0.0.1').status_code, 201)
+        self.assertEqual(comment(self.users[1], '10.0.0.1').status_code, 429)
+        self.assertEqual(comment(self.users[1], '10.0.0.2').status_code, 201)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    async def test_async_views_share_the_buckets(self):
+        await sync_to_async(self.like)(self.users[0])
+        await sync_to_async(self.like)(self.users[0])
+        request = AsyncRequestFactory().put(
+            f'/task_manager/posts/{self.post.id}/like/', {'user_id': self.users[0].id}, content_type='application/json'
+        )
+        response = await async_views.like_post(request, post_id=self.post.id)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+@override_settings(LIKE_WRITE_BEHIND=True, LIKE_FLUSH_INTERVAL=None, FEED_TIMELINE=True)
+class LikeBufferTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(username=f'fan{i}', email=f'fan{i}@example.com') for i in range(3)]
+        cls.post = Post.objects.create(author=cls.users[0], title='Viral', content='Body', is_published=True)
+        cls.post.like(cls.users[2].id)
+
+    def setUp(self):
+        super().setUp()
+        timeline.rebuild()
+
+    def put(self, action, user):
+        return self.client.put(f'/task_manager/posts/{self.post.id}/{action}/', {'user_id': user.id}, format='json')
+
+    def test_acting_user_reads_their_buffered_writes(self):
+        response = self.put('like', self.users[0])
+        self.assertEqual((response.data['like_count'], response.data['liked_by']), (2, ['fan0', 'fan2']))
+        self.assertEqual(self.put('like', self.users[0]).data['like_count'], 2)  # Repeats are no-ops
+        self.assertEqual(self.put('unlike', self.users[2]).data['liked_by'], [])  # Only your own writes
+        self.assertEqual(self.put('unlike', self.users[2]).status_code, 400)
+        self.assertEqual(self.put('like', self.users[1]).data['like_count'], 2)  # fan0 is not flushed yet
+
+        self.assertEqual(list(self.post.liked_by.values_list('username', flat=True)), ['fan2'])
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 1)
+
+    def test_flush_applies_the_last_state_of_each_pair(self):
+        for action in ('like', 'unlike', 'like'):
+            self.put(action, self.users[0])
+        self.put('like', self.users[1])
+        self.put('unlike', self.users[2])
+
+        with self.assertNumQueries(11):  # 3 reads, 1 insert, 1 delete, 2 counter updates, author stats, savepoint
+            self.assertEqual(likebuffer.flush(), 3)
+        self.assertEqual(likebuffer.flush(), 0)
+        self.assertEqual(sorted(self.post.liked_by.values_list('username', flat=True)), ['fan0', 'fan1'])
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 2)
+        self.assertEqual(TimelineEntry.objects.get(post_id=self.post.id).like_count, 2)
+        self.assertEqual(self.put('like', self.users[0]).data['like_count'], 2)  # Flushed state is read back
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_every_route_has_a_scenario(self):
+        from connectly_project.urls import urlpatterns as project_patterns
+        from .urls import urlpatterns
+        routes = {getattr(pattern, 'name', None) for pattern in urlpatterns + project_patterns}
+        self.assertEqual(routes - {None, 'home'} - set(scenarios.SCENARIOS), set())
+
+    def test_reports_and_regressions(self):
+        call_command('generate_data', users=5, posts=5, comments=5, tasks=5, likes=5, stdout=StringIO())
+        out = StringIO()
+        call_command('benchmark_api', scenario=['get_posts', 'create_task', 'delete_post'], iterations=3, stdout=out)
+        results = json.loads(out.getvalue())['scenarios']
+        self.assertEqual(results['create_task']['statuses'], {'201': 3})
+        self.assertEqual(results['get_posts']['queries']['max'], 2)
+        self.assertEqual(set(results['delete_post']['latency_ms']), {'p50', 'p95', 'p99', 'max'})
+
+        baseline = json.loads(json.dumps(results))
+        baseline['get_posts']['queries']['max'] = 1
+        baseline['create_task']['errors'] = 0
+        self.assertEqual(benchmarks.regressions(results, baseline), ['get_posts: queries 1 -> 2'])
+
+
+class ConditionalUpdateTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='editor', email='editor@example.com')
+        cls.post = Post.objects.create(author=cls.user, title='Draft', content='Body')
+        cls.task = Task.objects.create(user=cls.user, title='Write')
+
+    def update(self, kind, pk, data, **headers):
+        return self.client.put(f'/task_manager/{kind}/{pk}/update/', data, format='json', **headers)
+
+    def test_if_match(self):
+        response = self.update('posts', self.post.id, {'title': 'Final'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual((response.status_code, response['ETag'], response.data['data']['version']), (200, '"2"', 2))
+
+        response = self.update('posts', self.post.id, {'title': 'Lost'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual((response.status_code, response['ETag']), (412, '"2"'))
+        self.assertEqual(Post.objects.get(id=self.post.id).title, 'Final')
+        self.assertEqual(self.update('tasks', self.task.id, {'title': 'Any'}, HTTP_IF_MATCH='*').status_code, 200)
+
+    def test_no_op_update_skips_the_write(self):
+        with self.assertNumQueries(3):  # Load, likers and author validation; no UPDATE
+            response = self.update('posts', self.post.id, {'title': 'Draft', 'author': self.user.id})
+        self.assertEqual(response['ETag'], '"1"')
+        with self.assertNumQueries(2):  # Load and user_id validation
+            self.update('tasks', self.task.id, {'title': 'Write', 'user_id': self.user.id})
+        self.assertEqual(Task.objects.get(id=self.task.id).version, 1)
+
+    def test_write_between_read_and_update(self):
+        def racing_update(**headers):
+            task = Task.objects.get(id=self.task.id)
+            Task.objects.filter(id=task.id).update(description='Other editor', version=F('version') + 1)
+            request = RequestFactory().put('/', **headers)
+            return task, conditional.update(request, task, {'is_completed': True})
+
+        task, failed = racing_update(HTTP_IF_MATCH='"1"')
+        self.assertEqual((failed.status_code, task.version), (412, 2))
+        task, failed = racing_update()  # Without If-Match it retries on the new version
+        self.assertIsNone(failed)
+        self.assertEqual((task.version, task.description, task.is_completed), (4, 'Other editor', True))
+
+    def test_bulk_update_bumps_versions(self):
+        self.client.put('/task_manager/tasks/bulk/update/', [{'id': self.task.id, 'is_completed': True}], format='json')
+        self.assertEqual(self.update('tasks', self.task.id, {'title': 'x'}, HTTP_IF_MATCH='"1"').status_code, 412)
+
+
+class SignupTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='ivan', email='ivan@example.com')
+
+    def setUp(self):
+        super().setUp()
+        bloom.reset()
+
+    def test_create_user_relies_on_the_constraints(self):
+        with self.assertNumQueries(3):  # Savepoint, INSERT, release
+            response = self.client.post('/task_manager/users/create/',
+                                        {'username': 'jane', 'email': 'jane@example.com'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post('/task_manager/users/create/',
+                                    {'username': 'ivan', 'email': 'other@example.com'}, format='json')
+        self.assertEqual((response.status_code, response.data), (400, {'username': ["This username is already taken."]}))
+        response = self.client.post('/task_manager/users/create/',
+                                    {'username': 'x' * 51, 'email': 'ivan@example.com'}, format='json')
+        self.assertEqual(set(response.data), {'username'})  # Too long, caught before the INSERT
+
+    def test_concurrent_signup_is_a_400(self):
+        def signup_in_between(serializer, attrs):
+            User.objects.create(username='kim', email='kim@example.com')
+            return attrs
+        with mock.patch.object(UserSerializer, 'validate', signup_in_between):
+            response = self.client.post('/task_manager/users/create/',
+                                        {'username': 'kim', 'email': 'kim2@example.com'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('username', response.data)
+
+    def availability(self, **params):
+        return self.client.get('/task_manager/users/availability/', params).data
+
+    @override_settings(USER_BLOOM_FILTER=True)
+    def test_availability_with_bloom_filter(self):
+        self.availability(username='warmup')  # Builds the filters
+        with self.assertNumQueries(0):
+            self.assertEqual(self.availability(username='newcomer'), {'username': {'available': True}})
+        with self.assertNumQueries(1):  # Maybe taken: the database decides
+            self.assertEqual(self.availability(email='ivan@example.com'), {'email': {'available': False}})
+
+        self.client.post('/task_manager/users/create/', {'username': 'newcomer', 'email': 'n@example.com'}, format='json')
+        self.assertEqual(self.availability(username='newcomer')['username']['available'], False)
+        self.assertIn('errors', self.availability(email='not-an-email')['email'])
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        values = [f'user{i}@example.com' for i in range(2000)]
+        seen = bloom.BloomFilter(capacity=2000, error_rate=0.01)
+        for value in values:
+            seen.add(value)
+        self.assertTrue(all(value in seen for value in values))
+        false_positives = sum(f'other{i}@example.com' in seen for i in range(10_000))
+        self.assertLess(false_positives, 300)
+
+
+class RendererTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='judy', email='judy@example.com')
+        Post.objects.create(author=cls.user, title='Ünïcode \u2028 line', content='<b>&</b> 🚀')
+
+    def test_orjson_renders_the_same_bytes_as_drf(self):
+        response = self.client.get('/task_manager/posts/')
+        data = {**response.data, 'errors': {0: ['bad']}}  # Integer keys, as in bulk errors
+        self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b'\\u2028', response.content)
+        self.assertEqual(json.loads(response.content), json.loads(JSONRenderer().render(response.data)))
+
+    def test_orjson_parser(self):
+        response = self.client.post('/task_manager/posts/create/', b'{"title": "T", "content": "C", "author": %d}'
+                                    % self.user.id, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post('/task_manager/posts/create/', b'{"title": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    @skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        json_response = self.client.get('/task_manager/posts/')
+        response = self.client.get('/task_manager/posts/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(response.content), json.loads(json_response.content))
+        self.assertNotEqual(response['ETag'], json_response['ETag'])  # One cache entry per representation
+
+        body = renderers.msgpack.packb({'title': 'Packed', 'content': 'C', 'author': self.user.id})
+        response = self.client.post('/task_manager/posts/create/', body, content_type='application/msgpack')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['title'], 'Packed')
+
+
+class ArchiveTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='kate', email='kate@example.com')
+        cls.post = Post.objects.create(author=cls.user, title='Post', content='Body', is_published=True)
+        cls.comments = [Comment.objects.create(post=cls.post, user=cls.user, content=f'Comment {i}') for i in range(5)]
+        old = timezone.now() - timedelta(days=settings.ARCHIVE_COMMENTS_AFTER_DAYS + 1)
+        for i, comment in enumerate(cls.comments[:3]):
+            Comment.objects.filter(id=comment.id).update(created_at=old + timedelta(minutes=i))
+        cls.tasks = [Task.objects.create(user=cls.user, title=f'Task {i}', is_completed=i % 2 == 0) for i in range(4)]
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        rows = data['results'] if isinstance(data, dict) else data
+        return [row['id'] for row in rows]
+
+    def test_batches_can_resume(self):
+        self.assertEqual(archive.archive_comments(batch_size=2, max_batches=1), 2)
+        self.assertEqual(archive.archive_comments(batch_size=2), 1)  # The next run carries on
+        self.assertEqual(archive.archive_comments(batch_size=2), 0)
+        old_ids = [comment.id for comment in self.comments[:3]]
+        self.assertEqual(sorted(ArchivedComment.objects.values_list('id', flat=True)), old_ids)
+        self.assertFalse(Comment.objects.filter(id__in=old_ids).exists())
+        self.assertEqual(ArchivedComment.objects.get(id=old_ids[0]).content, 'Comment 0')
+        self.assertFalse(SearchDocument.objects.filter(kind=SearchDocument.COMMENT, object_id__in=old_ids).exists())
+
+        self.assertEqual(archive.archive_tasks(), 2)
+        self.assertEqual(sorted(ArchivedTask.objects.values_list('id', flat=True)), [self.tasks[0].id, self.tasks[2].id])
+        self.assertFalse(Task.objects.filter(is_completed=True).exists())
+
+    def test_include_archived(self):
+        comments_url, post_comments_url = '/task_manager/comments/', f'/task_manager/posts/{self.post.id}/comments/'
+        everything = self.ids(comments_url)
+        in_post = self.ids(post_comments_url)
+        call_command('archive', stdout=StringIO())
+
+        # The cached responses were retired by the move
+        self.assertEqual(self.ids(comments_url), [comment.id for comment in reversed(self.comments[3:])])
+        self.assertEqual(self.ids(post_comments_url), [comment.id for comment in self.comments[3:]])
+        self.assertEqual(self.ids(comments_url + '?include_archived=1'), everything)
+        self.assertEqual(self.ids(post_comments_url + '?include_archived=1'), in_post)
+        self.assertEqual(self.ids('/task_manager/tasks/'), [self.tasks[1].id, self.tasks[3].id])
+        self.assertEqual(self.ids('/task_manager/tasks/?include_archived=1'), [task.id for task in self.tasks])
+
+        response = self.client.put(f'/task_manager/tasks/{self.tasks[0].id}/update/', {'title': 'Edit'}, format='json')
+        self.assertEqual(response.status_code, 404)  # Archived rows are read-only
+
+    def test_deleting_the_user_removes_archived_rows(self):
+        archive.archive_comments()
+        archive.archive_tasks()
+        deletion.delete_user(self.user.id)
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertFalse(ArchivedTask.objects.exists())
+
+
+class UserStatsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(username=f'stat{i}', email=f'stat{i}@example.com') for i in range(3)]
+        cls.post = Post.objects.create(author=cls.users[0], title='Post', content='Body')
+        Comment.objects.create(post=cls.post, user=cls.users[1], content='First')
+        cls.task = Task.objects.create(user=cls.users[0], title='Task')
+
+    def setUp(self):
+        super().setUp()
+        stats.store(stats.compute())
+
+    def assertInSync(self):
+        stored = {row.pop('user'): row for row in UserStats.objects.values('user', *stats.FIELDS)}
+        self.assertEqual(stored, stats.compute())
+
+    def test_endpoint_is_one_lookup(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/task_manager/users/{self.users[0].id}/stats/')
+        self.assertEqual(response.data, {
+            'user_id': self.users[0].id, 'posts': 1, 'likes_received': 0, 'comments': 0,
+            'open_tasks': 1, 'completed_tasks': 0,
+        })
+        self.assertEqual(self.client.get('/task_manager/users/9999/stats/').status_code, 404)
+
+        UserStats.objects.all().delete()  # Not materialized yet: computed on first read
+        self.assertEqual(self.client.get(f'/task_manager/users/{self.users[1].id}/stats/').data['comments'], 1)
+        self.assertTrue(UserStats.objects.filter(user=self.users[1]).exists())
+
+    def test_liked_by_manager_keeps_counters(self):
+        a, b, c = self.users
+        self.post.liked_by.add(a, b)
+        self.post.liked_by.add(a)  # Already liked
+        self.assertEqual((Post.objects.get(id=self.post.id).like_count, stats.get(a.id)['likes_received']), (2, 2))
+        self.post.liked_by.remove(b, c)  # c never liked it
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 1)
+        c.liked_posts.add(self.post)
+        a.liked_posts.clear()
+        self.assertEqual(Post.objects.get(id=self.post.id).like_count, 1)
+        self.assertInSync()
+
+    def test_reconcile_recounts_likes_received(self):
+        self.post.liked_by.add(*self.users)
+        UserStats.objects.filter(user=self.users[0]).update(likes_received=9)
+        out = StringIO()
+        call_command('reconcile_like_counts', dry_run=True, stdout=out)
+        self.assertIn(f"User {self.users[0].id}: likes_received=9, actual=3", out.getvalue())
+        call_command('reconcile_like_counts', stdout=StringIO())
+        self.assertInSync()
+
+    def test_writes_keep_rows_in_sync(self):
+        a, b, c = self.users
+        self.client.put(f'/task_manager/posts/{self.post.id}/like/', {'user_id': b.id}, format='json')
+        self.client.put(f'/task_manager/posts/{self.post.id}/like/', {'user_id': c.id}, format='json')
+        self.client.put(f'/task_manager/posts/{self.post.id}/unlike/', {'user_id': c.id}, format='json')
+        self.client.put(f'/task_manager/tasks/{self.task.id}/update/', {'is_completed': True}, format='json')
+        self.client.put(f'/task_manager/posts/{self.post.id}/update/', {'author': b.id}, format='json')
+        self.assertInSync()
+        self.assertEqual(stats.get(b.id)['likes_received'], 1)  # Moved with the post
+
+        self.client.post('/task_manager/comments/bulk/create/', [
+            {'post': self.post.id, 'user': user.id, 'content': 'Hi'} for user in (a, b, c)
+        ], format='json')
+        comment = Comment.objects.filter(user=c).first()
+        self.client.put('/task_manager/comments/bulk/update/', [{'id': comment.id, 'user': a.id}], format='json')
+        self.client.post('/task_manager/tasks/create/', {'title': 'New', 'user_id': c.id}, format='json')
+        self.client.delete(f'/task_manager/tasks/{self.task.id}/delete/')
+        self.assertInSync()
+
+        Comment.objects.update(created_at=timezone.now() - timedelta(days=settings.ARCHIVE_COMMENTS_AFTER_DAYS + 1))
+        archive.archive_comments()
+        self.assertInSync()  # Archived rows still count
+        deletion.delete_post(self.post.id)
+        deletion.delete_user(c.id)
+        self.assertInSync()
+
+    def test_cascades_remove_archived_rows(self):
+        a, b, _ = self.users
+        Comment.objects.update(created_at=timezone.now() - timedelta(days=settings.ARCHIVE_COMMENTS_AFTER_DAYS + 1))
+        archive.archive_comments()
+        Task.objects.create(user=b, title='Done', is_completed=True)
+        archive.archive_tasks()
+        self.assertEqual(stats.get(b.id)['comments'], 1)
+
+        response = self.client.delete('/task_manager/posts/bulk/delete/', {'ids': [self.post.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stats.get(b.id), stats.compute([b.id])[b.id])
+        self.assertEqual(stats.get(b.id)['comments'], 0)
+        User.objects.filter(id=b.id).delete()
+        self.assertInSync()
+
+    @override_settings(LIKE_WRITE_BEHIND=True, LIKE_FLUSH_INTERVAL=None)
+    def test_flushed_likes(self):
+        for user in self.users[1:]:
+            self.client.put(f'/task_manager/posts/{self.post.id}/like/', {'user_id': user.id}, format='json')
+        likebuffer.flush()
+        self.assertInSync()
+        self.assertEqual(stats.get(self.users[0].id)['likes_received'], 2)
+
+    def test_recompute_repairs_drift(self):
+        UserStats.objects.filter(user=self.users[0]).update(posts=7)
+        out = StringIO()
+        call_command('recompute_user_stats', dry_run=True, stdout=out)
+        self.assertIn(f"User {self.users[0].id}: posts=7 (actual 1)", out.getvalue())
+        self.assertEqual(UserStats.objects.get(user=self.users[0]).posts, 7)
+        call_command('recompute_user_stats', stdout=StringIO())
+        self.assertInSync()
+
+
+class StartupProfileTests(TestCase):
+    def test_api_only_workers(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as scratch, mock.patch.dict(os.environ, DB_NAME=os.path.join(scratch, 'db.sqlite3')):
+            call_command('benchmark_startup', runs=1, path='/', servers=['asgi'], stdout=out)
+        report = json.loads(out.getvalue())
+        full, api_only = report['full']['asgi'], report['api_only']['asgi']
+        self.assertEqual((full['status'], api_only['status']), (200, 200))
+        self.assertLess(api_only['modules'], full['modules'])
 
-# Create your tests here.
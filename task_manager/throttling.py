@@ -0,0 +1,177 @@
+import math
+import time
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import exception_handler as drf_exception_handler
+
+# Token-bucket throttling
+# Write endpoints are throttled per acting user and per client IP. Each bucket
+# holds `N` tokens and refills at N per period, for rates written the DRF way
+# in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] as '<scope>_user' and
+# '<scope>_ip' (e.g. 'like_user': '30/min'). A missing or None rate turns that
+# bucket off.
+#
+# A bucket is a single cache counter holding the time its tokens will all be
+# back (the GCRA "theoretical arrival time"), in microseconds. Taking a token
+# is one atomic cache.incr by the refill interval; only a bucket that had
+# filled up again is reset with a set, and a refused request gives its token
+# back with a decr. Nothing is written to the database. Keys expire after
+# max(60 s, 10 periods), after which an overloaded client can burst once more.
+#
+# Users are identified by the authenticated user, or else the user id the
+# request acts for (`user_id`/`user` in the body), as the endpoints have no
+# authentication of their own.
+
+KEY_PREFIX = 'throttle:'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class Decision:
+    def __init__(self, allowed, limit, remaining, reset, wait=None):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset  # Seconds until the bucket is full again
+        self.wait = wait  # Seconds until a refused request would be let through
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def consume(key, rate):
+    """Take a token from the bucket at `key`; returns the Decision."""
+    count, period = parse_rate(rate)
+    interval = period * 1_000_000 // count
+    capacity = interval * count
+    now = int(time.time() * 1_000_000)
+    cache = caches[settings.THROTTLE_CACHE]
+
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:  # First request, or the key expired
+        full_at = None
+    if full_at is None or full_at - interval < now:  # The bucket was full
+        full_at = now + interval
+        cache.set(key, full_at, max(60, 10 * period))
+    elif full_at - now > capacity:
+        cache.decr(key, interval)
+        return Decision(False, count, 0, (full_at - interval - now) / 1e6, (full_at - now - capacity) / 1e6)
+    return Decision(True, count, (capacity - (full_at - now)) // interval, (full_at - now) / 1e6)
+
+
+def _rate(scope, bucket):
+    return api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_{bucket}')
+
+
+def _user_ident(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return str(user.pk)
+    data = getattr(request, 'data', None)
+    if isinstance(data, dict):
+        user_id = str(data.get('user_id', data.get('user', '')))
+        if user_id.isdigit():
+            return user_id
+    return None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle over one token bucket per `view.throttle_scope` and identity."""
+    bucket = None
+
+    def get_bucket_ident(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = _rate(scope, self.bucket) if scope else None
+        ident = self.get_bucket_ident(request) if rate else None
+        if ident is None:
+            return True
+        self.decision = consume(f'{KEY_PREFIX}{scope}:{self.bucket}:{ident}', rate)
+        request.throttle_decisions = getattr(request, 'throttle_decisions', []) + [self.decision]
+        return self.decision.allowed
+
+    def wait(self):
+        return self.decision.wait
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    bucket = 'user'
+
+    def get_bucket_ident(self, request):
+        return _user_ident(request)
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    bucket = 'ip'
+
+    def get_bucket_ident(self, request):
+        return self.get_ident(request)
+
+
+THROTTLE_CLASSES = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+
+
+def add_headers(response, decisions):
+    """Report the tightest of `decisions` in RateLimit-* headers."""
+    if decisions:
+        tightest = min(decisions, key=lambda decision: decision.remaining)
+        response['RateLimit-Limit'] = str(tightest.limit)
+        response['RateLimit-Remaining'] = str(tightest.remaining)
+        response['RateLimit-Reset'] = str(math.ceil(tightest.reset))
+    return response
+
+
+def rate_limited(scope):
+    """Throttle a DRF function view (decorate below @api_view) with the `scope` buckets."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return add_headers(view(request, *args, **kwargs), getattr(request, 'throttle_decisions', ()))
+        wrapper.throttle_classes = THROTTLE_CLASSES
+        wrapper.throttle_scope = scope
+        return wrapper
+    return decorator
+
+
+def exception_handler(exc, context):
+    """DRF's handler, plus the RateLimit-* headers on the 429s of the throttles above."""
+    response = drf_exception_handler(exc, context)
+    if response is not None and isinstance(exc, Throttled):
+        add_headers(response, getattr(context['request'], 'throttle_decisions', ()))
+    return response
+
+
+# Plain Django views (async_views.py)
+
+class _ScopedView:
+    def __init__(self, scope):
+        self.throttle_scope = scope
+
+
+def check(request, scope):
+    """Run the `scope` throttles on a DRF Request; returns (429 response or None, decisions)."""
+    view = _ScopedView(scope)
+    waits = [throttle.wait() for throttle in (cls() for cls in THROTTLE_CLASSES)
+             if not throttle.allow_request(request, view)]
+    decisions = getattr(request, 'throttle_decisions', [])
+    if not waits:
+        return None, decisions
+    wait = math.ceil(max(waits))
+    response = JsonResponse({"detail": f"Request was throttled. Expected available in {wait} seconds."}, status=429)
+    response['Retry-After'] = str(wait)
+    return add_headers(response, decisions), decisions
+
+
+acheck = sync_to_async(check)
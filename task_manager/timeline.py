@@ -0,0 +1,44 @@
+from django.db import transaction
+from .models import TimelineEntry
+from .serializers import FeedPostSerializer
+from . import queries
+
+# Materialized timeline
+# With FEED_TIMELINE on, every published post has a TimelineEntry holding its
+# feed item precomputed, so feed reads never touch posts or comments. Entries
+# are refreshed from signals when a post, its comments or its likes change.
+# Username changes only reach `author_name` directly; commenter names inside
+# `comments` catch up on the post's next comment or with rebuild_timeline.
+
+FEED_FIELDS = ['title', 'summary', 'author_name', 'created_at', 'like_count', 'comment_count', 'comments']
+
+def _entry_values(post):
+    data = FeedPostSerializer(post).data
+    values = {field: data[field] for field in FEED_FIELDS}
+    values['created_at'] = post.created_at
+    return values
+
+def refresh(post_id):
+    """Recompute one post's entry, dropping it if the post is gone or unpublished."""
+    post = queries.feed_posts().filter(id=post_id).first()
+    if post is None:
+        TimelineEntry.objects.filter(post_id=post_id).delete()
+        return
+    TimelineEntry.objects.update_or_create(post_id=post.id, defaults=_entry_values(post))
+
+def rebuild(batch_size=1000):
+    """Regenerate every entry from the source tables; returns the number written."""
+    written = 0
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        last_id = 0
+        while True:
+            posts = list(queries.feed_posts().filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not posts:
+                break
+            TimelineEntry.objects.bulk_create(
+                TimelineEntry(post_id=post.id, **_entry_values(post)) for post in posts
+            )
+            written += len(posts)
+            last_id = posts[-1].id
+    return written
@@ -1,30 +1,60 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# ASGI deployments can serve the read and like/unlike routes with async views
+if settings.ASYNC_VIEWS:
+    from . import async_views as read_views
+else:
+    read_views = views
+
 urlpatterns = [
     #User URLS
-    path('users/', views.get_users, name='get_users'),
+    path('users/', read_views.get_users, name='get_users'),
     path('users/create/', views.create_user, name='create_user'),
+    path('users/availability/', views.check_availability, name='check_availability'),
+    path('users/<int:user_id>/stats/', views.get_user_stats, name='get_user_stats'),
     path('users/<int:user_id>/verify/', views.verify_email, name='verify_email'),
     path('users/<int:user_id>/delete/', views.delete_user, name='delete_user'),
 
     #Tasks URLS
-    path('tasks/', views.get_tasks, name='get_tasks'),
+    path('tasks/', read_views.get_tasks, name='get_tasks'),
     path('tasks/create/', views.create_task, name='create_task'),
     path('tasks/<int:task_id>/update/', views.update_task, name='update_task'),
     path('tasks/<int:task_id>/delete/', views.delete_task, name='delete_task'),
+    path('tasks/bulk/create/', views.bulk_create_tasks, name='bulk_create_tasks'),
+    path('tasks/bulk/update/', views.bulk_update_tasks, name='bulk_update_tasks'),
+    path('tasks/bulk/delete/', views.bulk_delete_tasks, name='bulk_delete_tasks'),
+    path('tasks/export/', views.export_tasks, name='export_tasks'),
 
     #Post URLS
-    path('posts/', views.get_posts, name='get_posts'),  
+    path('posts/', read_views.get_posts, name='get_posts'),  
     path('posts/create/', views.create_post, name='create_post'),  
     path('posts/<int:post_id>/update/', views.update_post, name='update_post'),  
     path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),  
-    path('posts/<int:post_id>/like/', views.like_post, name='like_post'),  
-    path('posts/<int:post_id>/unlike/', views.unlike_post, name='unlike_post'),  
-    path('posts/<int:post_id>/comments/', views.get_post_comments, name='get_post_comments'),  
+    path('posts/<int:post_id>/like/', read_views.like_post, name='like_post'),  
+    path('posts/<int:post_id>/unlike/', read_views.unlike_post, name='unlike_post'),  
+    path('posts/<int:post_id>/comments/', read_views.get_post_comments, name='get_post_comments'),  
+    path('posts/bulk/create/', views.bulk_create_posts, name='bulk_create_posts'),
+    path('posts/bulk/update/', views.bulk_update_posts, name='bulk_update_posts'),
+    path('posts/bulk/delete/', views.bulk_delete_posts, name='bulk_delete_posts'),
+    path('posts/export/', views.export_posts, name='export_posts'),
+
+    #Search
+    path('search/', views.search, name='search'),
+
+    #Jobs
+    path('jobs/<int:job_id>/', views.get_job, name='get_job'),
+
+    #Feed
+    path('feed/', views.get_feed, name='get_feed'),
 
     #Comments
     path('comments/create/', views.create_comment, name='create_comment'), 
-    path('comments/', views.get_comments, name='get_comments'),  
+    path('comments/', read_views.get_comments, name='get_comments'),  
     path('comments/<int:comment_id>/delete/', views.delete_comment, name='delete_comment'),  
+    path('comments/bulk/create/', views.bulk_create_comments, name='bulk_create_comments'),
+    path('comments/bulk/update/', views.bulk_update_comments, name='bulk_update_comments'),
+    path('comments/bulk/delete/', views.bulk_delete_comments, name='bulk_delete_comments'),
+    path('comments/export/', views.export_comments, name='export_comments'),
 ]
@@ -1,29 +1,94 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.urls import reverse
+from django.views.decorators.http import require_GET
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from .models import User, Task, Post, Comment
+from .models import User, Task, Post, Comment, Job
 from .serializers import UserSerializer, TaskSerializer, PostSerializer, CommentSerializer
+from .serializers import FeedPostSerializer, TimelineEntrySerializer, JobSerializer
+from .pagination import CreatedAtCursorPagination, id_pagination
+from . import archive, bloom, conditional, fastpath, queries, stats
+from .throttling import rate_limited
+from .cache import cached_response
+from .signals import invalidate, snapshot
+from .metrics import REGISTRY
+from .sparse import requested_fields
+from .search import MAX_LIMIT as SEARCH_MAX_LIMIT, available as search_available, search as full_text_search
+
+# deletion, exports, jobs and likebuffer are imported by the few views that
+# use them, keeping them out of a worker's startup and first response.
+
+LIKERS_PREVIEW_SIZE = 10
+LIKERS_MAX_PREVIEW_SIZE = 100
+
+def _list_page(request, paginator, reader):
+    """One page of a list endpoint, read through the fast path while it is on."""
+    fields = requested_fields(request, reader.serializer_class)
+    if settings.FAST_READ_PATH:
+        page = paginator.paginate_queryset(reader.values(fields), request)
+        return paginator.get_paginated_response(reader.serialize(page, fields))
+    page = paginator.paginate_queryset(reader.plan(fields), request)
+    serializer = reader.serializer_class(page, many=True, fields=fields)
+    return paginator.get_paginated_response(serializer.data)
 
 # Users
 @api_view(['GET'])
+@cached_response('user')
 def get_users(request):
-    """Retrieve all users with pagination."""
-    paginator = PageNumberPagination()
-    paginator.page_size = 10  
-    users = User.objects.all()
-    paginated_users = paginator.paginate_queryset(users, request)
-    serializer = UserSerializer(paginated_users, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    """Retrieve all users, paginated; by cursor with ?pagination=cursor."""
+    return _list_page(request, id_pagination(request), fastpath.users)
+
+TAKEN = {
+    'username': "This username is already taken.",
+    'email': "user with this email already exists.",
+}
 
 @api_view(['POST'])
 def create_user(request):
     """Create a new user."""
     serializer = UserSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save()
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            # The unique constraints caught a taken username or email, maybe a concurrent signup's
+            data = serializer.validated_data
+            errors = {field: [message] for field, message in TAKEN.items()
+                      if User.objects.filter(**{field: data[field]}).exists()}
+            return Response(errors or {"non_field_errors": ["Could not create the user."]}, status=400)
         return Response(serializer.data, status=201)
     return Response(serializer.errors, status=400)
 
+@api_view(['GET'])
+@rate_limited('availability')
+def check_availability(request):
+    """Tell a signup form whether a username and/or email (?username=&email=) is still free."""
+    values = {field: request.query_params[field] for field in bloom.FIELDS if field in request.query_params}
+    if not values:
+        return Response({"error": "A username or email is required."}, status=400)
+    fields = UserSerializer().fields
+    result = {}
+    for field, value in values.items():
+        try:
+            value = fields[field].run_validation(value)
+        except ValidationError as exc:
+            result[field] = {"available": False, "errors": exc.detail}
+        else:
+            result[field] = {"available": not bloom.is_taken(field, value)}
+    return Response(result)
+
+@api_view(['GET'])
+def get_user_stats(request, user_id):
+    """Retrieve a user's post, like, comment and task counts from their UserStats row."""
+    counts = stats.get(user_id)
+    if counts is None:
+        return Response({"error": "User not found"}, status=404)
+    return Response({"user_id": user_id, **counts})
+
 @api_view(['PUT'])
 def verify_email(request, user_id):
     """Mark a user's email as verified."""
@@ -47,22 +112,22 @@ def verify_email(request, user_id):
     
 @api_view(['DELETE'])
 def delete_user(request, user_id):
-    """Delete a user by ID."""
+    """Queue deletion of a user with their tasks, comments and likes."""
     try:
-        user = User.objects.get(id=user_id)
-        user.delete()
-        return Response({"message": f"User {user.username} has been deleted successfully."}, status=200)
+        user = User.objects.only('id', 'username').get(id=user_id)
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
+    from . import jobs
+    job = jobs.enqueue('delete_user', {'user_id': user.id}, idempotency_key(request, 'delete_user', user.id))
+    return accepted(job, f"Deletion of user {user.username} has been queued.")
 
 
 # Posts
 @api_view(['GET'])
+@cached_response('post', 'like', 'user')
 def get_posts(request):
-    """Retrieve all posts."""
-    posts = Post.objects.all()
-    serializer = PostSerializer(posts, many=True)
-    return Response(serializer.data)
+    """Retrieve all posts with cursor pagination, newest first."""
+    return _list_page(request, CreatedAtCursorPagination(), fastpath.posts)
 
 @api_view(['POST'])
 def create_post(request):
@@ -74,10 +139,11 @@ def create_post(request):
     return Response(serializer.errors, status=400)
 
 @api_view(['PUT'])
+@rate_limited('like')
 def like_post(request, post_id):
     """Allow a user to like a post."""
     try:
-        post = Post.objects.get(id=post_id)
+        post = Post.objects.only('id', 'title', 'like_count').get(id=post_id)
     except Post.DoesNotExist:
         return Response({"error": "Post not found"}, status=404)
 
@@ -86,22 +152,30 @@ def like_post(request, post_id):
         return Response({"error": "User ID is required"}, status=400)
 
     try:
-        user = User.objects.get(id=user_id)
+        user = User.objects.only('id', 'username').get(id=user_id)
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
 
-    post.liked_by.add(user)
+    if settings.LIKE_WRITE_BEHIND:
+        from . import likebuffer
+        likebuffer.like(post, user.id)
+        liked_by = likebuffer.recent_likers(post, user, likers_limit(request))
+    else:
+        post.like(user.id)
+        liked_by = post.recent_likers(likers_limit(request))
     return Response({
         "message": f"Post '{post.title}' liked by {user.username}.",
         "post_id": post.id,
-        "liked_by": [user.username for user in post.liked_by.all()]
+        "like_count": post.like_count,
+        "liked_by": liked_by
     }, status=200)
 
 @api_view(['PUT'])
+@rate_limited('unlike')
 def unlike_post(request, post_id):
     """Allow a user to unlike a post."""
     try:
-        post = Post.objects.get(id=post_id)
+        post = Post.objects.only('id', 'title', 'like_count').get(id=post_id)
     except Post.DoesNotExist:
         return Response({"error": "Post not found"}, status=404)
 
@@ -110,56 +184,94 @@ def unlike_post(request, post_id):
         return Response({"error": "User ID is required"}, status=400)
 
     try:
-        user = User.objects.get(id=user_id)
+        user = User.objects.only('id', 'username').get(id=user_id)
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
 
-    if user in post.liked_by.all():
-        post.liked_by.remove(user)
+    if settings.LIKE_WRITE_BEHIND:
+        from . import likebuffer
+        unliked = likebuffer.unlike(post, user.id)
+        liked_by = likebuffer.recent_likers(post, user, likers_limit(request)) if unliked else None
+    else:
+        unliked = post.unlike(user.id)
+        liked_by = post.recent_likers(likers_limit(request)) if unliked else None
+    if unliked:
         return Response({
             "message": f"Post '{post.title}' unliked by {user.username}.",
             "post_id": post.id,
-            "liked_by": [user.username for user in post.liked_by.all()]
+            "like_count": post.like_count,
+            "liked_by": liked_by
         }, status=200)
     else:
         return Response({"error": f"{user.username} has not liked this post."}, status=400)
 
+def likers_limit(request):
+    """Number of recent likers to include in a like/unlike response (?likers=N)."""
+    try:
+        limit = int(request.GET.get('likers', LIKERS_PREVIEW_SIZE))
+    except ValueError:
+        limit = LIKERS_PREVIEW_SIZE
+    return max(0, min(limit, LIKERS_MAX_PREVIEW_SIZE))
+
 
 
 @api_view(['PUT'])
 def update_post(request, post_id):
     try:
-        post = Post.objects.get(id=post_id)
+        post = queries.posts().get(id=post_id)
     except Post.DoesNotExist:
         return Response({"error": "Post not found"}, status=404)
+    if (failed := conditional.check_precondition(request, post)) is not None:
+        return failed
 
     serializer = PostSerializer(post, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save()
-        return Response({"message": "Post updated successfully", "data": serializer.data}, status=200)
+        try:
+            failed = conditional.update(request, post, serializer.validated_data)
+        except Post.DoesNotExist:
+            return Response({"error": "Post not found"}, status=404)
+        if failed is not None:
+            return failed
+        response = Response({"message": "Post updated successfully", "data": serializer.data}, status=200)
+        response['ETag'] = conditional.etag(post)
+        return response
     return Response({"error": "Invalid data", "details": serializer.errors}, status=400)
 
 @api_view(['DELETE'])
 def delete_post(request, post_id):
-    try:
-        post = Post.objects.get(id=post_id)
-        post.delete()
-        return Response({"message": "Post deleted successfully"}, status=200)
-    except Post.DoesNotExist:
+    if not Post.objects.filter(id=post_id).exists():
         return Response({"error": "Post not found"}, status=404)
+    from . import deletion
+    deletion.delete_post(post_id)
+    return Response({"message": "Post deleted successfully"}, status=200)
+
+
+
+@api_view(['GET'])
+@cached_response('post', 'like', 'user', 'comment')
+def get_feed(request):
+    """Retrieve published posts, newest first, with like/comment counts and their first comments."""
+    viewer_id = request.query_params.get('user_id')
+    if viewer_id is not None and not viewer_id.isdigit():
+        return Response({"error": "Positive integer user ID is required."}, status=400)
 
+    paginator = CreatedAtCursorPagination()
+    if settings.FEED_TIMELINE:
+        page = paginator.paginate_queryset(queries.timeline(viewer_id), request)
+        serializer = TimelineEntrySerializer(page, many=True)
+    else:
+        page = paginator.paginate_queryset(queries.feed_posts(viewer_id), request)
+        serializer = FeedPostSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 # Tasks
 @api_view(['GET'])
+@cached_response('task', 'user')
 def get_tasks(request):
-    """Retrieve all tasks with pagination."""
-    paginator = PageNumberPagination()
-    paginator.page_size = 10 
-    tasks = Task.objects.all()
-    paginated_tasks = paginator.paginate_queryset(tasks, request)
-    serializer = TaskSerializer(paginated_tasks, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    """Retrieve all tasks, paginated (by cursor with ?pagination=cursor); archived ones too with ?include_archived=1."""
+    reader = fastpath.tasks_including_archived if archive.requested(request) else fastpath.tasks
+    return _list_page(request, id_pagination(request), reader)
 
 @api_view(['POST'])
 def create_task(request):
@@ -176,16 +288,25 @@ def create_task(request):
 def update_task(request, task_id):
     """Update an existing task."""
     try:
-        task = Task.objects.get(id=task_id)
+        task = queries.tasks().get(id=task_id)
     except Task.DoesNotExist:
         return Response({"error": "Task not found"}, status=404)
+    if (failed := conditional.check_precondition(request, task)) is not None:
+        return failed
     serializer = TaskSerializer(task, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save()
-        return Response({
+        try:
+            failed = conditional.update(request, task, serializer.validated_data)
+        except Task.DoesNotExist:
+            return Response({"error": "Task not found"}, status=404)
+        if failed is not None:
+            return failed
+        response = Response({
             "message": "Task updated successfully",
             "data": serializer.data
         })
+        response['ETag'] = conditional.etag(task)
+        return response
     return Response({"error": "Invalid data", "details": serializer.errors}, status=400)
 
 @api_view(['DELETE'])
@@ -201,25 +322,29 @@ def delete_task(request, task_id):
 # Comments
 @api_view(['GET'])
 def get_comments(request):
-    """Retrieve all comments."""
-    comments = Comment.objects.all()
-    serializer = CommentSerializer(comments, many=True)
-    return Response(serializer.data)
+    """Retrieve all comments with cursor pagination, newest first; archived ones too with ?include_archived=1."""
+    reader = fastpath.comments_including_archived if archive.requested(request) else fastpath.comments
+    return _list_page(request, CreatedAtCursorPagination(), reader)
 
 @api_view(['GET'])
+@cached_response('comment:post:{post_id}', 'post', 'user')
 def get_post_comments(request, post_id):
-    """Retrieve all comments for a specific post."""
-    try:
-        post = Post.objects.get(id=post_id)
-    except Post.DoesNotExist:
+    """Retrieve all comments for a specific post; archived ones too with ?include_archived=1."""
+    if not Post.objects.filter(id=post_id).exists():
         return Response({"error": "Post not found"}, status=404)
 
-    comments = post.comments.all()  # Access the related comments
-    serializer = CommentSerializer(comments, many=True)
+    reader = fastpath.comments_including_archived if archive.requested(request) else fastpath.comments
+    fields = requested_fields(request, CommentSerializer)
+    if settings.FAST_READ_PATH:
+        rows = reader.values(fields).filter(post_id=post_id).order_by('created_at', 'id')
+        return Response(reader.serialize(rows, fields))
+    comments = reader.plan(fields).filter(post_id=post_id).order_by('created_at', 'id')
+    serializer = CommentSerializer(comments, many=True, fields=fields)
     return Response(serializer.data)
 
 
 @api_view(['POST'])
+@rate_limited('comment')
 def create_comment(request):
     """Create a new comment."""
     serializer = CommentSerializer(data=request.data)
@@ -238,3 +363,174 @@ def delete_comment(request, comment_id):
     except Comment.DoesNotExist:
         return Response({"error": "Comment not found"}, status=404)
 
+
+# Bulk
+def _bulk_create(request, serializer_class):
+    """Validate an array of objects and insert them with one bulk_create."""
+    serializer = serializer_class(data=request.data, many=True, max_length=settings.BULK_MAX_BATCH_SIZE)
+    if serializer.is_valid():
+        objs = serializer.save()
+        invalidate(serializer_class.Meta.model, objs)
+        return Response(serializer.data, status=201)
+    return Response({"error": "Invalid batch", "details": serializer.errors}, status=400)
+
+def _bulk_update(request, serializer_class, queryset):
+    """Validate an array of partial updates (each with an `id`) and apply them with one bulk_update."""
+    model = serializer_class.Meta.model
+    ids = _batch_ids(request.data)
+    instances = list(queryset.filter(id__in=ids)) if ids else []
+    stale = snapshot(model, instances)
+    serializer = serializer_class(
+        instances, data=request.data, many=True, partial=True, max_length=settings.BULK_MAX_BATCH_SIZE
+    )
+    if serializer.is_valid():
+        objs = serializer.save()
+        invalidate(model, objs, stale)
+        return Response({"message": f"{len(objs)} object(s) updated successfully", "data": serializer.data}, status=200)
+    return Response({"error": "Invalid batch", "details": serializer.errors}, status=400)
+
+def _bulk_delete(request, model):
+    """Delete every object listed in `ids`, or none of them if any is missing."""
+    ids = request.data.get('ids') if isinstance(request.data, dict) else None
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return Response({"error": "A non-empty list of integer IDs is required."}, status=400)
+    if len(ids) > settings.BULK_MAX_BATCH_SIZE:
+        return Response({"error": f"Ensure this list has no more than {settings.BULK_MAX_BATCH_SIZE} IDs."}, status=400)
+
+    with transaction.atomic():
+        queryset = model.objects.filter(id__in=ids)
+        missing = set(ids) - set(queryset.values_list('id', flat=True))
+        if missing:
+            return Response({"error": f"{model.__name__}(s) not found", "ids": sorted(missing)}, status=404)
+        queryset.delete()
+    return Response({"message": f"{len(set(ids))} {model.__name__.lower()}(s) deleted successfully"}, status=200)
+
+def _batch_ids(data):
+    if not isinstance(data, list):
+        return []
+    ids = []
+    for item in data:
+        try:
+            ids.append(int(item['id']))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return ids
+
+@api_view(['POST'])
+def bulk_create_tasks(request):
+    """Create a batch of tasks."""
+    return _bulk_create(request, TaskSerializer)
+
+@api_view(['PUT'])
+def bulk_update_tasks(request):
+    """Update a batch of tasks."""
+    return _bulk_update(request, TaskSerializer, queries.tasks())
+
+@api_view(['DELETE'])
+def bulk_delete_tasks(request):
+    """Delete a batch of tasks by ID."""
+    return _bulk_delete(request, Task)
+
+@api_view(['POST'])
+def bulk_create_posts(request):
+    """Create a batch of posts."""
+    return _bulk_create(request, PostSerializer)
+
+@api_view(['PUT'])
+def bulk_update_posts(request):
+    """Update a batch of posts."""
+    return _bulk_update(request, PostSerializer, queries.posts())
+
+@api_view(['DELETE'])
+def bulk_delete_posts(request):
+    """Delete a batch of posts by ID."""
+    return _bulk_delete(request, Post)
+
+@api_view(['POST'])
+def bulk_create_comments(request):
+    """Create a batch of comments."""
+    return _bulk_create(request, CommentSerializer)
+
+@api_view(['PUT'])
+def bulk_update_comments(request):
+    """Update a batch of comments."""
+    return _bulk_update(request, CommentSerializer, queries.comments())
+
+@api_view(['DELETE'])
+def bulk_delete_comments(request):
+    """Delete a batch of comments by ID."""
+    return _bulk_delete(request, Comment)
+
+
+# Search
+@api_view(['GET'])
+@cached_response('post', 'comment')
+def search(request):
+    """Full-text search over post titles, post content and comments, best matches first."""
+    if not search_available():
+        return Response({"error": "Full-text search is only available on the SQLite database profile."}, status=501)
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "A search query (q) is required."}, status=400)
+    kind = request.query_params.get('type')
+    if kind not in (None, 'post', 'comment'):
+        return Response({"error": "type must be 'post' or 'comment'."}, status=400)
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), SEARCH_MAX_LIMIT)
+        offset = int(request.query_params.get('offset', 0))
+    except ValueError:
+        return Response({"error": "limit and offset must be integers."}, status=400)
+    if limit < 1 or offset < 0:
+        return Response({"error": "limit must be positive and offset non-negative."}, status=400)
+    return Response({"query": query, "results": full_text_search(query, kind, limit, offset)})
+
+
+# Jobs
+def idempotency_key(request, name, default):
+    """Key deduplicating a queued job: the Idempotency-Key header if sent, else `default`."""
+    return f"{name}:{request.headers.get('Idempotency-Key') or default}"
+
+def accepted(job, message):
+    """202 response pointing at the status endpoint of a queued job."""
+    status_url = reverse('get_job', args=[job.id])
+    return Response({"message": message, "job": JobSerializer(job).data, "status_url": status_url},
+                    status=202, headers={'Location': status_url})
+
+@api_view(['GET'])
+def get_job(request, job_id):
+    """Report the status and result of a background job."""
+    try:
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return Response({"error": "Job not found"}, status=404)
+    return Response(JobSerializer(job).data)
+
+
+# Exports
+@require_GET
+def export_tasks(request):
+    """Stream all tasks as NDJSON or CSV."""
+    from . import exports
+    return exports.export(request, fastpath.tasks, 'tasks')
+
+@require_GET
+def export_posts(request):
+    """Stream all posts as NDJSON or CSV."""
+    from . import exports
+    return exports.export(request, fastpath.posts, 'posts')
+
+@require_GET
+def export_comments(request):
+    """Stream all comments as NDJSON or CSV."""
+    from . import exports
+    return exports.export(request, fastpath.comments, 'comments')
+
+
+# Metrics
+def metrics(request):
+    """Expose this process's request metrics in the Prometheus text format, when METRICS_ENABLED."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_ALLOWED_IPS and request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')